@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pipeline import RESULTS_DIR, _git_commit
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Modules a short-lived job or notebook typically starts from.
+MODULES = [
+    'scripts',
+    'scripts.__main__',
+    'scripts.Insurance_eda',
+    'scripts.main_visualization',
+    'scripts.ab_test',
+    'scripts.ab_hypothesis',
+    'scripts.segment_tests',
+    'scripts.incremental',
+    'scripts.risk_index',
+    'scripts.dashboard',
+    'src.data_cleanig',
+    'src.backends',
+    'src.sampling',
+]
+
+# Libraries that should only be loaded by the code paths that use them.
+HEAVY = ['matplotlib', 'matplotlib.pyplot', 'seaborn', 'scipy.stats', 'polars', 'duckdb', 'sklearn', 'xgboost']
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, repeats=5):
+    """
+    Time `import module` in fresh interpreters, so nothing is cached in
+    sys.modules; the interpreter's own start-up is not included.
+    Returns:
+        dict: seconds (best), seconds_median and the HEAVY libraries loaded,
+        or the error if the module cannot be imported.
+    """
+    times = []
+    heavy = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY)],
+                              cwd=REPO_DIR, env={**os.environ, 'PYTHONPATH': REPO_DIR},
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1]}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        times.append(result['seconds'])
+        heavy = result['heavy']
+    return {'seconds': min(times), 'seconds_median': float(np.median(times)), 'heavy': heavy}
+
+
+def run_benchmarks(modules=None, repeats=5):
+    """
+    Measure the import time of each module.
+    Returns:
+        dict: Environment and per-module results.
+    """
+    results = {}
+    for module in modules or MODULES:
+        results[module] = measure_import(module, repeats)
+        if 'error' in results[module]:
+            print(f"{module}: {results[module]['error']}")
+            continue
+        heavy = ', '.join(results[module]['heavy']) or '-'
+        print(f"{module}: {results[module]['seconds'] * 1000:.0f} ms, heavy: {heavy}")
+    return {
+        'commit': _git_commit(),
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'repeats': repeats,
+        'python': sys.version.split()[0],
+        'modules': results,
+    }
+
+
+def compare(baseline, current, threshold=0.10, min_ms=5.0):
+    """
+    Compare two result files module by module. A module regresses when it
+    imports more than threshold (and min_ms) slower or loads heavy libraries
+    it did not load before. The absolute floor keeps millisecond imports
+    from flagging on timer noise.
+    Returns:
+        pd.DataFrame: One row per module.
+    """
+    rows = []
+    for module, now in current['modules'].items():
+        before = baseline['modules'].get(module)
+        if before is None or 'error' in before or 'error' in now:
+            continue
+        ratio = now['seconds'] / before['seconds'] if before['seconds'] else np.nan
+        new_heavy = sorted(set(now['heavy']) - set(before['heavy']))
+        rows.append({
+            'module': module, 'ms_before': before['seconds'] * 1000, 'ms_after': now['seconds'] * 1000,
+            'time_ratio': ratio, 'new_heavy': ', '.join(new_heavy),
+            'regression': (ratio > 1 + threshold and (now['seconds'] - before['seconds']) * 1000 > min_ms)
+                          or bool(new_heavy),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the project modules.")
+    parser.add_argument('--modules', nargs='*', default=None, help="Defaults to MODULES")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=None, help="Defaults to benchmarks/results/<commit>-imports.json")
+    parser.add_argument('--compare', default=None, help="Baseline result file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.modules, args.repeats)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}-imports.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        table = compare(baseline, results, args.threshold)
+        print(table.to_string(index=False))
+        if table['regression'].any():
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleanig import clean_data, load_data
+from src.data_conversion import convert_to_parquet
+from src.synthetic_data import SIZES, write_synthetic
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+NUMERIC_COLUMNS = ['TotalPremium', 'TotalClaims', 'SumInsured', 'CalculatedPremiumPerTerm']
+
+
+def dataset_paths(size, seed):
+    """
+    Synthetic raw extract and its Parquet conversion for a benchmark size,
+    generated on first use and reused by later runs.
+    Returns:
+        tuple: (raw .txt path, Parquet directory)
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    raw_path = os.path.join(DATA_DIR, f'{size}-{seed}.txt')
+    if not os.path.exists(raw_path):
+        write_synthetic(raw_path + '.tmp', SIZES.get(size) or int(size), seed=seed)
+        os.replace(raw_path + '.tmp', raw_path)
+    return raw_path, os.path.join(DATA_DIR, f'{size}-{seed}-parquet')
+
+
+# Each stage is set up outside the measurement and returns the callable to time.
+
+def _stage_conversion(ctx):
+    output_dir = ctx['parquet_dir'] + '-bench'
+
+    def run():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        convert_to_parquet(ctx['raw_path'], output_dir)
+    return run
+
+
+def _stage_load_data(ctx):
+    return lambda: load_data(ctx['parquet_dir'])
+
+
+def _stage_clean_data(ctx):
+    return lambda: clean_data(ctx['data'].copy())
+
+
+def _stage_eda_profile(ctx):
+    from scripts.Insurance_eda import InsuranceEDA
+    return lambda: InsuranceEDA(ctx['clean']).profile
+
+
+def _stage_ab_tests(ctx):
+    from scripts.ab_test import ABTesting
+    return lambda: ABTesting(ctx['clean']).perform_all_tests()
+
+
+def _stage_plot_aggregation(ctx):
+    from scripts.eda_figures import eda_figure_specs
+    from scripts.segment_cube import SegmentCube
+
+    def run():
+        cube = SegmentCube.build(ctx['clean'])
+        cube.rollup(['PostalCode', 'TransactionMonth'], 'mean')
+        cube.rollup(['Province', 'VehicleType'], 'sum')
+        eda_figure_specs(ctx['clean'], NUMERIC_COLUMNS, ['Province', 'VehicleType', 'make'])
+    return run
+
+
+def _stage_scoring(ctx):
+    from src.scoring import MODELS_DIR, FeatureEncoder, Scorer, load_model
+    model_path = os.path.join(MODELS_DIR, 'XGBoost.pkl')
+    # The synthetic data stands in for the training data of the shipped model.
+    encoder = FeatureEncoder.for_model(load_model(model_path)).fit(ctx['clean'])
+    scorer = Scorer(model_path, encoder=encoder)
+    return lambda: scorer.predict(ctx['clean'])
+
+
+STAGES = {
+    'conversion': _stage_conversion,
+    'load_data': _stage_load_data,
+    'clean_data': _stage_clean_data,
+    'eda_profile': _stage_eda_profile,
+    'ab_tests': _stage_ab_tests,
+    'plot_aggregation': _stage_plot_aggregation,
+    'scoring': _stage_scoring,
+}
+
+
+def measure(func, repeats=3):
+    """
+    Time a callable and profile its memory.
+    Timing runs are made without tracing; a separate tracemalloc run records
+    the peak of Python and NumPy/pandas allocations, which is stable across
+    machines and runs, unlike RSS.
+    Returns:
+        dict: seconds (best), seconds_median, peak_mb
+    """
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'seconds_median': float(np.median(times)), 'peak_mb': peak / 1024 ** 2}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(size='100k', seed=0, repeats=3, stages=None, quiet=True):
+    """
+    Run the benchmark stages on a synthetic dataset.
+    Args:
+        size (str): Key of SIZES or a row count.
+        seed (int): Seed of the synthetic data.
+        repeats (int): Timed runs per stage; the best is reported.
+        stages (list, optional): Stage names. Defaults to all of STAGES.
+        quiet (bool): Silence the progress prints of the pipeline code.
+    Returns:
+        dict: Environment, dataset and per-stage results.
+    """
+    stages = stages or list(STAGES)
+    raw_path, parquet_dir = dataset_paths(size, seed)
+    if not os.path.isdir(parquet_dir):
+        convert_to_parquet(raw_path, parquet_dir)
+    ctx = {'raw_path': raw_path, 'parquet_dir': parquet_dir}
+
+    results = {}
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        if quiet:
+            sys.stdout = devnull
+        try:
+            ctx['data'] = load_data(parquet_dir)
+            ctx['clean'] = clean_data(ctx['data'].copy())
+            for name in stages:
+                func = STAGES[name](ctx)
+                results[name] = measure(func, repeats)
+                print(f"{name}: {results[name]['seconds']:.3f}s, peak {results[name]['peak_mb']:.0f} MB",
+                      file=stdout)
+        finally:
+            sys.stdout = stdout
+
+    return {
+        'commit': _git_commit(),
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'size': size,
+        'rows': len(ctx['data']),
+        'seed': seed,
+        'repeats': repeats,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+        },
+        'stages': results,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two result files stage by stage.
+    Args:
+        baseline (dict): Earlier results.
+        current (dict): New results.
+        threshold (float): Relative slowdown or memory growth reported as a
+            regression.
+    Returns:
+        pd.DataFrame: One row per stage with both measurements, their ratio
+        and a regression flag.
+    """
+    if (baseline['size'], baseline['seed']) != (current['size'], current['seed']):
+        print("Warning: results were measured on different datasets.")
+    rows = []
+    for name, now in current['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            continue
+        time_ratio = now['seconds'] / before['seconds'] if before['seconds'] else np.nan
+        memory_ratio = now['peak_mb'] / before['peak_mb'] if before['peak_mb'] else np.nan
+        rows.append({
+            'stage': name,
+            'seconds_before': before['seconds'], 'seconds_after': now['seconds'], 'time_ratio': time_ratio,
+            'peak_mb_before': before['peak_mb'], 'peak_mb_after': now['peak_mb'], 'memory_ratio': memory_ratio,
+            'regression': time_ratio > 1 + threshold or memory_ratio > 1 + threshold,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on synthetic data.")
+    parser.add_argument('--size', default='100k', help=f"One of {', '.join(SIZES)} or a row count")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--stages', nargs='*', choices=list(STAGES), default=None)
+    parser.add_argument('--output', default=None, help="Defaults to benchmarks/results/<commit>-<size>.json")
+    parser.add_argument('--compare', default=None, help="Baseline result file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.size, args.seed, args.repeats, args.stages)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}-{args.size}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        table = compare(baseline, results, args.threshold)
+        print(table.to_string(index=False))
+        if table['regression'].any():
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
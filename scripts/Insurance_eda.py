@@ -1,78 +1,148 @@
+import os
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from scripts.eda_figures import (bar_spec, box_spec, correlation_spec, density_spec,
+                                 eda_figure_specs, histogram_spec, render_figures)
+from scripts.eda_profile import DatasetProfile
+from src.instrumentation import instrument
+from src.sampling import format_ci, resolve_sample
 
 class InsuranceEDA:
-    def __init__(self, df):
-        """Initialize the class with the dataset."""
-        self.df =df
+    def __init__(self, df, sample_fraction=None, sample_rows=None, seed=0):
+        """
+        Initialize the class with the dataset.
+        Args:
+            df (pd.DataFrame or StratifiedSample): The dataset, or a sample
+                from src.sampling.stratified_sample.
+            sample_fraction (float, optional): Work on a stratified sample of
+                this fraction of df instead of the full frame.
+            sample_rows (int, optional): Work on a stratified sample of about
+                this many rows instead.
+            seed (int): Sampling seed.
+        When sampling, the printed statistics are design-weighted estimates
+        with 95% confidence intervals.
+        """
+        self.df, self.sample = resolve_sample(df, sample_fraction, sample_rows, seed)
+        self._profile = None
+
+    @property
+    def profile(self):
+        """Single-pass summary of the dataset, rebuilt after the class modifies it."""
+        if self._profile is None:
+            self._profile = DatasetProfile(self.df)
+        return self._profile
+
+    def refresh_profile(self):
+        """Discard the cached profile, e.g. after modifying self.df directly."""
+        self._profile = None
     
     def display_info(self):
         """Display basic information about the dataset."""
         print("\nDataset Info:")
-        self.df.info()
+        print(f"{self.profile.n_rows} entries, {len(self.profile.columns)} columns, "
+              f"memory usage: {self.profile.memory_bytes / 1024 ** 2:.1f}+ MB")
+        print(self.profile.info())
         print("\nFirst 5 Rows:")
         print(self.df.head())
     
     def check_missing_values(self):
         """Check for missing values in the dataset."""
         print("\nMissing Values:")
-        missing_values = self.df.isnull().sum()
+        missing_values = self.profile.missing
         print(missing_values[missing_values > 0])
+        if self.sample is not None:
+            self._print_estimates("Estimated share missing",
+                                  {col: self.df[col].isna() for col in missing_values.index[missing_values > 0]})
     
+    @instrument()
     def handle_missing_values(self):
-      """Handle missing values in the dataset."""
-      missing_values = self.df.isnull().sum()
-      missing_cols = missing_values[missing_values > 0].index.tolist()
-      #print("missing col are"+missing_cols)
-      if not missing_cols:
-        print("\nNo missing values detected.")
-        return
-
-      print("\nHandling Missing Values:")
-
-      for col in missing_cols:
-        if col not in self.df.columns:
-            print(f"Warning: Column '{col}' not found in dataset. Skipping...")
-            continue  # Skip missing columns to prevent KeyError
-
-        if self.df[col].dtype == 'object':  # Categorical column
-            self.df[col].fillna(self.df[col].mode().iloc[0], inplace=True)  # Fill with mode
-        elif np.issubdtype(self.df[col].dtype, np.number):  # Numerical column
-            self.df[col].fillna(self.df[col].median(), inplace=True)  # Fill with median
-        else:
-            print(f"Skipping column {col}, unsupported data type: {self.df[col].dtype}")
+        """Handle missing values in the dataset."""
+        missing_values = self.profile.missing
+        missing_cols = missing_values[missing_values > 0].index.tolist()
+        #print("missing col are"+missing_cols)
+        if not missing_cols:
+            print("\nNo missing values detected.")
+            return
 
-    print("\nMissing values handled successfully.")
+        print("\nHandling Missing Values:")
+
+        for col in missing_cols:
+            if col not in self.df.columns:
+                print(f"Warning: Column '{col}' not found in dataset. Skipping...")
+                continue  # Skip missing columns to prevent KeyError
+
+            if (self.df[col].dtype == 'object' or isinstance(self.df[col].dtype, pd.CategoricalDtype)
+                    or pd.api.types.is_bool_dtype(self.df[col].dtype)):  # Categorical column
+                self.df[col] = self.df[col].fillna(self.df[col].mode().iloc[0])  # Fill with mode
+            elif np.issubdtype(self.df[col].dtype, np.number):  # Numerical column
+                self.df[col] = self.df[col].fillna(self.profile.stats.at['50%', col])  # Fill with median
+            else:
+                print(f"Skipping column {col}, unsupported data type: {self.df[col].dtype}")
+
+        self.refresh_profile()
+        print("\nMissing values handled successfully.")
 
     
+    @instrument()
     def convert_dates(self, date_columns):
         """Convert specified columns to datetime format."""
         for col in date_columns:
             if col in self.df.columns:
                 self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
+        if self._profile is not None:
+            self._profile.update_columns(self.df, date_columns)
         print("\nDate columns converted.")
     
     def descriptive_statistics(self, num_columns):
         """Calculate and display descriptive statistics for numerical columns."""
         print("\nDescriptive Statistics:")
-        print(self.df[num_columns].describe())
+        if set(num_columns) <= set(self.profile.numeric_columns):
+            print(self.profile.describe(num_columns))
+        else:
+            print(self.df[num_columns].describe())
+        if self.sample is not None:
+            self._print_estimates("Estimated mean", {col: self.df[col] for col in num_columns})
+
+    def _print_estimates(self, label, series):
+        """Print weighted estimates with 95% confidence intervals from the sample."""
+        if not series:
+            return
+        print(f"\n{label} (95% CI) from a stratified sample of {len(self.sample)} of "
+              f"{self.sample.population_rows} rows:")
+        for col, values in series.items():
+            print(f"  {col}: {format_ci(*self.sample.mean(values.astype('float64')), digits=4)}")
     
     def detect_outliers(self, col):
         """Detect outliers using the IQR method for a single column."""
-        Q1 = self.df[col].quantile(0.25)
-        Q3 = self.df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        outliers = self.df[(self.df[col] < (Q1 - 1.5 * IQR)) | (self.df[col] > (Q3 + 1.5 * IQR))]
-        return outliers.shape[0]
+        return self.profile.outlier_count(col)
     
-    def check_outliers(self, num_columns):
-        """Check for outliers in multiple numerical columns."""
+    @instrument()
+    def check_outliers(self, num_columns, output_dir=None):
+        """
+        Check for outliers in multiple numerical columns.
+        With output_dir, box plots are drawn from precomputed box statistics
+        and saved there instead of being shown.
+        """
         print("\nOutlier Counts:")
         outlier_counts = {col: self.detect_outliers(col) for col in num_columns}
         print(outlier_counts)
-        
+        if self.sample is not None:
+            shares = {}
+            for col in num_columns:
+                q1, q3 = self.profile.stats.at['25%', col], self.profile.stats.at['75%', col]
+                values = self.df[col]
+                shares[col] = (values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1))
+            self._print_estimates("Estimated share of outliers", shares)
+
+        if output_dir is not None:
+            specs = [box_spec(col, self.df[col].to_numpy(dtype='float64', na_value=np.nan))
+                     for col in num_columns]
+            return render_figures(specs, output_dir)
+
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         for col in num_columns:
             plt.figure(figsize=(6, 4))
             sns.boxplot(y=self.df[col])
@@ -81,19 +151,36 @@ class InsuranceEDA:
     
     def detect_categorical_columns(self, threshold=20):
         """Detect categorical columns based on unique value count."""
-        cat_columns = [col for col in self.df.columns if self.df[col].dtype == 'object' or self.df[col].nunique() <= threshold]
+        cardinality = self.profile.cardinality
+        cat_columns = [col for col in self.df.columns if self.df[col].dtype == 'object' or cardinality[col] <= threshold]
         print("\nDetected Categorical Columns:", cat_columns)
         return cat_columns
     
+    @instrument()
     def convert_categorical(self, categorical_columns):
         """Convert specified columns to categorical type."""
         for col in categorical_columns:
             if col in self.df.columns:
                 self.df[col] = self.df[col].astype('category')
+        if self._profile is not None:
+            self._profile.update_columns(self.df, categorical_columns)
         print("\nCategorical columns converted.")
     
-    def plot_distributions(self, num_columns, cat_columns):
-        """Plot histograms for numerical columns and bar charts for categorical columns."""
+    @instrument()
+    def plot_distributions(self, num_columns, cat_columns, output_dir=None):
+        """
+        Plot histograms for numerical columns and bar charts for categorical columns.
+        With output_dir, pre-binned histograms and category counts are saved
+        there instead of being shown.
+        """
+        if output_dir is not None:
+            specs = [histogram_spec(col, self.df[col].to_numpy(dtype='float64', na_value=np.nan))
+                     for col in num_columns]
+            specs += [bar_spec(col, self.df[col]) for col in cat_columns]
+            return render_figures(specs, output_dir)
+
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         for col in num_columns:
             plt.figure(figsize=(6, 4))
             sns.histplot(self.df[col], bins=30, kde=True)
@@ -109,9 +196,25 @@ class InsuranceEDA:
             plt.xticks(rotation=45)
             plt.show()
     
-    def correlation_analysis(self):
-        """Analyze correlation between TotalPremium and TotalClaims with ZipCode."""
+    @instrument()
+    def correlation_analysis(self, output_dir=None):
+        """
+        Analyze correlation between TotalPremium and TotalClaims with ZipCode.
+        With output_dir, a 2-D density raster replaces the per-point scatter
+        and both figures are saved there instead of being shown.
+        """
         if 'TotalPremium' in self.df.columns and 'TotalClaims' in self.df.columns and 'PostalCode' in self.df.columns:
+            if output_dir is not None:
+                specs = [
+                    density_spec('TotalPremium', 'TotalClaims',
+                                 self.df['TotalPremium'].to_numpy(dtype='float64', na_value=np.nan),
+                                 self.df['TotalClaims'].to_numpy(dtype='float64', na_value=np.nan)),
+                    correlation_spec(self.df, ['TotalPremium', 'TotalClaims']),
+                ]
+                return render_figures(specs, output_dir)
+
+            import matplotlib.pyplot as plt
+            import seaborn as sns
             plt.figure(figsize=(6, 4))
             sns.scatterplot(x=self.df['TotalPremium'], y=self.df['TotalClaims'], hue=self.df['PostalCode'], alpha=0.6)
             plt.title("Total Premium vs Total Claims by ZipCode")
@@ -127,20 +230,58 @@ class InsuranceEDA:
             plt.title("Correlation Matrix")
             plt.show()
 
-    def run_eda(self):
+    @instrument()
+    def render_figures(self, output_dir, num_columns, cat_columns=None, n_jobs=1, fmt='png'):
+        """
+        Render the whole EDA figure set headlessly to image files.
+        All reductions (histogram bins, box stats, density raster) are done
+        here in numpy; the figures are then drawn across n_jobs processes.
+        Args:
+            output_dir (str): Directory for the images.
+            num_columns (list): Numerical columns.
+            cat_columns (list, optional): Categorical columns. Defaults to
+                detect_categorical_columns().
+            n_jobs (int): Worker processes for drawing.
+            fmt (str): Image format.
+        Returns:
+            list: Written image paths.
+        """
+        if cat_columns is None:
+            cat_columns = [col for col in self.detect_categorical_columns() if col not in num_columns]
+        specs = eda_figure_specs(self.df, num_columns, cat_columns)
+        paths = render_figures(specs, output_dir, n_jobs=n_jobs, fmt=fmt)
+        print(f"\n{len(paths)} figures written to {output_dir}")
+        return paths
+
+    @instrument()
+    def run_eda(self, output_dir=None):
         """Run all EDA steps."""
         self.display_info()
         self.check_missing_values()
         self.handle_missing_values()
         self.convert_dates(['TransactionMonth', 'VehicleIntroDate'])
         self.descriptive_statistics(['TotalPremium', 'TotalClaims', 'SumInsured', 'CalculatedPremiumPerTerm'])
-        self.check_outliers(['TotalPremium', 'TotalClaims', 'SumInsured', 'CalculatedPremiumPerTerm'])
+        self.check_outliers(['TotalPremium', 'TotalClaims', 'SumInsured', 'CalculatedPremiumPerTerm'], output_dir)
         detected_cat_columns = self.detect_categorical_columns()
         self.convert_categorical(detected_cat_columns)
-        self.self.detect_categorical_columns()
-        self.correlation_analysis()
+        self.detect_categorical_columns()
+        self.correlation_analysis(output_dir)
         print("\nEDA completed.")
 
 # Example Usage
 # eda = InsuranceEDA('data.csv')
 # eda.run_eda()
+#
+# Headless batch job: every figure saved as an image, drawn on 4 processes
+# eda.render_figures('figures', ['TotalPremium', 'TotalClaims', 'SumInsured'], n_jobs=4)
+
+
+def main():
+    from src.data_cleanig import load_clean_data
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+    eda = InsuranceEDA(load_clean_data(os.path.join(DATA_DIR, 'raw', 'MachineLearningRating_v3')))
+    eda.run_eda(output_dir=os.path.join(DATA_DIR, 'figures'))
+
+
+if __name__ == '__main__':
+    main()
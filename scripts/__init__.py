@@ -0,0 +1,38 @@
+"""
+Analysis modules of the project. The main classes can be imported from the
+package itself, e.g. `from scripts import ABTesting, InsuranceEDA`.
+
+They are resolved on first access (PEP 562), so importing the package, or a
+single module from it, loads nothing else. Plotting (matplotlib, seaborn)
+and scipy.stats are in turn imported by the functions that need them.
+"""
+import importlib
+
+_EXPORTS = {
+    'InsuranceEDA': 'scripts.Insurance_eda',
+    'InsuranceEda': 'scripts.main_visualization',
+    'ABTesting': 'scripts.ab_test',
+    'DatasetProfile': 'scripts.eda_profile',
+    'SegmentCube': 'scripts.segment_cube',
+    'batch_chi_square': 'scripts.segment_tests',
+    'chi_square_tables': 'scripts.segment_tests',
+    'IncrementalAggregates': 'scripts.incremental',
+    'RiskIndex': 'scripts.risk_index',
+    'DashboardService': 'scripts.dashboard',
+    'shared_service': 'scripts.dashboard',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
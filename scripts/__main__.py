@@ -0,0 +1,72 @@
+"""
+Single entry point for the pipeline stages:
+
+    python -m scripts clean ingest risk-index
+    python -m scripts export --url sqlite:///Data/alphacare.sqlite
+
+Stages run in the order given. Each stage's module is imported only when the
+stage runs, so the entry point itself starts in a few milliseconds. Options
+after the stage names are passed on to the stage, which must then be the
+only one.
+"""
+import argparse
+import importlib
+import sys
+import time
+
+# Stage name -> (module, description); every module has a main().
+STAGES = {
+    'synthetic': ('src.synthetic_data', "Generate a synthetic extract (options: size, --seed, --output)"),
+    'convert': ('src.data_conversion', "Convert the raw extract to monthly Parquet partitions"),
+    'clean': ('src.data_cleanig', "Clean the raw extract and save the cleaned CSV"),
+    'column-store': ('src.column_store', "Build the memory-mapped column store"),
+    'ingest': ('scripts.incremental', "Fold new monthly partitions into the running aggregates"),
+    'eda': ('scripts.Insurance_eda', "Run the EDA and save its figures to Data/figures"),
+    'ab-tests': ('scripts.ab_test', "Run the A/B hypothesis tests"),
+    'risk-index': ('scripts.risk_index', "Rebuild the segment risk index from the aggregates"),
+    'train': ('src.training', "Train and cross-validate the models"),
+    'score': ('src.scoring', "Score Data/output.csv with the trained models (run train first)"),
+    'export': ('src.db_export', "Export the cleaned data and cube to the database (options: --url, ...)"),
+    'dashboard': ('scripts.dashboard', "Load the dashboard service and time its warm queries"),
+}
+
+
+def run_stage(name, argv=()):
+    """
+    Import a stage's module and run its main().
+    Args:
+        name (str): Key of STAGES.
+        argv (list): Command line options for the stage.
+    """
+    module = STAGES[name][0]
+    saved_argv = sys.argv
+    sys.argv = [f"python -m scripts {name}"] + list(argv)
+    start = time.perf_counter()
+    try:
+        importlib.import_module(module).main()
+    finally:
+        sys.argv = saved_argv
+    print(f"Stage {name} finished in {time.perf_counter() - start:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m scripts', usage='%(prog)s stage [stage ...] [stage options]',
+        description="Run pipeline stages.",
+        epilog="stages:\n" + "\n".join(f"  {name:<14}{text}" for name, (_, text) in STAGES.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    argv = list(sys.argv[1:] if argv is None else argv)
+    stages = []
+    while argv and argv[0] in STAGES:
+        stages.append(argv.pop(0))
+    if not stages:
+        parser.parse_args(argv)
+        parser.error("choose at least one stage")
+    if argv and len(stages) > 1:
+        parser.error(f"options {' '.join(argv)} can only be passed to a single stage")
+    for name in stages:
+        run_stage(name, argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,20 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import chi2_contingency, ttest_ind
 
-def load_data(file_path):
+from scripts.resampling import resample_mean_difference, split_labels
+from scripts.segment_tests import batch_chi_square, encode_groups
+from src.schema import read_dataset
+
+def load_data(file_path, usecols=None):
     """
-    Load the dataset into a Pandas DataFrame.
+    Load the dataset into a Pandas DataFrame, typed with the declared column
+    schema in src.schema. Pass usecols to load only the columns a test needs.
     """
     try:
-        df = pd.read_csv(file_path)
-        df['province'] = df['province'].astype(str)
-        df['zip_code'] = df['zip_code'].astype(str)
-        df['gender'] = df['gender'].astype(str)
+        df = read_dataset(file_path, usecols=usecols)
+        for col in ['province', 'zip_code', 'gender']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
         return df
     except Exception as e:
         print(f"Error loading data: {e}")
@@ -31,8 +35,9 @@ def chi_square_test(df, column):
         print(f"Column {column} not found in dataset.")
         return
 
-    contingency_table = pd.crosstab(df[column], df['fraud_flag'])
-    chi2, p, dof, expected = chi2_contingency(contingency_table)
+    outcome, _ = encode_groups(df['fraud_flag'])
+    keep = outcome >= 0
+    p = batch_chi_square(df.loc[keep, [column]], [column], outcome=outcome[keep]).at[0, 'p_value']
     
     print(f"\nChi-Square Test for {column}:")
     print(f"p-value: {p}")
@@ -42,6 +47,30 @@ def chi_square_test(df, column):
     else:
         print(f"✅ Fail to Reject Null Hypothesis: No significant risk differences across {column}.")
 
+def chi_square_screen(df, columns=None, outcome_col='fraud_flag', correction='fdr_bh', alpha=0.05):
+    """
+    Runs the Chi-Square test for many categorical columns in one call.
+    
+    Parameters:
+        df (pd.DataFrame): The dataset.
+        columns (list, optional): Columns to test. Defaults to every categorical column.
+        outcome_col (str): The outcome column the segments are tested against.
+        correction (str): Multiple-testing correction ('fdr_bh', 'holm' or 'bonferroni').
+        alpha (float): Significance level for the adjusted p-values.
+    
+    Returns:
+        pd.DataFrame: One row per column with raw and adjusted p-values.
+    """
+    outcome, _ = encode_groups(df[outcome_col])
+    keep = outcome >= 0
+    if columns is None:
+        columns = [col for col in df.columns if col != outcome_col
+                   and (df[col].dtype == 'object' or isinstance(df[col].dtype, pd.CategoricalDtype))]
+    results = batch_chi_square(df.loc[keep, columns], columns, outcome=outcome[keep],
+                               correction=correction, alpha=alpha)
+    print(results.to_string(index=False))
+    return results
+
 def t_test(df, group_col, metric_col):
     """
     Performs an independent T-Test to check margin (profit) differences between groups.
@@ -67,6 +96,7 @@ def t_test(df, group_col, metric_col):
     group1 = df[df[group_col] == unique_groups[0]][metric_col]
     group2 = df[df[group_col] == unique_groups[1]][metric_col]
     
+    from scipy.stats import ttest_ind
     t_stat, p = ttest_ind(group1, group2, equal_var=False, nan_policy='omit')
     
     print(f"\nT-Test for {metric_col} across {group_col}:")
@@ -76,3 +106,48 @@ def t_test(df, group_col, metric_col):
         print(f"❌ Reject Null Hypothesis: Significant profit margin differences across {group_col}.")
     else:
         print(f"✅ Fail to Reject Null Hypothesis: No significant profit margin differences across {group_col}.")
+
+def resampling_test(df, group_col, metric_col, groups=None, method='permutation',
+                    n_resamples=10_000, n_jobs=1, seed=None):
+    """
+    Non-parametric alternative to t_test for heavy-tailed metrics.
+    
+    Parameters:
+        df (pd.DataFrame): The dataset.
+        group_col (str): The categorical column to group by (e.g., zip_code).
+        metric_col (str): The numerical column to compare (e.g., profit_margin).
+        groups (tuple, optional): (side_a_groups, side_b_groups) to compare.
+            Defaults to the first two groups found, as in t_test.
+        method (str): 'permutation' or 'bootstrap'.
+        n_resamples (int): Number of permutations or bootstrap replicates.
+        n_jobs (int): Worker processes to spread the resamples over.
+        seed (int, optional): Random seed for reproducible p-values.
+    
+    Returns:
+        dict: The observed difference, p-value and (bootstrap) confidence interval.
+    """
+    if group_col not in df.columns or metric_col not in df.columns:
+        print(f"Columns {group_col} or {metric_col} not found in dataset.")
+        return
+
+    if groups is None:
+        unique_groups = df[group_col].dropna().unique()
+        if len(unique_groups) < 2:
+            print(f"Not enough unique values in {group_col} for resampling test.")
+            return
+        groups = ([unique_groups[0]], [unique_groups[1]])
+
+    labels = split_labels(df, group_col, groups)
+    values = df[metric_col].to_numpy(dtype=float)
+    result = resample_mean_difference(values, labels, method=method, n_resamples=n_resamples,
+                                      n_jobs=n_jobs, seed=seed)
+    p = result['p_value']
+    
+    print(f"\n{method.capitalize()} test for {metric_col} across {group_col}:")
+    print(f"p-value: {p}")
+    
+    if p < 0.05:
+        print(f"❌ Reject Null Hypothesis: Significant profit margin differences across {group_col}.")
+    else:
+        print(f"✅ Fail to Reject Null Hypothesis: No significant profit margin differences across {group_col}.")
+    return result
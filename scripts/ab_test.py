@@ -1,79 +1,185 @@
+import os
+
 import pandas as pd
 import numpy as np
-from scipy.stats import ttest_ind, chi2_contingency
+
+from scripts.resampling import margin_difference_test
+from scripts.segment_tests import batch_chi_square, claim_indicator
+from src.backends import group_aggregate
+from src.instrumentation import instrument
+from src.sampling import format_ci, resolve_sample
 
 class ABTesting:
-    def __init__(self, data):
+    def __init__(self, data, backend=None, sample_fraction=None, sample_rows=None, seed=0):
         """
         Initialize the A/B Testing class with the dataset.
         Args:
-            data (pd.DataFrame): The cleaned insurance dataset.
+            data (pd.DataFrame or StratifiedSample): The cleaned insurance
+                dataset, or a sample from src.sampling.stratified_sample.
+            backend (str, optional): Backend for the grouped aggregations,
+                see src.backends.
+            sample_fraction (float, optional): Test on a stratified sample of
+                this fraction of data.
+            sample_rows (int, optional): Test on a stratified sample of about
+                this many rows.
+            seed (int): Sampling seed.
+        On a sample the chi-square tests and the t-test weight each row by
+        its design weight, scaled so the weights sum to the sample size; the
+        permutation and bootstrap tests run on the unweighted sample. The
+        claim frequencies and margins behind the tests are printed as
+        weighted estimates with 95% confidence intervals.
+        """
+        self.data, self.sample = resolve_sample(data, sample_fraction, sample_rows, seed)
+        self.backend = backend
+        self._claims = None
+        self.weights = None
+        if self.sample is not None:
+            self.weights = self.sample.weights * (len(self.sample.weights) / self.sample.weights.sum())
+
+    @property
+    def claims(self):
+        """
+        Claim indicator (TotalClaims > 0) shared by all risk tests, computed once.
         """
-        self.data = data
+        if self._claims is None:
+            self._claims = claim_indicator(self.data)
+        return self._claims
 
+    def _risk_p_value(self, column):
+        """
+        Chi-square p-value for claim frequency across the groups of a column.
+        """
+        if self.sample is not None:
+            self._print_estimates("Claim frequency", self.claims, column)
+        results = batch_chi_square(self.data, [column], outcome=self.claims, weights=self.weights)
+        return results.at[0, 'p_value']
+
+    def _print_estimates(self, label, values, by, max_groups=10):
+        """Print weighted group estimates with 95% confidence intervals from the sample."""
+        estimates = self.sample.group_means(values, by)
+        print(f"{label} by {estimates.index.name} (95% CI), stratified sample of {len(self.sample)} of "
+              f"{self.sample.population_rows} rows:")
+        if len(estimates) > max_groups:
+            widths = estimates['ci_high'] - estimates['ci_low']
+            print(f"  {len(estimates)} groups, estimates {estimates['estimate'].min():.4f} to "
+                  f"{estimates['estimate'].max():.4f}, median CI width {widths.median():.4f}")
+            return
+        for group, row in estimates.iterrows():
+            print(f"  {group}: {format_ci(row['estimate'], row['ci_low'], row['ci_high'], digits=4)}")
+
+    @instrument()
+    def screen_segments(self, columns=None, correction='fdr_bh', alpha=0.05):
+        """
+        Test risk differences across many segment columns at once.
+        Args:
+            columns (list, optional): Columns to screen. Defaults to every
+                categorical column in the dataset.
+            correction (str): 'fdr_bh', 'holm' or 'bonferroni'.
+            alpha (float): Significance level for the adjusted p-values.
+        Returns:
+            pd.DataFrame: One row per column, most significant first.
+        """
+        print("\nScreening risk differences across segment columns...")
+        results = batch_chi_square(self.data, columns, outcome=self.claims,
+                                   correction=correction, alpha=alpha, weights=self.weights)
+        print(results.to_string(index=False))
+        return results
+
+    @instrument()
     def test_risk_across_provinces(self):
         """
         Test the null hypothesis: There are no risk differences across provinces.
         """
         print("\nTesting risk differences across provinces...")
         
-        contingency_table = pd.crosstab(self.data["Province"], self.data["TotalClaims"] > 0)
-        chi2, p_value, _, _ = chi2_contingency(contingency_table)
+        p_value = self._risk_p_value("Province")
 
         if p_value < 0.05:
             print("Reject the null hypothesis. There are significant risk differences across provinces.")
         else:
             print("Fail to reject the null hypothesis. There are no significant risk differences across provinces.")
 
+    @instrument()
     def test_risk_between_zipcodes(self):
         """
         Test the null hypothesis: There are no risk differences between zip codes.
         """
         print("\nTesting risk differences between zip codes...")
         
-        contingency_table = pd.crosstab(self.data["PostalCode"], self.data["TotalClaims"] > 0)
-        chi2, p_value, _, _ = chi2_contingency(contingency_table)
+        p_value = self._risk_p_value("PostalCode")
 
         if p_value < 0.05:
             print("Reject the null hypothesis. There are significant risk differences between zip codes.")
         else:
             print("Fail to reject the null hypothesis. There are no significant risk differences between zip codes.")
 
-    def test_margin_difference_zipcodes(self):
+    @instrument()
+    def test_margin_difference_zipcodes(self, method='ttest', n_resamples=10_000, n_jobs=1, seed=None):
         """
         Test the null hypothesis: There are no significant margin differences between zip codes.
+        Args:
+            method (str): 'ttest' compares the total margin of even and odd zip
+                codes with a t-test; 'permutation' or 'bootstrap' compare them
+                with a non-parametric resampling test instead.
+            n_resamples (int): Resamples for the non-parametric methods.
+            n_jobs (int): Worker processes for the non-parametric methods.
+            seed (int, optional): Random seed for the non-parametric methods.
         """
         print("\nTesting margin differences between zip codes...")
-        
-        profit_by_zipcode = (
-            self.data.groupby("PostalCode")["TotalPremium"].sum() -
-            self.data.groupby("PostalCode")["TotalClaims"].sum()
-        )
+        if self.sample is not None:
+            margin = self.data["TotalPremium"].to_numpy(dtype=float) - self.data["TotalClaims"].to_numpy(dtype=float)
+            parity = pd.Series(np.where(self.data["PostalCode"].to_numpy() % 2 == 0, "even", "odd"),
+                               name="PostalCode parity")
+            self._print_estimates("Mean margin per policy row", margin, parity)
+
+        if method == 'ttest':
+            from scipy.stats import ttest_ind
+            amounts = self.data[["PostalCode", "TotalPremium", "TotalClaims"]]
+            if self.weights is not None:
+                amounts = amounts.assign(TotalPremium=amounts["TotalPremium"] * self.weights,
+                                         TotalClaims=amounts["TotalClaims"] * self.weights)
+            totals = group_aggregate(
+                amounts, ["PostalCode"],
+                {"TotalPremium": ("TotalPremium", "sum"), "TotalClaims": ("TotalClaims", "sum")},
+                backend=self.backend,
+            ).set_index("PostalCode")
+            profit_by_zipcode = totals["TotalPremium"] - totals["TotalClaims"]
 
-        zipcodes_even = profit_by_zipcode.loc[profit_by_zipcode.index % 2 == 0]
-        zipcodes_odd = profit_by_zipcode.loc[profit_by_zipcode.index % 2 != 0]
+            zipcodes_even = profit_by_zipcode.loc[profit_by_zipcode.index % 2 == 0]
+            zipcodes_odd = profit_by_zipcode.loc[profit_by_zipcode.index % 2 != 0]
 
-        t_stat, p_value = ttest_ind(zipcodes_even, zipcodes_odd, nan_policy='omit')
+            t_stat, p_value = ttest_ind(zipcodes_even, zipcodes_odd, nan_policy='omit')
+        else:
+            if self.sample is not None:
+                print(f"The {method} test runs on the unweighted sample.")
+            result = margin_difference_test(
+                self.data, "PostalCode", lambda code: code % 2 == 0, method=method,
+                unit='group', n_resamples=n_resamples, n_jobs=n_jobs, seed=seed,
+            )
+            p_value = result['p_value']
+            print(f"{method.capitalize()} test: even - odd mean margin = {result['difference']:.2f}, "
+                  f"p-value = {p_value:.4f} ({n_resamples} resamples)")
 
         if p_value < 0.05:
             print("Reject the null hypothesis. There are significant margin differences between zip codes.")
         else:
             print("Fail to reject the null hypothesis. There are no significant margin differences between zip codes.")
 
+    @instrument()
     def test_risk_by_gender(self):
         """
         Test the null hypothesis: There are no significant risk differences between women and men.
         """
         print("\nTesting risk differences between genders...")
         
-        contingency_table = pd.crosstab(self.data["Gender"], self.data["TotalClaims"] > 0)
-        chi2, p_value, _, _ = chi2_contingency(contingency_table)
+        p_value = self._risk_p_value("Gender")
 
         if p_value < 0.05:
             print("Reject the null hypothesis. There are significant risk differences between genders.")
         else:
             print("Fail to reject the null hypothesis. There are no significant risk differences between genders.")
 
+    @instrument()
     def perform_all_tests(self):
         """
         Perform all A/B hypothesis tests.
@@ -82,3 +188,13 @@ class ABTesting:
         self.test_risk_between_zipcodes()
         self.test_margin_difference_zipcodes()
         self.test_risk_by_gender()
+
+
+def main():
+    from src.data_cleanig import load_clean_data
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+    ABTesting(load_clean_data(os.path.join(DATA_DIR, 'raw', 'MachineLearningRating_v3'))).perform_all_tests()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+import hashlib
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from scripts.risk_index import RiskIndex
+from scripts.segment_cube import DIMENSIONS, MEASURES, SegmentCube
+from scripts.segment_tests import chi_square_tables, claim_indicator, contingency_counts, segment_columns
+from src.data_cleanig import load_clean_data
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+# Dataset the dashboard serves; defaults to the raw extract, cleaned through the dataset cache.
+SOURCE_ENV_VAR = 'ALPHACARE_DASHBOARD_DATA'
+DEFAULT_SOURCE = os.path.join(DATA_DIR, 'raw', 'MachineLearningRating_v3')
+
+CUBE_MEASURES = MEASURES + ['HasClaim']
+
+# Queries run at startup, so the first analysts hit a warm cache.
+WARMUP = [
+    ('trends', {'by': 'Province'}),
+    ('trends', {'by': 'Province', 'measure': 'TotalPremium'}),
+    ('trends', {'by': 'PostalCode'}),
+    ('claims', {}),
+    ('claims', {'by': ['VehicleType']}),
+    ('claims', {'by': ['Province']}),
+    ('test_results', {}),
+    ('margin_test', {}),
+    ('risk_ranking', {}),
+    ('risk_ranking', {'lowest': False}),
+]
+
+
+def dataset_version(source):
+    """
+    Version of a dataset: changes whenever a file of the source changes.
+    Args:
+        source (str or pd.DataFrame): File, directory or in-memory frame.
+    Returns:
+        str: Hex digest of the file sizes and modification times, or of the
+        frame's content.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, pd.DataFrame):
+        digest.update(pd.util.hash_pandas_object(source, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:16]
+    paths = [source] if os.path.isfile(source) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(source) for name in names)
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, source)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache of query results.
+    Concurrent misses of the same key compute it once; the other callers
+    wait for that result.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._computing = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached value of key, or compute() stored under key on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            key_lock = self._computing.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._entries[key]
+            try:
+                value = compute()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    self._computing.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Entries, hits, misses and hit rate."""
+        total = self.hits + self.misses
+        return {'entries': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+
+class DashboardDataset:
+    """
+    The aggregates every dashboard query reads from: a SegmentCube over the
+    segment dimensions and TransactionMonth, the claim contingency tables of
+    the segment columns, and the RiskIndex. They are computed once per
+    dataset version, so queries roll up small tables instead of grouping the
+    raw rows, and the rows themselves are not kept.
+    """
+
+    def __init__(self, df, version):
+        """
+        Args:
+            df (pd.DataFrame): Cleaned dataset.
+            version (str): Dataset version, see dataset_version.
+        """
+        self.version = version
+        self.rows = len(df)
+        start = time.perf_counter()
+        outcome = claim_indicator(df)
+        parts = pd.DataFrame({col: df[col] for col in DIMENSIONS + MEASURES if col in df.columns})
+        parts['HasClaim'] = outcome
+        self.cube = SegmentCube.build(parts, measures=CUBE_MEASURES)
+        columns = segment_columns(df, exclude=('TotalClaims',))
+        if 'PostalCode' in df.columns and 'PostalCode' not in columns:
+            columns.append('PostalCode')
+        self.contingency = {col: contingency_counts(df, col, outcome) for col in columns}
+        self.risk = RiskIndex.from_frame(df)
+        print(f"Dashboard dataset {version}: {len(df)} rows, {len(self.cube.cells)} cube cells, "
+              f"{len(self.risk.segments)} risk segments in {time.perf_counter() - start:.1f}s")
+
+    @classmethod
+    def load(cls, source):
+        """Load and clean a file or directory (through the dataset cache), or wrap a frame."""
+        version = dataset_version(source)
+        df = source if isinstance(source, pd.DataFrame) else load_clean_data(source)
+        return cls(df, version)
+
+
+def _freeze(value):
+    """Hashable form of a query parameter."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class DashboardService:
+    """
+    Parameterised, memoised queries for the dashboard.
+
+    Results are kept in an LRU cache keyed by query name, parameters and
+    dataset version, so a repeated page interaction is a dictionary lookup
+    and a new dataset version never serves stale results. Every query reads
+    the shared DashboardDataset; use shared_service to get the one instance
+    of a source that all sessions of a process share. Returned frames are
+    copies, so callers may modify them.
+    """
+
+    QUERIES = ('trends', 'claims', 'test_results', 'margin_test', 'risk_ranking')
+
+    def __init__(self, dataset, cache_size=256, source=None):
+        """
+        Args:
+            dataset (DashboardDataset): Data to serve.
+            cache_size (int): Query results kept in the LRU cache.
+            source (str, optional): Where the dataset came from; refresh
+                reloads it from there when it changes.
+        """
+        self.dataset = dataset
+        self.source = source
+        self.cache = LRUCache(cache_size)
+        self._refresh_lock = threading.Lock()
+
+    @classmethod
+    def from_source(cls, source, cache_size=256):
+        return cls(DashboardDataset.load(source), cache_size,
+                   source=None if isinstance(source, pd.DataFrame) else source)
+
+    def query(self, name, **params):
+        """
+        Run a query, or return its cached result.
+        Args:
+            name (str): One of QUERIES.
+            **params: Parameters of the query method.
+        Returns:
+            pd.DataFrame: The result.
+        """
+        if name not in self.QUERIES:
+            raise ValueError(f"Unknown query {name!r}; choose one of {', '.join(self.QUERIES)}")
+        return self._cached(self.dataset, name, params).copy()
+
+    def _cached(self, dataset, name, params):
+        # Key on the bound arguments, so a parameter left at its default and
+        # the same value passed explicitly share one entry.
+        bound = inspect.signature(getattr(self, name)).bind(dataset, **params)
+        bound.apply_defaults()
+        arguments = {k: v for k, v in bound.arguments.items() if k != 'dataset'}
+        key = (name, dataset.version, _freeze(arguments))
+        return self.cache.get_or_compute(key, lambda: getattr(self, name)(dataset, **params))
+
+    def warm(self, queries=None):
+        """
+        Pre-compute queries into the cache.
+        Args:
+            queries (list, optional): (name, params) pairs. Defaults to WARMUP.
+        Returns:
+            float: Seconds taken.
+        """
+        start = time.perf_counter()
+        for name, params in queries or WARMUP:
+            self.query(name, **params)
+        elapsed = time.perf_counter() - start
+        print(f"Warmed {len(queries or WARMUP)} dashboard queries in {elapsed:.2f}s")
+        return elapsed
+
+    def refresh(self, warm=True):
+        """
+        Reload the dataset if its source changed since it was loaded.
+        Results of the old version are no longer hit and age out of the cache.
+        Returns:
+            bool: Whether a new version was loaded.
+        """
+        if self.source is None:
+            return False
+        with self._refresh_lock:
+            if dataset_version(self.source) == self.dataset.version:
+                return False
+            self.dataset = DashboardDataset.load(self.source)
+        if warm:
+            self.warm()
+        return True
+
+    # Queries. Each takes the dataset as its first argument, so a refresh
+    # during a query cannot mix two versions.
+
+    def trends(self, dataset, by='Province', values=None, measure='TotalClaims', stat='sum'):
+        """
+        Monthly trend of a measure per zip code or Province.
+        Args:
+            by (str): 'PostalCode' or 'Province'.
+            values (list, optional): Only these zip codes or provinces.
+            measure (str): TotalClaims, TotalPremium or HasClaim (claim frequency with stat='mean').
+            stat (str): 'sum', 'mean', 'var', 'std' or 'count'.
+        Returns:
+            pd.DataFrame: by, TransactionMonth and the measure, by month.
+        """
+        if values is not None:
+            # Filter the cached trend of all values rather than rolling up again.
+            trend = self._cached(dataset, 'trends', {'by': by, 'measure': measure, 'stat': stat})
+            return trend[trend[by].isin(list(values))].reset_index(drop=True)
+        trend = dataset.cube.rollup([by, 'TransactionMonth'], stat, [measure])
+        return trend.sort_values(['TransactionMonth', by]).reset_index(drop=True)
+
+    def claims(self, dataset, by=('VehicleType', 'Province'), stat='sum'):
+        """
+        Premium and claims per vehicle type and/or Province, with the claim
+        frequency and loss ratio of each group.
+        Returns:
+            pd.DataFrame: One row per group.
+        """
+        by = list(by)
+        sums = dataset.cube.rollup(by, 'sum')
+        result = dataset.cube.rollup(by, stat, MEASURES) if stat != 'sum' else sums[by + MEASURES].copy()
+        counts = dataset.cube.rollup(by, 'count')
+        result['rows'] = counts['rows'].to_numpy()
+        result['claim_frequency'] = (sums['HasClaim'] / counts['rows']).to_numpy()
+        result['loss_ratio'] = (sums['TotalClaims'] / sums['TotalPremium'].where(sums['TotalPremium'] > 0)).to_numpy()
+        return result
+
+    def test_results(self, dataset, columns=None, correction='fdr_bh', alpha=0.05):
+        """
+        Claim-frequency chi-square tests per segment column, from the
+        precomputed contingency tables (see segment_tests.batch_chi_square).
+        """
+        columns = columns or ['Province', 'PostalCode', 'Gender']
+        missing = [col for col in columns if col not in dataset.contingency]
+        if missing:
+            raise KeyError(f"No contingency counts for {missing}")
+        return chi_square_tables({col: dataset.contingency[col] for col in columns}, correction, alpha)
+
+    def margin_test(self, dataset):
+        """
+        t-test of the total margin of even against odd zip codes, as in
+        ABTesting.test_margin_difference_zipcodes.
+        """
+        from scipy.stats import ttest_ind
+        totals = dataset.cube.rollup(['PostalCode'], 'sum', MEASURES).set_index('PostalCode')
+        margin = totals['TotalPremium'] - totals['TotalClaims']
+        even = margin.index.to_numpy() % 2 == 0
+        t_stat, p_value = ttest_ind(margin[even], margin[~even], nan_policy='omit')
+        return pd.DataFrame([{'test': 'margin even vs odd PostalCode', 'mean_even': margin[even].mean(),
+                              'mean_odd': margin[~even].mean(), 't_stat': t_stat, 'p_value': p_value}])
+
+    def risk_ranking(self, dataset, k=20, by='loss_ratio', lowest=True, min_rows=0, province=None):
+        """Lowest (or highest) risk segments, see RiskIndex.top_k."""
+        return dataset.risk.top_k(k, by=by, lowest=lowest, min_rows=min_rows, province=province)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def shared_service(source=None, cache_size=256, warm=True):
+    """
+    The DashboardService of a source, created and warmed on first use and
+    shared by every caller in the process, so concurrent dashboard sessions
+    hold one copy of the dataset and one result cache.
+    Args:
+        source (str, optional): Dataset path. Defaults to
+            ALPHACARE_DASHBOARD_DATA, then the raw extract.
+        cache_size (int): Query results kept in the LRU cache.
+        warm (bool): Run the WARMUP queries when the service is created.
+    Returns:
+        DashboardService: The shared service.
+    """
+    source = os.path.abspath(source or os.environ.get(SOURCE_ENV_VAR) or DEFAULT_SOURCE)
+    with _services_lock:
+        service = _services.get(source)
+        if service is None:
+            service = DashboardService.from_source(source, cache_size)
+            if warm:
+                service.warm()
+            _services[source] = service
+    return service
+
+
+def main():
+    service = shared_service()
+    for name, params in WARMUP:
+        start = time.perf_counter()
+        service.query(name, **params)
+        print(f"{name} {params}: {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(service.cache.stats())
+
+
+if __name__ == '__main__':
+    main()
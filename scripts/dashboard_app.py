@@ -0,0 +1,70 @@
+"""
+Streamlit front end of scripts.dashboard:
+
+    PYTHONPATH=. streamlit run scripts/dashboard_app.py
+
+Every session reads the same shared DashboardService, so the dataset is
+loaded and the cache warmed once per server process.
+"""
+from scripts.dashboard import shared_service
+
+# Streamlit is only needed for the app; the query service works without it.
+try:
+    import streamlit as st
+except ImportError:
+    st = None
+
+
+def trends_page(service):
+    by = st.radio("Group by", ['Province', 'PostalCode'], horizontal=True)
+    measure = st.selectbox("Measure", ['TotalClaims', 'TotalPremium', 'HasClaim'])
+    stat = st.selectbox("Statistic", ['sum', 'mean'])
+    values = None
+    if by == 'PostalCode':
+        codes = st.text_input("Zip codes (comma separated)", "")
+        values = [int(code) for code in codes.split(',') if code.strip()] or None
+    trend = service.query('trends', by=by, values=values, measure=measure, stat=stat)
+    st.line_chart(trend.pivot_table(index='TransactionMonth', columns=by, values=measure, observed=True))
+
+
+def claims_page(service):
+    by = st.multiselect("Group by", ['VehicleType', 'Province'], default=['VehicleType', 'Province'])
+    if by:
+        st.dataframe(service.query('claims', by=by), use_container_width=True)
+
+
+def tests_page(service):
+    st.subheader("Claim frequency across segments (chi-square)")
+    st.dataframe(service.query('test_results'), use_container_width=True)
+    st.subheader("Margin between zip codes (t-test)")
+    st.dataframe(service.query('margin_test'), use_container_width=True)
+
+
+def risk_page(service):
+    by = st.selectbox("Rank by", ['loss_ratio', 'pure_premium', 'frequency', 'severity'])
+    lowest = st.radio("Segments", ['Lowest risk', 'Highest risk'], horizontal=True) == 'Lowest risk'
+    k = st.slider("Segments shown", 5, 100, 20)
+    min_rows = st.number_input("Minimum policy rows", min_value=0, value=0)
+    st.dataframe(service.query('risk_ranking', k=k, by=by, lowest=lowest, min_rows=int(min_rows)),
+                 use_container_width=True)
+
+
+PAGES = {'Trends': trends_page, 'Claims': claims_page, 'Tests': tests_page, 'Risk ranking': risk_page}
+
+
+def main():
+    if st is None:
+        raise ImportError("The dashboard app needs streamlit: pip install -r requirements-optional.txt")
+    st.set_page_config(page_title="AlphaCare Insurance Analytics", layout='wide')
+    service = shared_service()
+    page = st.sidebar.radio("View", list(PAGES))
+    if st.sidebar.button("Reload data"):
+        service.refresh()
+    st.title(page)
+    PAGES[page](service)
+    st.sidebar.caption(f"Dataset {service.dataset.version}, "
+                       f"cache hit rate {service.cache.stats()['hit_rate']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Fine grid used for the binned KDE overlay of histograms.
+KDE_GRID = 512
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+def histogram_spec(name, values, bins=30, kde=True):
+    """
+    Pre-binned histogram with an optional KDE curve, like sns.histplot(kde=True).
+    The KDE is a Gaussian smoothing of a fine histogram (binned KDE), so its
+    cost does not grow with the number of rows.
+    Args:
+        name (str): Column name.
+        values (array-like): Column values; NaNs are ignored.
+        bins (int): Number of histogram bins.
+        kde (bool): Whether to add the density curve.
+    Returns:
+        dict: Figure spec for render_figure.
+    """
+    values = _finite(values)
+    spec = {'kind': 'hist', 'name': f'hist_{name}', 'title': f'Distribution of {name}',
+            'xlabel': name, 'n': len(values)}
+    if len(values) == 0:
+        spec.update(edges=np.array([0.0, 1.0]), counts=np.zeros(1), kde=None)
+        return spec
+    lo, hi = values.min(), values.max()
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    counts, edges = np.histogram(values, bins=bins, range=(lo, hi))
+    spec.update(edges=edges, counts=counts, kde=None)
+
+    std = values.std(ddof=1) if len(values) > 1 else 0.0
+    if kde and std > 0:
+        fine_counts, fine_edges = np.histogram(values, bins=KDE_GRID, range=(lo, hi))
+        step = fine_edges[1] - fine_edges[0]
+        # Scott's rule, the gaussian_kde default used by seaborn.
+        bandwidth = std * len(values) ** (-1 / 5) / step
+        half = int(np.ceil(4 * bandwidth))
+        offsets = np.arange(-half, half + 1)
+        kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+        padded = np.convolve(fine_counts, kernel / kernel.sum(), mode='full')
+        density = padded[half:half + KDE_GRID]
+        # Rescale from fine-bin counts to the histogram's bin width.
+        spec['kde'] = ((fine_edges[:-1] + fine_edges[1:]) / 2,
+                       density * (edges[1] - edges[0]) / step)
+    return spec
+
+
+def box_spec(name, values, whis=1.5, max_fliers=2000):
+    """
+    Precomputed box plot statistics, like sns.boxplot on the raw column.
+    Args:
+        name (str): Column name.
+        values (array-like): Column values; NaNs are ignored.
+        whis (float): Whisker reach in IQRs.
+        max_fliers (int): Outliers drawn at most; beyond that an evenly
+            spaced subset of the distinct outlier values (extremes included)
+            is kept, which looks the same at plot resolution.
+    Returns:
+        dict: Figure spec for render_figure.
+    """
+    values = _finite(values)
+    spec = {'kind': 'box', 'name': f'box_{name}', 'title': f'Box Plot of {name}',
+            'ylabel': name, 'n': len(values)}
+    if len(values) == 0:
+        spec['stats'] = None
+        return spec
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    fliers = np.unique(values[(values < q1 - whis * iqr) | (values > q3 + whis * iqr)])
+    if len(fliers) > max_fliers:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, max_fliers).astype(np.int64)]
+    spec['stats'] = {'med': med, 'q1': q1, 'q3': q3,
+                     'whislo': inside.min(), 'whishi': inside.max(), 'fliers': fliers}
+    spec['outliers'] = int(len(values) - len(inside))
+    return spec
+
+
+def bar_spec(name, series, max_categories=50):
+    """
+    Category counts, like sns.countplot ordered by frequency.
+    Args:
+        name (str): Column name.
+        series (pd.Series): Column values.
+        max_categories (int): Most frequent categories to draw.
+    Returns:
+        dict: Figure spec for render_figure.
+    """
+    counts = series.value_counts()
+    counts = counts[counts > 0]
+    title = f'Bar Chart of {name}'
+    if len(counts) > max_categories:
+        title += f' (top {max_categories} of {len(counts)})'
+        counts = counts.iloc[:max_categories]
+    return {'kind': 'bar', 'name': f'bar_{name}', 'title': title, 'xlabel': name,
+            'labels': [str(label) for label in counts.index], 'counts': counts.to_numpy()}
+
+
+def density_spec(x_name, y_name, x, y, bins=200):
+    """
+    2-D density raster replacing a per-point scatter plot.
+    Args:
+        x_name (str): Column on the x axis.
+        y_name (str): Column on the y axis.
+        x, y (array-like): Values; pairs with a NaN are ignored.
+        bins (int): Raster resolution per axis.
+    Returns:
+        dict: Figure spec for render_figure.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    return {'kind': 'density', 'name': f'density_{x_name}_{y_name}',
+            'title': f'{x_name} vs {y_name}', 'xlabel': x_name, 'ylabel': y_name,
+            'counts': counts, 'x_edges': x_edges, 'y_edges': y_edges, 'n': int(keep.sum())}
+
+
+def correlation_spec(df, columns):
+    """
+    Correlation matrix heatmap, like sns.heatmap(df[columns].corr(), annot=True).
+    """
+    matrix = df[columns].corr()
+    return {'kind': 'heatmap', 'name': 'correlation_' + '_'.join(columns),
+            'title': 'Correlation Matrix', 'labels': list(columns), 'matrix': matrix.to_numpy()}
+
+
+def _draw_hist(ax, spec):
+    edges = spec['edges']
+    ax.stairs(spec['counts'], edges, fill=True, alpha=0.6, edgecolor='white')
+    if spec.get('kde') is not None:
+        ax.plot(*spec['kde'], color='C0')
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel('Count')
+
+
+def _draw_box(ax, spec):
+    if spec['stats'] is not None:
+        ax.bxp([spec['stats']], showfliers=True, widths=0.5)
+    ax.set_xticks([])
+    ax.set_ylabel(spec['ylabel'])
+
+
+def _draw_bar(ax, spec):
+    positions = np.arange(len(spec['labels']))
+    ax.bar(positions, spec['counts'])
+    ax.set_xticks(positions, spec['labels'], rotation=45, ha='right')
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel('count')
+
+
+def _draw_density(ax, spec):
+    from matplotlib.colors import LogNorm
+    counts = np.ma.masked_equal(spec['counts'].T, 0)
+    mesh = ax.pcolormesh(spec['x_edges'], spec['y_edges'], counts,
+                         norm=LogNorm() if counts.count() else None, cmap='viridis')
+    ax.figure.colorbar(mesh, ax=ax, label='rows')
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+
+
+def _draw_heatmap(ax, spec):
+    matrix = spec['matrix']
+    image = ax.imshow(matrix, cmap='coolwarm', vmin=-1, vmax=1)
+    ax.figure.colorbar(image, ax=ax)
+    ticks = np.arange(len(spec['labels']))
+    ax.set_xticks(ticks, spec['labels'], rotation=45, ha='right')
+    ax.set_yticks(ticks, spec['labels'])
+    for i in ticks:
+        for j in ticks:
+            ax.text(j, i, f'{matrix[i, j]:.2f}', ha='center', va='center')
+
+
+_DRAW = {'hist': _draw_hist, 'box': _draw_box, 'bar': _draw_bar,
+         'density': _draw_density, 'heatmap': _draw_heatmap}
+
+_FIGSIZE = {'hist': (6, 4), 'box': (6, 4), 'bar': (8, 6), 'density': (7, 5), 'heatmap': (5, 4)}
+
+
+def figure_path(output_dir, spec, fmt='png'):
+    """Image file name for a spec inside output_dir."""
+    name = re.sub(r'[^\w.-]+', '_', spec['name'])
+    return os.path.join(output_dir, f"{name}.{fmt}")
+
+
+def render_figure(spec, path, dpi=100):
+    """
+    Draw one figure spec to an image file. Uses a standalone Figure with the
+    Agg canvas, so no display or pyplot state is involved. Matplotlib is
+    imported here rather than with the module, so computing specs stays light.
+    Returns:
+        str: The written path.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=_FIGSIZE[spec['kind']])
+    ax = fig.subplots()
+    _DRAW[spec['kind']](ax, spec)
+    ax.set_title(spec['title'])
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def render_figures(specs, output_dir, n_jobs=1, fmt='png', dpi=100):
+    """
+    Render many figure specs to image files, optionally across a process pool.
+    Specs hold only reduced data (bin counts, box stats, rasters), so
+    shipping them to workers is cheap regardless of the dataset size.
+    Args:
+        specs (list): Figure specs from the *_spec functions.
+        output_dir (str): Directory for the images.
+        n_jobs (int): Worker processes; rendering is serial when 1.
+        fmt (str): Image format understood by matplotlib (png, svg, pdf, ...).
+        dpi (int): Resolution of raster formats.
+    Returns:
+        list: Written image paths, in spec order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [figure_path(output_dir, spec, fmt) for spec in specs]
+    if n_jobs > 1 and len(specs) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            return list(pool.map(render_figure, specs, paths, [dpi] * len(specs)))
+    return [render_figure(spec, path, dpi) for spec, path in zip(specs, paths)]
+
+
+def eda_figure_specs(df, num_columns, cat_columns=(), x_col='TotalPremium', y_col='TotalClaims'):
+    """
+    Figure specs for the standard EDA set: histogram and box plot per numeric
+    column, bar chart per categorical column, and the premium/claims density
+    and correlation heatmap.
+    Returns:
+        list: Figure specs.
+    """
+    specs = []
+    for col in num_columns:
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        specs.append(histogram_spec(col, values))
+        specs.append(box_spec(col, values))
+    for col in cat_columns:
+        specs.append(bar_spec(col, df[col]))
+    if x_col in df.columns and y_col in df.columns:
+        specs.append(density_spec(x_col, y_col,
+                                  df[x_col].to_numpy(dtype=np.float64, na_value=np.nan),
+                                  df[y_col].to_numpy(dtype=np.float64, na_value=np.nan)))
+        specs.append(correlation_spec(df, [x_col, y_col]))
+    return specs
@@ -0,0 +1,102 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrument
+
+
+class DatasetProfile:
+    """
+    Summary statistics of a DataFrame, gathered in one vectorised pass.
+
+    Null counts, describe-style statistics, quartiles, IQR outlier counts and
+    per-column cardinalities are computed once and then read by the
+    InsuranceEDA reporting methods instead of each of them rescanning the frame.
+    """
+
+    @instrument('DatasetProfile')
+    def __init__(self, df):
+        """Profile the dataset."""
+        self.n_rows = len(df)
+        self.columns = list(df.columns)
+        self.dtypes = df.dtypes
+        self.memory_bytes = int(df.memory_usage(index=True, deep=False).sum())
+        self.missing = df.isna().sum()
+        self.non_null = self.n_rows - self.missing
+
+        numeric = df.select_dtypes(include='number')
+        self.numeric_columns = list(numeric.columns)
+        self.stats = self._numeric_stats(numeric)
+        self.cardinality = self._cardinality(df)
+
+    def _numeric_stats(self, numeric):
+        """Describe stats, quartiles and IQR outlier counts for all numeric columns at once."""
+        index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'outliers']
+        if not self.numeric_columns:
+            return pd.DataFrame(index=index)
+
+        values = numeric.to_numpy(dtype='float64', na_value=np.nan)
+        has_nan = np.isnan(values).any()
+        percentile = np.nanpercentile if has_nan else np.percentile
+        # All-null columns legitimately produce NaN statistics.
+        with warnings.catch_warnings(), np.errstate(invalid='ignore'):
+            warnings.simplefilter('ignore', RuntimeWarning)
+            q_min, q1, q2, q3, q_max = percentile(values, [0, 25, 50, 75, 100], axis=0)
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0, ddof=1)
+            iqr = q3 - q1
+            # NaN compares False, so missing values are never outliers.
+            outliers = ((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)).sum(axis=0)
+
+        count = self.non_null[self.numeric_columns].to_numpy(dtype='float64')
+        return pd.DataFrame(
+            [count, mean, std, q_min, q1, q2, q3, q_max, outliers],
+            index=index,
+            columns=self.numeric_columns,
+        )
+
+    @staticmethod
+    def _cardinality(df):
+        """Distinct non-null values per column; categoricals are counted from their codes."""
+        cardinality = {}
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                used = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+                cardinality[col] = int(np.count_nonzero(used))
+            else:
+                cardinality[col] = int(series.nunique())
+        return pd.Series(cardinality, dtype='int64')
+
+    def update_columns(self, df, columns):
+        """
+        Refresh the profile for columns whose type was converted in place
+        (e.g. to datetime or category) without rescanning the other columns.
+        """
+        columns = [col for col in columns if col in df.columns]
+        self.dtypes = df.dtypes
+        self.missing.loc[columns] = df[columns].isna().sum()
+        self.non_null = self.n_rows - self.missing
+        self.cardinality.loc[columns] = self._cardinality(df[columns])
+        self.numeric_columns = [col for col in self.numeric_columns
+                                if pd.api.types.is_numeric_dtype(df[col].dtype)]
+        self.stats = self.stats[self.numeric_columns]
+
+    def describe(self, columns=None):
+        """Return pandas-describe style statistics for numeric columns."""
+        stats = self.stats.drop(index='outliers')
+        return stats if columns is None else stats[columns]
+
+    def outlier_count(self, col):
+        """Number of IQR outliers in a numeric column."""
+        return int(self.stats.at['outliers', col])
+
+    def info(self):
+        """Return a df.info() style table of dtypes and non-null counts."""
+        return pd.DataFrame({
+            'Non-Null Count': self.non_null,
+            'Dtype': self.dtypes.astype(str),
+            'Unique': self.cardinality,
+        })
@@ -0,0 +1,268 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.risk_index import RiskIndex, risk_cube
+from scripts.segment_cube import SegmentCube
+from scripts.segment_tests import chi_square_tables, claim_indicator, segment_columns
+from src.data_cleanig import fill_missing_values
+from src.dedup import drop_duplicate_rows
+from src.instrumentation import instrument
+from src.schema import read_dataset
+from src.sketches import QuantileSketch
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+MANIFEST = 'manifest.json'
+SKETCHES = 'sketches.json'
+CUBE = 'cube.parquet'
+CONTINGENCY = 'contingency.parquet'
+RISK_CUBE = 'risk_cube.parquet'
+
+
+def _partition_files(partition_dir):
+    """Monthly '<YYYY-MM>.parquet' files written by data_conversion, oldest first."""
+    return sorted(name for name in os.listdir(partition_dir) if name.endswith('.parquet'))
+
+
+def _file_entry(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _level_counts(df, columns, outcome):
+    """Long-format segment x outcome counts: column, level, outcome, count."""
+    parts = []
+    for col in columns:
+        counts = (
+            pd.DataFrame({'level': df[col].astype(str).to_numpy(), 'outcome': outcome})
+            .groupby(['level', 'outcome'], observed=True)
+            .size()
+            .reset_index(name='count')
+        )
+        counts.insert(0, 'column', col)
+        parts.append(counts)
+    if not parts:
+        return pd.DataFrame(columns=['column', 'level', 'outcome', 'count'])
+    return pd.concat(parts, ignore_index=True)
+
+
+class IncrementalAggregates:
+    """
+    Running aggregates of the monthly partitions, updated one month at a time.
+
+    The state directory holds a manifest of the partitions already ingested,
+    one QuantileSketch per numeric column (for the cleaning medians), the
+    SegmentCube behind the grouped trends, the claim contingency counts
+    behind the segment chi-square tests, and the risk cube the RiskIndex is
+    computed from. All of them are additive, so a new
+    month is aggregated on its own and merged in; the refresh reads only
+    the new partitions, never the history.
+
+    Each new partition is cleaned the way clean_data does it, with the
+    medians as of that month: duplicates are dropped within the partition
+    (rows of different months always differ in TransactionMonth), and
+    missing values are filled from the merged sketches. Months ingested
+    earlier keep the fill values of their time, and medians are
+    approximate (see QuantileSketch), so the aggregates can differ slightly
+    from a full rebuild of data with missing values.
+    """
+
+    def __init__(self, state_dir, segments=None, relative_accuracy=0.01):
+        """
+        Open the state in state_dir, or start an empty one.
+        Args:
+            state_dir (str): Directory holding the persisted state.
+            segments (list, optional): Columns to keep claim counts for.
+                Defaults to the categorical columns plus PostalCode.
+            relative_accuracy (float): Accuracy of new median sketches.
+        """
+        self.state_dir = state_dir
+        self.relative_accuracy = relative_accuracy
+        self._segments = segments
+        self._reset()
+
+        if os.path.exists(os.path.join(state_dir, MANIFEST)):
+            with open(os.path.join(state_dir, MANIFEST)) as f:
+                self.manifest = json.load(f)
+            with open(os.path.join(state_dir, SKETCHES)) as f:
+                self.sketches = {col: QuantileSketch.from_dict(s) for col, s in json.load(f).items()}
+            if os.path.exists(os.path.join(state_dir, CUBE)):
+                self.cube = SegmentCube.load(os.path.join(state_dir, CUBE))
+            if os.path.exists(os.path.join(state_dir, RISK_CUBE)):
+                self.risk_cube = SegmentCube.load(os.path.join(state_dir, RISK_CUBE))
+            self.counts = pd.read_parquet(os.path.join(state_dir, CONTINGENCY))
+            if segments is not None and segments != self.manifest['segments']:
+                raise ValueError(f"State in {state_dir} tracks segments {self.manifest['segments']}; "
+                                 f"rebuild it to change them.")
+
+    def _reset(self):
+        self.manifest = {'partitions': {}, 'segments': self._segments}
+        self.sketches = {}
+        self.cube = None
+        self.risk_cube = None
+        self.counts = _level_counts(pd.DataFrame(), [], np.array([]))
+
+    @property
+    def partitions(self):
+        """Names of the partitions ingested so far."""
+        return list(self.manifest['partitions'])
+
+    def pending(self, partition_dir):
+        """
+        Partitions in partition_dir that have not been ingested yet.
+        Raises:
+            ValueError: If an ingested partition has since been rewritten;
+                its old rows cannot be taken back out of the sketches, so
+                the state has to be rebuilt.
+        """
+        new = []
+        for name in _partition_files(partition_dir):
+            seen = self.manifest['partitions'].get(name)
+            if seen is None:
+                new.append(name)
+            elif {k: seen[k] for k in ('size', 'mtime_ns')} != _file_entry(os.path.join(partition_dir, name)):
+                raise ValueError(f"Partition {name} changed after it was ingested; "
+                                 f"rebuild the state with ingest(..., rebuild=True).")
+        return new
+
+    def medians(self):
+        """Median estimate per numeric column, as used to fill missing values."""
+        return pd.Series({col: sketch.median() for col, sketch in self.sketches.items()}, dtype='float64')
+
+    def contingency(self, column):
+        """
+        Accumulated counts for one segment column.
+        Returns:
+            pd.DataFrame: Indexed by level, one column per outcome code, like
+            segment_tests.contingency_counts.
+        """
+        counts = self.counts[self.counts['column'] == column]
+        if counts.empty:
+            raise KeyError(f"No counts kept for column {column}")
+        table = counts.pivot_table(index='level', columns='outcome', values='count',
+                                   aggfunc='sum', fill_value=0)
+        table.index.name = column
+        table.columns = table.columns.astype(int)
+        return table
+
+    def chi_square(self, columns=None, correction='fdr_bh', alpha=0.05):
+        """
+        Claim-frequency chi-square tests from the accumulated counts, in the
+        layout of segment_tests.batch_chi_square.
+        """
+        columns = columns or list(self.counts['column'].unique())
+        return chi_square_tables({col: self.contingency(col) for col in columns}, correction, alpha)
+
+    def risk_index(self):
+        """
+        RiskIndex of everything ingested, computed from the accumulated risk
+        cube without reading any rows.
+        Raises:
+            ValueError: If the state predates the risk cube.
+        """
+        if self.risk_cube is None:
+            raise ValueError(f"State in {self.state_dir} has no risk cube; "
+                             f"rebuild it with ingest(..., rebuild=True).")
+        return RiskIndex.build(self.risk_cube)
+
+    def _ingest_partition(self, path, clean_dir):
+        data = drop_duplicate_rows(read_dataset(path))
+        numeric = data.select_dtypes(include=['number'])
+        for col in numeric.columns:
+            sketch = self.sketches.setdefault(col, QuantileSketch(self.relative_accuracy))
+            sketch.update(numeric[col].to_numpy())
+        data = fill_missing_values(data, self.medians())
+
+        cube = SegmentCube.build(data)
+        self.cube = cube if self.cube is None else self.cube.merge(cube)
+        # A state saved before the risk cube existed would only cover new months.
+        if self.risk_cube is not None or not self.partitions:
+            risk = risk_cube(data)
+            self.risk_cube = risk if self.risk_cube is None else self.risk_cube.merge(risk)
+
+        if self.manifest['segments'] is None:
+            segments = segment_columns(data, exclude=('TotalClaims',))
+            if 'PostalCode' in data.columns and 'PostalCode' not in segments:
+                segments.append('PostalCode')
+            self.manifest['segments'] = segments
+        counts = _level_counts(data, [c for c in self.manifest['segments'] if c in data.columns],
+                               claim_indicator(data))
+        self.counts = (
+            pd.concat([self.counts, counts], ignore_index=True)
+            .groupby(['column', 'level', 'outcome'], as_index=False)['count']
+            .sum()
+        )
+
+        if clean_dir is not None:
+            os.makedirs(clean_dir, exist_ok=True)
+            data.to_parquet(os.path.join(clean_dir, os.path.basename(path)), index=False)
+        return len(data)
+
+    def save(self):
+        """
+        Write the state. It is written to a temporary directory and moved into
+        place, so an interrupted refresh leaves the previous state intact.
+        """
+        tmp_dir = self.state_dir.rstrip(os.sep) + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        with open(os.path.join(tmp_dir, SKETCHES), 'w') as f:
+            json.dump({col: sketch.to_dict() for col, sketch in self.sketches.items()}, f)
+        if self.cube is not None:
+            self.cube.save(os.path.join(tmp_dir, CUBE))
+        if self.risk_cube is not None:
+            self.risk_cube.save(os.path.join(tmp_dir, RISK_CUBE))
+        self.counts.to_parquet(os.path.join(tmp_dir, CONTINGENCY), index=False)
+        with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.state_dir)
+
+    @instrument()
+    def ingest(self, partition_dir, clean_dir=None, rebuild=False):
+        """
+        Fold the partitions not seen yet into the aggregates and save the state.
+        Args:
+            partition_dir (str): Directory of monthly Parquet files written by
+                data_conversion.convert_to_parquet.
+            clean_dir (str, optional): Also write each cleaned partition here.
+            rebuild (bool): Drop the existing state and ingest every partition.
+        Returns:
+            list: Names of the partitions ingested.
+        """
+        if rebuild:
+            self._reset()
+        new = self.pending(partition_dir)
+        if not new:
+            print(f"No new partitions in {partition_dir}")
+            return []
+
+        start = time.perf_counter()
+        rows = 0
+        for name in new:
+            path = os.path.join(partition_dir, name)
+            entry = _file_entry(path)
+            n_rows = self._ingest_partition(path, clean_dir)
+            rows += n_rows
+            self.manifest['partitions'][name] = {**entry, 'rows': n_rows,
+                                                 'ingested': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            print(f"Ingested {name}: {n_rows} rows")
+        self.save()
+        print(f"Ingested {len(new)} partitions ({rows} rows) in {time.perf_counter() - start:.1f}s; "
+              f"{len(self.partitions)} partitions in {self.state_dir}")
+        return new
+
+
+def main():
+    state = IncrementalAggregates(os.path.join(DATA_DIR, 'incremental'))
+    state.ingest(os.path.join(DATA_DIR, 'raw', 'MachineLearningRating_v3'), clean_dir=os.path.join(DATA_DIR, 'clean', 'monthly'))
+    print(state.chi_square(['Province', 'PostalCode', 'Gender']).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
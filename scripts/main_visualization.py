@@ -1,48 +1,91 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from scripts.segment_cube import DIMENSIONS, SegmentCube
+from src.sampling import resolve_sample
 
 class InsuranceEda:
-    def __init__(self, df):
-        """Initialize the class with the dataset."""
-        self.df = df
+    def __init__(self, df, cube=None, backend=None, sample_fraction=None, sample_rows=None, seed=0):
+        """
+        Initialize the class with the dataset.
+        Args:
+            df (pd.DataFrame or StratifiedSample): The dataset, or a sample
+                from src.sampling.stratified_sample; may be None when a cube
+                is given.
+            cube (SegmentCube, optional): Pre-built aggregate cube, e.g. from
+                SegmentCube.load. Built from df on first use otherwise.
+            backend (str, optional): Backend that builds the cube, see
+                src.backends.
+            sample_fraction (float, optional): Plot from a stratified sample
+                of this fraction of df.
+            sample_rows (int, optional): Plot from a stratified sample of
+                about this many rows.
+            seed (int): Sampling seed.
+        """
+        self.df, self.sample = resolve_sample(df, sample_fraction, sample_rows, seed)
+        self._cube = cube
+        self.backend = backend
+
+    @property
+    def cube(self):
+        """Aggregate cube that backs all grouped plots, built once from df."""
+        if self._cube is None:
+            dims = [col for col in DIMENSIONS + ['ZipCode'] if col in self.df.columns]
+            weights = None if self.sample is None else self.sample.weights
+            self._cube = SegmentCube.build(self.df, dims, backend=self.backend, weights=weights)
+        return self._cube
+
+    def _columns(self):
+        """Columns available to the plots: the raw frame's, or the cube's."""
+        if self.df is not None:
+            return set(self.df.columns)
+        return set(self.cube.dimensions) | set(self.cube.measures)
 
     def ensure_column_exists(self, column_name, default_values=None):
         """Ensure a specific column exists in the dataset; if not, create a default."""
-        if column_name not in self.df.columns:
-            if default_values:
+        if column_name not in self._columns():
+            if default_values and self.df is not None:
                 self.df[column_name] = np.random.choice(default_values, size=len(self.df))
+                self._cube = None
                 print(f"{column_name} column added with dummy values: {default_values}")
             else:
                 print(f"Warning: {column_name} is missing and no default values were provided.")
 
     def ensure_datetime_column(self, date_column):
         """Ensure the given column is in datetime format."""
+        if self.df is None:
+            return
         if date_column in self.df.columns:
-            self.df[date_column] = pd.to_datetime(self.df[date_column], errors='coerce')
+            if not pd.api.types.is_datetime64_any_dtype(self.df[date_column]):
+                self.df[date_column] = pd.to_datetime(self.df[date_column], errors='coerce')
+                self._cube = None
             print(f"{date_column} converted to datetime format.")
         else:
             print(f"Warning: {date_column} not found in dataset.")
 
     def plot_premium_claim_trends(self):
         """Plot TotalPremium and TotalClaims trends over time for a sample ZipCode."""
-        self.ensure_column_exists('ZipCode', ['Z1', 'Z2', 'Z3'])
+        # The cleaned dataset carries PostalCode; ZipCode is only filled with dummies if neither exists.
+        zip_col = 'ZipCode' if 'ZipCode' in self._columns() or 'PostalCode' not in self._columns() else 'PostalCode'
+        self.ensure_column_exists(zip_col, ['Z1', 'Z2', 'Z3'])
         self.ensure_datetime_column('TransactionMonth')
 
-        required_columns = {'TotalPremium', 'TotalClaims', 'ZipCode', 'TransactionMonth'}
-        if not required_columns.issubset(self.df.columns):
-            print(f"Error: Required columns missing: {required_columns - set(self.df.columns)}")
+        required_columns = {'TotalPremium', 'TotalClaims', zip_col, 'TransactionMonth'}
+        if not required_columns.issubset(self._columns()):
+            print(f"Error: Required columns missing: {required_columns - self._columns()}")
             return
 
-        # Group by ZipCode and TransactionMonth, then calculate monthly means
-        monthly_grouped = self.df.groupby(['ZipCode', 'TransactionMonth'])[['TotalPremium', 'TotalClaims']].mean().reset_index()
+        # Roll the cube up to ZipCode and TransactionMonth monthly means
+        monthly_grouped = self.cube.rollup([zip_col, 'TransactionMonth'], 'mean')
 
         # Choose the most frequent ZipCode
-        sample_zip = self.df['ZipCode'].value_counts().idxmax()
-        zip_data = monthly_grouped[monthly_grouped['ZipCode'] == sample_zip]
+        zip_counts = self.cube.rollup([zip_col], 'count')
+        sample_zip = zip_counts.loc[zip_counts['rows'].idxmax(), zip_col]
+        zip_data = monthly_grouped[monthly_grouped[zip_col] == sample_zip]
 
         # Plot
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         plt.figure(figsize=(12, 6))
         sns.lineplot(data=zip_data, x='TransactionMonth', y='TotalPremium', label='TotalPremium', color='blue', marker='o', linewidth=2)
         sns.lineplot(data=zip_data, x='TransactionMonth', y='TotalClaims', label='TotalClaims', color='orange', marker='s', linewidth=2)
@@ -61,14 +104,16 @@ class InsuranceEda:
         self.ensure_column_exists('VehicleType', ['Sedan', 'SUV', 'Truck'])
 
         required_columns = {'Province', 'VehicleType', 'TotalClaims'}
-        if not required_columns.issubset(self.df.columns):
-            print(f"Error: Required columns missing: {required_columns - set(self.df.columns)}")
+        if not required_columns.issubset(self._columns()):
+            print(f"Error: Required columns missing: {required_columns - self._columns()}")
             return
 
-        # Group data by Province and VehicleType
-        covergroup_geography = self.df.groupby(['Province', 'VehicleType'])['TotalClaims'].sum().reset_index()
+        # Roll the cube up to Province and VehicleType
+        covergroup_geography = self.cube.rollup(['Province', 'VehicleType'], 'sum', ['TotalClaims'])
 
         # Plot
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         plt.figure(figsize=(14, 8))
         sns.barplot(data=covergroup_geography, x='Province', y='TotalClaims', hue='VehicleType', palette='viridis')
 
@@ -87,14 +132,16 @@ def plot_average_claim_trends(self):
     self.ensure_datetime_column('TransactionMonth')
 
     required_columns = {'Province', 'TransactionMonth', 'TotalClaims'}
-    if not required_columns.issubset(self.df.columns):
-        print(f"Error: Required columns missing: {required_columns - set(self.df.columns)}")
+    if not required_columns.issubset(self._columns()):
+        print(f"Error: Required columns missing: {required_columns - self._columns()}")
         return
 
-    # Group by Province and TransactionMonth, then calculate the mean TotalClaims
-    premium_geography = self.df.groupby(['Province', 'TransactionMonth'])['TotalClaims'].mean().reset_index()
+    # Roll the cube up to Province and TransactionMonth mean TotalClaims
+    premium_geography = self.cube.rollup(['Province', 'TransactionMonth'], 'mean', ['TotalClaims'])
 
     # Plot
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     plt.figure(figsize=(14, 7))
     sns.lineplot(
         data=premium_geography,
@@ -121,3 +168,7 @@ def plot_average_claim_trends(self):
 # eda = InsuranceEDA('data.csv')
 # eda.plot_premium_claim_trends()
 # eda.plot_claims_by_vehicle_province()
+#
+# Persist the cube once and serve later sessions from it without raw rows:
+# eda.cube.save('segment_cube.parquet')
+# eda = InsuranceEda(None, cube=SegmentCube.load('segment_cube.parquet'))
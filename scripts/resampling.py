@@ -0,0 +1,199 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scripts.segment_tests import encode_groups
+
+# Resamples are drawn in fixed-size blocks, each with its own seed, so results
+# do not depend on how many worker processes share the work.
+BLOCK_SIZE = 1000
+
+# Upper bound on the per-batch work buffer, in bytes.
+BUFFER_BYTES = 64 * 1024 ** 2
+
+_worker_data = {}
+
+
+def split_labels(df, group_col, split):
+    """
+    Assign rows to side A (1), side B (0) or neither (-1) of a group split.
+    Args:
+        df (pd.DataFrame): The dataset.
+        group_col (str): Column holding the groups (e.g. PostalCode).
+        split: Either a predicate called once per distinct group, returning
+            True for side A; a collection of side-A groups (all others go to
+            side B); or a pair (side_a_groups, side_b_groups).
+    Returns:
+        np.ndarray: int8 label per row.
+    """
+    codes, groups = encode_groups(df[group_col])
+    if callable(split):
+        group_labels = np.array([1 if split(g) else 0 for g in groups], dtype=np.int8)
+    elif isinstance(split, tuple) and len(split) == 2:
+        group_labels = np.full(len(groups), -1, dtype=np.int8)
+        group_labels[np.isin(groups, list(split[0]))] = 1
+        group_labels[np.isin(groups, list(split[1]))] = 0
+    else:
+        group_labels = np.isin(groups, list(split)).astype(np.int8)
+    return np.where(codes >= 0, group_labels[codes], -1).astype(np.int8)
+
+
+def _permutation_block(values, labels, n_resamples, rng):
+    """Mean differences for n_resamples random relabellings of the rows."""
+    n = len(values)
+    n_a = int(labels.sum())
+    total = values.sum()
+    batch = max(1, min(n_resamples, BUFFER_BYTES // (8 * n)))
+    buffer = np.empty((batch, n), dtype=np.float64)
+    out = np.empty(n_resamples)
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        view = buffer[:size]
+        view[:] = labels
+        rng.permuted(view, axis=1, out=view)
+        sum_a = view @ values
+        out[start:start + size] = sum_a / n_a - (total - sum_a) / (n - n_a)
+    return out
+
+
+def _bootstrap_block(values, labels, n_resamples, rng):
+    """Mean differences for n_resamples bootstrap replicates within each side."""
+    sides = (values[labels == 1], values[labels == 0])
+    width = max(len(side) for side in sides)
+    # The value buffers of both sides and one shared index buffer fit in BUFFER_BYTES.
+    batch = max(1, min(n_resamples, BUFFER_BYTES // (8 * (sum(len(side) for side in sides) + width))))
+    buffers = [np.empty((batch, len(side))) for side in sides]
+    index = np.empty(batch * width, dtype=np.intp)
+    out = np.empty(n_resamples)
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        means = []
+        for side, buffer in zip(sides, buffers):
+            view = buffer[:size]
+            # A contiguous view, since np.take copies non-contiguous indices.
+            idx = index[:size * len(side)].reshape(size, len(side))
+            # Draw uniform positions into the value buffer and cast them into
+            # the index buffer, so no index matrix is allocated per batch.
+            rng.random(out=view)
+            view *= len(side)
+            idx[...] = view
+            # mode='clip' keeps a position rounded up to len(side) in range,
+            # and unlike mode='raise' does not buffer out.
+            np.take(side, idx, out=view, mode='clip')
+            means.append(view.mean(axis=1))
+        out[start:start + size] = means[0] - means[1]
+    return out
+
+
+_BLOCK_FUNCTIONS = {'permutation': _permutation_block, 'bootstrap': _bootstrap_block}
+
+
+def _init_worker(values, labels):
+    _worker_data['values'] = values
+    _worker_data['labels'] = labels
+
+
+def _run_block(method, n_resamples, seed):
+    return _BLOCK_FUNCTIONS[method](_worker_data['values'], _worker_data['labels'],
+                                    n_resamples, np.random.default_rng(seed))
+
+
+def resample_mean_difference(values, labels, method='permutation', n_resamples=10_000,
+                             n_jobs=1, seed=None, alpha=0.05):
+    """
+    Non-parametric test of the difference in means between side A and side B.
+    Args:
+        values (np.ndarray): One value per unit (row or group).
+        labels (np.ndarray): 1 for side A, 0 for side B, -1 to exclude.
+            Units with a NaN value are excluded as well.
+        method (str): 'permutation' (shuffle labels under the null) or
+            'bootstrap' (resample each side with replacement).
+        n_resamples (int): Number of permutations or bootstrap replicates.
+        n_jobs (int): Worker processes; blocks of BLOCK_SIZE resamples are
+            spread over a process pool when greater than 1.
+        seed (int, optional): Seed for reproducible results, independent of n_jobs.
+        alpha (float): Level for the bootstrap confidence interval.
+    Returns:
+        dict: difference, p_value, ci (bootstrap only), n_a, n_b, method and
+        n_resamples.
+    """
+    if method not in _BLOCK_FUNCTIONS:
+        raise ValueError(f"Unknown resampling method: {method}")
+    values = np.asarray(values, dtype=np.float64)
+    keep = (labels >= 0) & ~np.isnan(values)
+    values = np.ascontiguousarray(values[keep])
+    labels = labels[keep].astype(np.float64)
+    n_a = int(labels.sum())
+    n_b = len(labels) - n_a
+    if n_a == 0 or n_b == 0:
+        raise ValueError("Both sides of the split need at least one unit.")
+    observed = values[labels == 1].mean() - values[labels == 0].mean()
+
+    sizes = [BLOCK_SIZE] * (n_resamples // BLOCK_SIZE)
+    if n_resamples % BLOCK_SIZE:
+        sizes.append(n_resamples % BLOCK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if n_jobs > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(values, labels)) as pool:
+            blocks = list(pool.map(_run_block, [method] * len(sizes), sizes, seeds))
+    else:
+        blocks = [_BLOCK_FUNCTIONS[method](values, labels, size, np.random.default_rng(s))
+                  for size, s in zip(sizes, seeds)]
+    replicates = np.concatenate(blocks)
+
+    result = {'method': method, 'n_resamples': n_resamples, 'n_a': n_a, 'n_b': n_b,
+              'difference': observed, 'ci': None}
+    if method == 'permutation':
+        extreme = np.count_nonzero(np.abs(replicates) >= abs(observed))
+        result['p_value'] = (extreme + 1) / (n_resamples + 1)
+    else:
+        below = np.count_nonzero(replicates <= 0) / n_resamples
+        above = np.count_nonzero(replicates >= 0) / n_resamples
+        result['p_value'] = min(1.0, 2 * min(below, above))
+        result['ci'] = tuple(np.quantile(replicates, [alpha / 2, 1 - alpha / 2]))
+    return result
+
+
+def margin_difference_test(df, group_col, split, method='permutation', unit='row',
+                           n_resamples=10_000, n_jobs=1, seed=None, alpha=0.05,
+                           premium_col='TotalPremium', claims_col='TotalClaims'):
+    """
+    Resampling test for the margin (premium minus claims) difference between
+    two sides of a group split, e.g. even vs odd postal codes.
+    Args:
+        df (pd.DataFrame): The dataset.
+        group_col (str): Column holding the groups.
+        split: Side-A definition, see split_labels.
+        method (str): 'permutation' or 'bootstrap'.
+        unit (str): 'row' compares per-policy margins; 'group' compares the
+            total margin of each group, like the t-test in ABTesting.
+        n_resamples (int): Number of resamples.
+        n_jobs (int): Worker processes.
+        seed (int, optional): Random seed.
+        alpha (float): Level for the bootstrap confidence interval.
+        premium_col (str): Premium column.
+        claims_col (str): Claims column.
+    Returns:
+        dict: See resample_mean_difference.
+    """
+    premium = df[premium_col].to_numpy(dtype=np.float64)
+    claims = df[claims_col].to_numpy(dtype=np.float64)
+    labels = split_labels(df, group_col, split)
+    if unit == 'row':
+        margin = premium - claims
+    elif unit == 'group':
+        # Group totals skip missing amounts, like groupby().sum().
+        codes, groups = encode_groups(df[group_col])
+        valid = codes >= 0
+        margin = (np.bincount(codes[valid], weights=np.nan_to_num(premium[valid]), minlength=len(groups))
+                  - np.bincount(codes[valid], weights=np.nan_to_num(claims[valid]), minlength=len(groups)))
+        group_labels = np.full(len(groups), -1, dtype=np.int8)
+        group_labels[codes[valid]] = labels[valid]
+        present = np.bincount(codes[valid], minlength=len(groups)) > 0
+        labels = np.where(present, group_labels, -1)
+    else:
+        raise ValueError("unit must be 'row' or 'group'.")
+    return resample_mean_difference(margin, labels, method=method, n_resamples=n_resamples,
+                                    n_jobs=n_jobs, seed=seed, alpha=alpha)
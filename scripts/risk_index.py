@@ -0,0 +1,262 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.segment_cube import SegmentCube
+from scripts.segment_tests import claim_indicator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+SEGMENT = ['PostalCode', 'VehicleType', 'CoverType']
+PARENT = 'Province'
+RISK_DIMENSIONS = [PARENT] + SEGMENT
+RISK_MEASURES = ['TotalPremium', 'TotalClaims', 'HasClaim']
+METRICS = ['frequency', 'severity', 'pure_premium', 'loss_ratio']
+CREDIBILITY = ['credibility_frequency', 'credibility_pure_premium']
+
+
+def risk_cube(df):
+    """
+    Aggregate rows into the cube the risk index is built from: premium,
+    claims and claim counts per Province x PostalCode x VehicleType x
+    CoverType. Cubes of different months merge with SegmentCube.merge.
+    Args:
+        df (pd.DataFrame): Cleaned rows.
+    Returns:
+        SegmentCube: The risk cube.
+    """
+    parts = pd.DataFrame({col: df[col] for col in RISK_DIMENSIONS + ['TotalPremium', 'TotalClaims']})
+    parts['HasClaim'] = claim_indicator(df)
+    return SegmentCube.build(parts, RISK_DIMENSIONS, RISK_MEASURES)
+
+
+def _credibility(mean, n, sumsq, parent):
+    """
+    Buhlmann-Straub credibility of cell means relative to their parent group.
+    Args:
+        mean, n, sumsq (np.ndarray): Per-cell mean, exposure and sum of squares.
+        parent (np.ndarray): Parent group code of each cell.
+    Returns:
+        np.ndarray: Credibility Z = n / (n + k) per cell, k = EPV / VHM.
+    """
+    total = n.sum()
+    cells = int((n > 0).sum())
+    groups = len(np.unique(parent[n > 0]))
+    # Expected process variance: pooled variance of rows within cells.
+    epv = np.sum(sumsq - n * mean ** 2) / max(total - cells, 1)
+
+    parent_n = np.bincount(parent, weights=n)
+    parent_mean = np.bincount(parent, weights=n * mean) / np.where(parent_n > 0, parent_n, 1)
+    spread = np.sum(n * (mean - parent_mean[parent]) ** 2)
+    denom = np.sum(parent_n - np.bincount(parent, weights=n ** 2) / np.where(parent_n > 0, parent_n, 1))
+    # Variance of hypothetical means; no credibility when it is not positive.
+    vhm = (spread - (cells - groups) * epv) / denom if denom > 0 else 0.0
+    if vhm <= 0:
+        return np.zeros_like(n, dtype=np.float64)
+    return n / (n + epv / vhm)
+
+
+def _level_metrics(frame, parent, prior):
+    """
+    Credibility-weighted metrics of one level (cells or provinces), each
+    shrunk toward the metrics of its parent.
+    Args:
+        frame (pd.DataFrame): Cube cells summed to the level.
+        parent (np.ndarray): Parent code of each row of frame.
+        prior (dict): Parent metrics, arrays indexed by parent code.
+    Returns:
+        dict: frequency, severity, pure_premium, loss_ratio and the
+        credibility of the claim indicator (credibility_frequency) and of
+        the claim amount per row (credibility_pure_premium). Severity is
+        derived from the two shrunk means and has no credibility of its own.
+    """
+    def column(name):
+        return frame[name].to_numpy(dtype=np.float64)
+
+    estimates = {}
+    for measure, metric, credibility in (('HasClaim', 'frequency', 'credibility_frequency'),
+                                         ('TotalClaims', 'pure_premium', 'credibility_pure_premium')):
+        n = column(f'{measure}_count')
+        mean = column(f'{measure}_sum') / np.where(n > 0, n, 1)
+        z = _credibility(mean, n, column(f'{measure}_sumsq'), parent)
+        estimates[metric] = z * mean + (1 - z) * prior[metric][parent]
+        estimates[credibility] = z
+    # The loss ratio is the shrunk pure premium over the mean premium per row,
+    # so a cell with little premium does not show its raw claims/premium.
+    n = column('TotalPremium_count')
+    premium = column('TotalPremium_sum') / np.where(n > 0, n, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimates['loss_ratio'] = np.where(premium > 0, estimates['pure_premium'] / premium,
+                                           prior['loss_ratio'][parent])
+        estimates['severity'] = np.where(estimates['frequency'] > 0,
+                                         estimates['pure_premium'] / estimates['frequency'], np.nan)
+    return estimates
+
+
+class RiskIndex:
+    """
+    Per-segment claim frequency, severity, pure premium and loss ratio with
+    credibility shrinkage, in a compact table with O(1) lookups.
+
+    Segments are PostalCode x VehicleType x CoverType cells. A cell's
+    statistics are blended with its Province's in proportion to the cell's
+    credibility (Buhlmann-Straub, from the spread between cells and the
+    variance within them), and each Province is blended with the national
+    figures the same way, so thin cells borrow strength instead of showing
+    extreme raw ratios. Scores are computed from a risk cube alone, so the
+    index is rebuilt from aggregated counts (e.g. the cube kept by
+    scripts.incremental), never from raw rows.
+    """
+
+    def __init__(self, segments, provinces, national):
+        """
+        Wrap computed tables; use RiskIndex.build or RiskIndex.load to create one.
+        Args:
+            segments (pd.DataFrame): One row per segment.
+            provinces (pd.DataFrame): One row per Province.
+            national (dict): National metrics.
+        """
+        self.segments = segments.reset_index(drop=True)
+        self.provinces = provinces.reset_index(drop=True)
+        self.national = national
+        keys = zip(*(self.segments[col].astype(object) for col in SEGMENT))
+        self._positions = {key: i for i, key in enumerate(keys)}
+        self._records = self.segments.to_dict('records')
+        self._province_records = {row[PARENT]: row for row in self.provinces.to_dict('records')}
+        self._postal_province = dict(zip(self.segments['PostalCode'], self.segments[PARENT]))
+        self._rows = self.segments['rows'].to_numpy()
+        self._parents = self.segments[PARENT].to_numpy(dtype=object)
+        self._order = {}
+
+    @classmethod
+    def build(cls, cube):
+        """
+        Compute the index from a risk cube.
+        Args:
+            cube (SegmentCube): Cube from risk_cube, possibly merged over months.
+        Returns:
+            RiskIndex: The index.
+        """
+        cells = cube.cells.groupby(RISK_DIMENSIONS, observed=True).sum(numeric_only=True).reset_index()
+        cells = cells[cells['rows'] > 0]
+        parent_codes, parents = pd.factorize(cells[PARENT].astype(object))
+        by_parent = cells.groupby(parent_codes).sum(numeric_only=True)
+        totals = by_parent.sum()
+
+        national = {
+            'frequency': totals['HasClaim_sum'] / totals['HasClaim_count'],
+            'pure_premium': totals['TotalClaims_sum'] / totals['TotalClaims_count'],
+            'loss_ratio': totals['TotalClaims_sum'] / totals['TotalPremium_sum'],
+        }
+        national['severity'] = national['pure_premium'] / national['frequency']
+        province_metrics = _level_metrics(by_parent, np.zeros(len(by_parent), dtype=np.int64),
+                                          {k: np.array([v]) for k, v in national.items()})
+        cell_metrics = _level_metrics(cells, parent_codes, province_metrics)
+
+        segments = cells[RISK_DIMENSIONS].copy()
+        segments['rows'] = cells['rows'].to_numpy()
+        segments['claims'] = cells['HasClaim_sum'].to_numpy()
+        provinces = pd.DataFrame({PARENT: parents, 'rows': by_parent['rows'].to_numpy(),
+                                  'claims': by_parent['HasClaim_sum'].to_numpy()})
+        for table, metrics in ((segments, cell_metrics), (provinces, province_metrics)):
+            for name in CREDIBILITY + METRICS:
+                table[name] = metrics[name]
+
+        national = {name: float(value) for name, value in national.items()}
+        national.update(rows=int(totals['rows']), claims=int(totals['HasClaim_sum']))
+        return cls(segments, provinces, national)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the index directly from cleaned rows."""
+        return cls.build(risk_cube(df))
+
+    def lookup(self, postal_code, vehicle_type, cover_type):
+        """
+        Risk metrics for a quote, in constant time. Segments without history
+        fall back to their Province, and unknown postal codes to the
+        national figures; 'level' in the result says which was used.
+        Returns:
+            dict: Province, metrics, rows, claims, credibility_frequency,
+            credibility_pure_premium and level.
+        """
+        pos = self._positions.get((postal_code, vehicle_type, cover_type))
+        if pos is not None:
+            return {**self._records[pos], 'level': 'segment'}
+        no_credibility = dict.fromkeys(CREDIBILITY, 0.0)
+        province = self._postal_province.get(postal_code)
+        if province is not None:
+            return {**self._province_records[province], **no_credibility, 'level': 'province'}
+        return {**self.national, PARENT: None, **no_credibility, 'level': 'national'}
+
+    def indicated_premium(self, postal_code, vehicle_type, cover_type, target_loss_ratio=0.7):
+        """Premium per policy-month that meets the target loss ratio for a segment."""
+        return self.lookup(postal_code, vehicle_type, cover_type)['pure_premium'] / target_loss_ratio
+
+    def top_k(self, k=10, by='loss_ratio', lowest=True, min_rows=0, province=None):
+        """
+        The k lowest (or highest) risk segments.
+        Segments are pre-sorted once per metric, so a query walks the sorted
+        order only until k segments pass the filters.
+        Args:
+            k (int): Number of segments.
+            by (str): One of METRICS.
+            lowest (bool): Lowest risk first; False for the highest.
+            min_rows (int): Only segments with at least this exposure.
+            province (str, optional): Only segments in this Province.
+        Returns:
+            pd.DataFrame: The segments, best first.
+        """
+        if by not in METRICS:
+            raise ValueError(f"Unknown metric {by!r}; choose one of {', '.join(METRICS)}")
+        values = self.segments[by].to_numpy(dtype=np.float64)
+        if by not in self._order:
+            self._order[by] = np.argsort(np.where(np.isnan(values), np.inf, values), kind='stable')
+        order = self._order[by] if lowest else self._order[by][::-1]
+
+        selected = []
+        for pos in order:
+            if len(selected) == k:
+                break
+            # Segments without the metric are never returned; they sort after
+            # all others, so they end an ascending walk.
+            if np.isnan(values[pos]):
+                if lowest:
+                    break
+                continue
+            if self._rows[pos] >= min_rows and (province is None or self._parents[pos] == province):
+                selected.append(pos)
+        return self.segments.iloc[selected].reset_index(drop=True)
+
+    def save(self, path):
+        """Persist the index to one Parquet file."""
+        segments = self.segments.assign(level='segment')
+        provinces = self.provinces.assign(level='province')
+        for table, columns in ((segments, RISK_DIMENSIONS), (provinces, [PARENT])):
+            for col in columns:
+                table[col] = table[col].astype(str)
+        national = pd.DataFrame([{**self.national, 'level': 'national'}])
+        pd.concat([segments, provinces, national], ignore_index=True).to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save."""
+        table = pd.read_parquet(path)
+        segments = table[table['level'] == 'segment'].drop(columns='level')
+        segments['PostalCode'] = segments['PostalCode'].astype(np.int64)
+        provinces = table[table['level'] == 'province'].drop(columns=['level'] + SEGMENT)
+        national = table[table['level'] == 'national'].iloc[0]
+        national = {key: national[key] for key in ['rows', 'claims'] + METRICS}
+        return cls(segments, provinces, national)
+
+
+def main():
+    from scripts.incremental import IncrementalAggregates
+    index = IncrementalAggregates(os.path.join(DATA_DIR, 'incremental')).risk_index()
+    index.save(os.path.join(DATA_DIR, 'risk_index.parquet'))
+    print(index.top_k(20, by='loss_ratio', min_rows=10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from src.backends import get_backend, group_aggregate
+
+DIMENSIONS = ['PostalCode', 'Province', 'VehicleType', 'TransactionMonth']
+MEASURES = ['TotalPremium', 'TotalClaims']
+
+
+class SegmentCube:
+    """
+    Pre-aggregated premium and claim statistics over segment dimensions.
+
+    Every cell holds the row count and, per measure, the non-null count, sum
+    and sum of squares for one combination of the dimensions. Any grouping
+    over a subset of the dimensions (count, sum, mean, variance) is then a
+    roll-up of the cells instead of a groupby over the raw rows. Cells are
+    additive, so cubes built from different data can be merged.
+    """
+
+    def __init__(self, cells, dimensions, measures):
+        """Wrap an existing cell table; use SegmentCube.build to create one."""
+        self.cells = cells
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+
+    @classmethod
+    def build(cls, df, dimensions=None, measures=None, backend=None, weights=None):
+        """
+        Aggregate the raw rows into cube cells in one groupby.
+        Args:
+            df (pd.DataFrame): The dataset.
+            dimensions (list, optional): Grouping columns. Defaults to the
+                DIMENSIONS present in df.
+            measures (list, optional): Numeric columns. Defaults to MEASURES.
+            backend (str, optional): 'pandas', 'polars' or 'duckdb' for the
+                groupby, see src.backends.
+            weights (array-like, optional): Row weights, e.g. the design
+                weights of a src.sampling sample; rows and counts then
+                estimate population counts and means are weighted.
+        Returns:
+            SegmentCube: The cube.
+        """
+        dimensions = dimensions or [col for col in DIMENSIONS if col in df.columns]
+        measures = measures or MEASURES
+        parts = {col: df[col] for col in dimensions}
+        w = np.ones(len(df), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.float64)
+        parts['rows'] = w
+        for m in measures:
+            values = df[m].astype('float64')
+            parts[f'{m}_count'] = values.notna().to_numpy() * w
+            parts[f'{m}_sum'] = values * w
+            parts[f'{m}_sumsq'] = values * values * w
+        parts = pd.DataFrame(parts)
+        if get_backend(backend) == 'pandas':
+            cells = parts.groupby(dimensions, observed=True, dropna=False).sum().reset_index()
+        else:
+            sums = {col: (col, 'sum') for col in parts.columns if col not in dimensions}
+            cells = group_aggregate(parts, dimensions, sums, backend=backend, dropna=False)
+        return cls(cells, dimensions, measures)
+
+    def merge(self, other):
+        """
+        Combine with a cube over the same dimensions and measures (e.g. a new month).
+        Returns:
+            SegmentCube: The merged cube.
+        """
+        cells = pd.concat([self.cells, other.cells], ignore_index=True)
+        for col in self.dimensions:
+            if isinstance(self.cells[col].dtype, pd.CategoricalDtype):
+                cells[col] = cells[col].astype('category')
+        cells = cells.groupby(self.dimensions, observed=True, dropna=False).sum().reset_index()
+        return SegmentCube(cells, self.dimensions, self.measures)
+
+    def rollup(self, dimensions, stat='mean', measures=None):
+        """
+        Aggregate the cube to a subset of its dimensions.
+        Args:
+            dimensions (list): Dimensions to keep.
+            stat (str): 'count' (rows), 'sum', 'mean', 'var' or 'std'.
+            measures (list, optional): Measures to return. Defaults to all.
+        Returns:
+            pd.DataFrame: One row per group, one column per measure, like
+            df.groupby(dimensions)[measures].<stat>().reset_index().
+        """
+        missing = set(dimensions) - set(self.dimensions)
+        if missing:
+            raise KeyError(f"Cube has no dimensions {sorted(missing)}")
+        measures = measures or self.measures
+        grouped = self.cells.groupby(list(dimensions), observed=True).sum(numeric_only=True)
+
+        result = pd.DataFrame(index=grouped.index)
+        if stat == 'count':
+            result['rows'] = grouped['rows']
+            return result.reset_index()
+        for m in measures:
+            n = grouped[f'{m}_count']
+            total = grouped[f'{m}_sum']
+            if stat == 'sum':
+                result[m] = total
+            elif stat == 'mean':
+                result[m] = total / n.where(n > 0)
+            elif stat in ('var', 'std'):
+                var = (grouped[f'{m}_sumsq'] - total * total / n.where(n > 0)) / (n - 1).where(n > 1)
+                var = var.clip(lower=0)
+                result[m] = np.sqrt(var) if stat == 'std' else var
+            else:
+                raise ValueError(f"Unknown statistic: {stat}")
+        return result.reset_index()
+
+    def save(self, path):
+        """Persist the cube cells to a Parquet file."""
+        self.cells.to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        """Load a cube written by save."""
+        cells = pd.read_parquet(path)
+        measures = [col[:-len('_sum')] for col in cells.columns if col.endswith('_sum')]
+        stat_cols = {f'{m}_{s}' for m in measures for s in ('count', 'sum', 'sumsq')}
+        dimensions = [col for col in cells.columns if col != 'rows' and col not in stat_cols]
+        return cls(cells, dimensions, measures)
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+
+def claim_indicator(df, claims_col='TotalClaims'):
+    """
+    Integer-coded outcome of the risk tests: 1 for rows with a claim, else 0.
+    Args:
+        df (pd.DataFrame): The dataset.
+        claims_col (str): Claim amount column.
+    Returns:
+        np.ndarray: int8 array with one entry per row.
+    """
+    return (df[claims_col].to_numpy() > 0).astype(np.int8)
+
+
+def encode_groups(series):
+    """
+    Integer-code a segment column. Categoricals reuse their codes; other
+    columns are factorized once. Missing values get code -1.
+    Args:
+        series (pd.Series): Segment column.
+    Returns:
+        tuple: (codes as np.ndarray, group labels as pd.Index)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, labels = pd.factorize(series, sort=True)
+    return codes, labels
+
+
+def contingency_counts(df, column, outcome, n_outcomes=2, weights=None):
+    """
+    Segment x outcome counts via bincount, equivalent to pd.crosstab.
+    Rows with a missing segment and segments without rows are left out.
+    Args:
+        df (pd.DataFrame): The dataset.
+        column (str): Segment column.
+        outcome (np.ndarray): Integer outcome codes in [0, n_outcomes), e.g.
+            from claim_indicator.
+        n_outcomes (int): Number of outcome classes.
+        weights (np.ndarray, optional): Row weights, e.g. the design weights
+            of a sample; the counts are then weighted sums.
+    Returns:
+        pd.DataFrame: Counts indexed by segment, one column per outcome code.
+    """
+    codes, labels = encode_groups(df[column])
+    valid = codes >= 0
+    counts = np.bincount(
+        codes[valid].astype(np.int64) * n_outcomes + outcome[valid],
+        weights=None if weights is None else weights[valid],
+        minlength=len(labels) * n_outcomes,
+    ).reshape(len(labels), n_outcomes)
+    table = pd.DataFrame(counts, index=pd.Index(labels, name=column), columns=range(n_outcomes))
+    return table[table.sum(axis=1) > 0]
+
+
+def adjust_pvalues(p_values, method='fdr_bh'):
+    """
+    Correct p-values for multiple testing.
+    Args:
+        p_values (array-like): Raw p-values (NaN entries are ignored).
+        method (str): 'bonferroni', 'holm' or 'fdr_bh' (Benjamini-Hochberg).
+    Returns:
+        np.ndarray: Adjusted p-values, capped at 1.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full_like(p_values, np.nan)
+    tested = ~np.isnan(p_values)
+    p = p_values[tested]
+    m = len(p)
+    if m == 0:
+        return adjusted
+
+    order = np.argsort(p)
+    ranked = p[order]
+    if method == 'bonferroni':
+        result = np.minimum(p * m, 1.0)
+    elif method == 'holm':
+        stepped = np.maximum.accumulate(ranked * (m - np.arange(m)))
+        result = np.empty(m)
+        result[order] = np.minimum(stepped, 1.0)
+    elif method == 'fdr_bh':
+        stepped = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+        result = np.empty(m)
+        result[order] = np.minimum(stepped, 1.0)
+    else:
+        raise ValueError(f"Unknown correction method: {method}")
+    adjusted[tested] = result
+    return adjusted
+
+
+def segment_columns(df, exclude=()):
+    """Categorical-looking columns of df (object, category or bool)."""
+    return [
+        col for col in df.columns
+        if col not in exclude and (df[col].dtype == 'object'
+                                   or isinstance(df[col].dtype, pd.CategoricalDtype)
+                                   or df[col].dtype == 'bool')
+    ]
+
+
+def batch_chi_square(df, columns=None, outcome=None, claims_col='TotalClaims',
+                     correction='fdr_bh', alpha=0.05, weights=None):
+    """
+    Chi-square test of independence between an outcome and many segment
+    columns in one call. The outcome is computed once; each contingency table
+    is built with integer codes and bincount instead of pd.crosstab.
+    Args:
+        df (pd.DataFrame): The dataset.
+        columns (list, optional): Segment columns. Defaults to every
+            categorical column.
+        outcome (np.ndarray, optional): Integer outcome codes. Defaults to
+            claim_indicator(df, claims_col).
+        claims_col (str): Claim amount column for the default outcome.
+        correction (str): Multiple-testing correction, see adjust_pvalues.
+        alpha (float): Significance level applied to the adjusted p-values.
+        weights (np.ndarray, optional): Row weights for the counts, see
+            contingency_counts.
+    Returns:
+        pd.DataFrame: One row per column with groups, chi2, dof, p_value,
+        p_adjusted and reject, sorted by p_adjusted.
+    """
+    if outcome is None:
+        outcome = claim_indicator(df, claims_col)
+    if columns is None:
+        columns = segment_columns(df, exclude=(claims_col,))
+    n_outcomes = int(outcome.max()) + 1 if len(outcome) else 2
+
+    tables = {}
+    for col in columns:
+        tables[col] = contingency_counts(df, col, outcome, n_outcomes, weights)
+    return chi_square_tables(tables, correction, alpha)
+
+
+def chi_square_tables(tables, correction='fdr_bh', alpha=0.05):
+    """
+    Chi-square tests on precomputed segment x outcome count tables, e.g.
+    tables summed across monthly partitions.
+    Args:
+        tables (dict): Column name -> counts table as from contingency_counts.
+        correction (str): Multiple-testing correction, see adjust_pvalues.
+        alpha (float): Significance level applied to the adjusted p-values.
+    Returns:
+        pd.DataFrame: Same layout as batch_chi_square.
+    """
+    from scipy.stats import chi2_contingency
+    rows = []
+    for col, table in tables.items():
+        table = table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+        if table.shape[0] < 2 or table.shape[1] < 2:
+            rows.append({'column': col, 'groups': table.shape[0],
+                         'chi2': np.nan, 'dof': 0, 'p_value': np.nan})
+            continue
+        chi2, p_value, dof, _ = chi2_contingency(table.to_numpy())
+        rows.append({'column': col, 'groups': table.shape[0],
+                     'chi2': chi2, 'dof': dof, 'p_value': p_value})
+
+    results = pd.DataFrame(rows, columns=['column', 'groups', 'chi2', 'dof', 'p_value'])
+    results['p_adjusted'] = adjust_pvalues(results['p_value'], correction)
+    results['reject'] = results['p_adjusted'] < alpha
+    return results.sort_values('p_adjusted', na_position='last').reset_index(drop=True)
@@ -1,12 +1,191 @@
+import json
+
+import numpy as np
 import pandas as pd
+
+from src.instrumentation import instrument
+from src.sketches import QuantileSketch
+
+
+class OutlierCapper:
+    """
+    IQR-based outlier capping with separate fit and transform steps.
+
+    fit learns lower/upper bounds (Q1 - factor * IQR, Q3 + factor * IQR) for
+    every numeric column; transform clips columns to those bounds. Bounds can
+    be saved to JSON, so new monthly data or scoring-time data is capped with
+    exactly the bounds learnt on the training data.
+    """
+
+    def __init__(self, factor=1.5, columns=None):
+        """
+        Args:
+            factor (float): Whisker length in IQRs.
+            columns (list, optional): Columns to cap. Defaults to every numeric
+                column of the data passed to fit.
+        """
+        self.factor = factor
+        self.columns = columns
+        self.lower = None
+        self.upper = None
+
+    def _numeric_columns(self, df):
+        if self.columns is not None:
+            return list(self.columns)
+        return list(df.select_dtypes(include='number').columns)
+
+    def _set_bounds(self, columns, q1, q3):
+        iqr = q3 - q1
+        self.lower = pd.Series(q1 - self.factor * iqr, index=columns, dtype='float64')
+        self.upper = pd.Series(q3 + self.factor * iqr, index=columns, dtype='float64')
+        return self
+
+    def fit(self, df):
+        """
+        Learn the bounds with a single multi-column quantile call.
+        Args:
+            df (pd.DataFrame): Training data.
+        Returns:
+            OutlierCapper: self
+        """
+        columns = self._numeric_columns(df)
+        quartiles = df[columns].quantile([0.25, 0.75])
+        return self._set_bounds(columns, quartiles.loc[0.25].to_numpy(), quartiles.loc[0.75].to_numpy())
+
+    def fit_stream(self, chunks, relative_accuracy=0.01):
+        """
+        Learn the bounds from an iterable of chunks (e.g. src.schema.iter_dataset)
+        with one QuantileSketch per column, without holding the data in memory.
+        Quartiles are within relative_accuracy of the exact values.
+        Args:
+            chunks (iterable): DataFrames with the same columns.
+            relative_accuracy (float): Sketch accuracy.
+        Returns:
+            OutlierCapper: self
+        """
+        sketches = None
+        for chunk in chunks:
+            if sketches is None:
+                sketches = {col: QuantileSketch(relative_accuracy) for col in self._numeric_columns(chunk)}
+            for col, sketch in sketches.items():
+                sketch.update(chunk[col].to_numpy(dtype='float64', na_value=np.nan))
+        return self.fit_sketches(sketches or {})
+
+    def fit_sketches(self, sketches):
+        """
+        Learn the bounds from already populated sketches, e.g. merged monthly ones.
+        Args:
+            sketches (dict): Column name -> QuantileSketch.
+        Returns:
+            OutlierCapper: self
+        """
+        columns = list(sketches)
+        q1 = np.array([sketches[col].quantile(0.25) for col in columns], dtype='float64')
+        q3 = np.array([sketches[col].quantile(0.75) for col in columns], dtype='float64')
+        return self._set_bounds(columns, q1, q3)
+
+    def outlier_counts(self, df):
+        """Number of values below or above the bounds, per column."""
+        columns = [col for col in self.lower.index if col in df.columns]
+        values = df[columns]
+        below = values.lt(self.lower[columns], axis=1)
+        above = values.gt(self.upper[columns], axis=1)
+        return (below | above).sum()
+
+    def _bounds(self, col, dtype):
+        """
+        Bounds of a column for np.clip in its own dtype. A bound that could
+        not be learnt (an all-NaN column at fit time) does not cap at all;
+        integer bounds are rounded inwards.
+        """
+        lower, upper = self.lower[col], self.upper[col]
+        if pd.api.types.is_integer_dtype(dtype):
+            info = np.iinfo(dtype.numpy_dtype if hasattr(dtype, 'numpy_dtype') else dtype)
+            lower = info.min if np.isnan(lower) else min(max(np.ceil(lower), info.min), info.max)
+            upper = info.max if np.isnan(upper) else min(max(np.floor(upper), info.min), info.max)
+            return int(lower), int(upper)
+        return (-np.inf if np.isnan(lower) else lower), (np.inf if np.isnan(upper) else upper)
+
+    def transform(self, df, inplace=True):
+        """
+        Clip the fitted columns to their bounds, one column at a time in the
+        column's own array where pandas allows it, so no block of the frame
+        is copied. dtypes are kept: integer columns are clipped to the
+        bounds rounded inwards, and nullable (extension) columns keep their
+        missing values.
+        Args:
+            df (pd.DataFrame): Data to cap; columns missing from it are skipped.
+            inplace (bool): Modify df itself instead of a copy.
+        Returns:
+            pd.DataFrame: The capped data.
+        """
+        if self.lower is None:
+            raise ValueError("OutlierCapper must be fitted or loaded before transform.")
+        if not inplace:
+            df = df.copy()
+        for col in [col for col in self.lower.index if col in df.columns]:
+            series = df[col]
+            lower, upper = self._bounds(col, series.dtype)
+            if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+                df[col] = series.clip(lower, upper)
+                continue
+            values = series.to_numpy()
+            # A view of the frame's own column; read-only under copy-on-write.
+            if values.flags.writeable:
+                np.clip(values, lower, upper, out=values)
+            else:
+                df[col] = np.clip(values, lower, upper)
+        return df
+
+    def fit_transform(self, df, inplace=True):
+        """Fit on df and cap it."""
+        return self.fit(df).transform(df, inplace=inplace)
+
+    def to_dict(self):
+        """Serialisable state of the fitted bounds."""
+        return {
+            'factor': self.factor,
+            'lower': {col: float(v) for col, v in self.lower.items()},
+            'upper': {col: float(v) for col, v in self.upper.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild a fitted capper from to_dict output."""
+        capper = cls(factor=state['factor'], columns=list(state['lower']))
+        capper.lower = pd.Series(state['lower'], dtype='float64')
+        capper.upper = pd.Series(state['upper'], dtype='float64')
+        return capper
+
+    def save(self, path):
+        """Write the fitted bounds to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Load bounds written by save."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
 class DataCleaner:
     """
     A class for cleaning and preprocessing the insurance data.
     """
     
-    def __init__(self, df):
+    def __init__(self, df, capper=None):
+        """
+        Args:
+            df (pd.DataFrame): The dataset.
+            capper (OutlierCapper, optional): Fitted capper whose bounds are
+                applied as-is, e.g. loaded from the training run. A new one is
+                fitted on df otherwise.
+        """
         self.df = df
+        self.capper = capper
         
+    @instrument()
     def handle_missing_values(self):
         """
         Handle missing values in the dataset.
@@ -23,25 +202,21 @@ class DataCleaner:
         
         print(f"Missing values after cleaning:\n{self.df.isnull().sum()}")
         
+    @instrument()
     def detect_and_handle_outliers(self):
         """
         Detect and handle outliers in the dataset.
         """
         # Detect outliers using the IQR method
-        for column in self.df.select_dtypes(include=['float64', 'int64']).columns:
-            Q1 = self.df[column].quantile(0.25)
-            Q3 = self.df[column].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outliers = self.df[(self.df[column] < lower_bound) | (self.df[column] > upper_bound)]
-            print(f"Outliers detected in column {column}: {len(outliers)}")
-            
-            # Handle outliers by capping them
-            self.df.loc[self.df[column] < lower_bound, column] = lower_bound
-            self.df.loc[self.df[column] > upper_bound, column] = upper_bound
-        
+        if self.capper is None:
+            self.capper = OutlierCapper().fit(self.df)
+        for column, count in self.capper.outlier_counts(self.df).items():
+            print(f"Outliers detected in column {column}: {count}")
+
+        # Handle outliers by capping them
+        self.capper.transform(self.df)
+
+    @instrument()
     def preprocess_data(self):
         """
         Preprocess the data by handling missing values and outliers.
@@ -50,6 +225,9 @@ class DataCleaner:
         self.detect_and_handle_outliers()
         
         return self.df
-data = pd.read_csv('C:\\Users\\nadew\\10x\\week3\\ACIS\\data\\cleaned_data\\cleaned_data_v4.csv')
-data = DataCleaner(data)
-data.handle_missing_values()
+
+
+if __name__ == "__main__":
+    data = pd.read_csv('C:\\Users\\nadew\\10x\\week3\\ACIS\\data\\cleaned_data\\cleaned_data_v4.csv')
+    data = DataCleaner(data)
+    data.handle_missing_values()
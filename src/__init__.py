@@ -1 +0,0 @@
-https://github.com/Daniel-1961/Alpha_care.git
\ No newline at end of file
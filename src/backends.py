@@ -0,0 +1,402 @@
+import os
+
+import pandas as pd
+
+from src.column_store import is_column_store
+from src.schema import COLUMN_TYPES, apply_schema, read_dataset, round_integer_fills
+
+# Polars and DuckDB are optional, and only imported once their backend is
+# selected; the pandas backend works without them.
+pl = None
+duckdb = None
+
+# Default backend when none is passed: pandas, polars or duckdb.
+ENV_VAR = 'ALPHACARE_BACKEND'
+BACKENDS = ('pandas', 'polars', 'duckdb')
+
+AGGREGATIONS = ('sum', 'mean', 'median', 'count', 'size', 'min', 'max', 'std', 'var')
+
+_FILTER_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+
+def get_backend(name=None):
+    """
+    Resolve a backend name, checking that its package is installed.
+    Args:
+        name (str, optional): 'pandas', 'polars' or 'duckdb'. Defaults to the
+            ALPHACARE_BACKEND environment variable, then 'pandas'.
+    Returns:
+        str: The backend name.
+    """
+    name = (name or os.environ.get(ENV_VAR) or 'pandas').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}; choose one of {', '.join(BACKENDS)}")
+    if name != 'pandas' and _import_engine(name) is None:
+        raise ImportError(f"The {name} backend needs the {name} package: pip install {name}")
+    return name
+
+
+def _import_engine(name):
+    """Import polars or duckdb on first use. Returns the module, or None if not installed."""
+    global pl, duckdb
+    try:
+        if name == 'polars' and pl is None:
+            import polars as pl
+        elif name == 'duckdb' and duckdb is None:
+            import duckdb
+    except ImportError:
+        return None
+    return pl if name == 'polars' else duckdb
+
+
+def _check_filters(filters):
+    for col, op, _ in filters or ():
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator {op!r} on {col}")
+
+
+def _parquet_paths(path):
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.parquet'))
+    return [path]
+
+
+def _is_parquet(path):
+    return os.path.isdir(path) or str(path).endswith('.parquet')
+
+
+# pandas
+
+def _pandas_mask(df, filters):
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        series = df[col]
+        if op == 'in':
+            mask &= series.isin(value)
+        elif op == 'not in':
+            mask &= ~series.isin(value)
+        else:
+            mask &= {'==': series.__eq__, '!=': series.__ne__, '<': series.__lt__,
+                     '<=': series.__le__, '>': series.__gt__, '>=': series.__ge__}[op](value)
+    return mask
+
+
+def _pandas_frame(source, usecols, filters, delimiter):
+    if isinstance(source, pd.DataFrame):
+        df = source if usecols is None else source[list(usecols)]
+    else:
+        read_cols = usecols
+        if usecols is not None and filters:
+            read_cols = list(usecols) + [col for col, _, _ in filters if col not in usecols]
+        df = read_dataset(source, usecols=read_cols, delimiter=delimiter)
+    if filters:
+        df = df[_pandas_mask(df, filters)]
+        if usecols is not None:
+            df = df[list(usecols)]
+    return df
+
+
+# polars
+
+def _polars_type(kind):
+    # Integers are read as floats, so values like '5.0' and missing values
+    # parse; apply_schema narrows them again.
+    if kind in ('category', 'datetime'):
+        return pl.Utf8
+    if kind == 'bool':
+        return pl.Boolean
+    return {'int16': pl.Float64, 'int32': pl.Float64, 'float32': pl.Float32, 'float64': pl.Float64}[kind]
+
+
+def _polars_scan(source, delimiter):
+    """Lazy frame over a DataFrame, Parquet file/directory or delimited file."""
+    if isinstance(source, pd.DataFrame):
+        return pl.from_pandas(source).lazy()
+    if is_column_store(source):
+        return pl.from_pandas(read_dataset(source)).lazy()
+    if _is_parquet(source):
+        return pl.scan_parquet(_parquet_paths(source))
+    header = pd.read_csv(source, delimiter=delimiter, nrows=0).columns
+    overrides = {col: _polars_type(COLUMN_TYPES[col]) for col in header if col in COLUMN_TYPES}
+    return pl.scan_csv(source, separator=delimiter, schema_overrides=overrides)
+
+
+def _polars_filter(frame, filters):
+    for col, op, value in filters or ():
+        expr = pl.col(col)
+        if op == 'in':
+            expr = expr.is_in(list(value))
+        elif op == 'not in':
+            expr = ~expr.is_in(list(value))
+        else:
+            expr = {'==': expr.__eq__, '!=': expr.__ne__, '<': expr.__lt__,
+                    '<=': expr.__le__, '>': expr.__gt__, '>=': expr.__ge__}[op](value)
+        frame = frame.filter(expr)
+    return frame
+
+
+def _polars_agg(col, func, name):
+    if func == 'size':
+        return pl.len().alias(name)
+    expr = pl.col(col)
+    if func in ('std', 'var'):
+        return getattr(expr, func)(ddof=1).alias(name)
+    return getattr(expr, func)().alias(name)
+
+
+# duckdb
+
+def _sql_name(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _duckdb_type(kind):
+    if kind in ('category', 'datetime'):
+        return 'VARCHAR'
+    # Integers are read as DOUBLE, like _polars_type.
+    return {'bool': 'BOOLEAN', 'int16': 'DOUBLE', 'int32': 'DOUBLE',
+            'float32': 'FLOAT', 'float64': 'DOUBLE'}[kind]
+
+
+def _duckdb_scan(con, source, delimiter):
+    """Register the source as the 'source' view of con."""
+    if isinstance(source, pd.DataFrame) or is_column_store(source):
+        frame = source if isinstance(source, pd.DataFrame) else read_dataset(source)
+        con.register('source', frame)
+    elif _is_parquet(source):
+        con.read_parquet(_parquet_paths(source)).create_view('source')
+    else:
+        header = pd.read_csv(source, delimiter=delimiter, nrows=0).columns
+        types = {col: _duckdb_type(COLUMN_TYPES[col]) for col in header if col in COLUMN_TYPES}
+        con.read_csv(source, header=True, sep=delimiter, dtype=types).create_view('source')
+
+
+def _sql_where(filters):
+    """WHERE clause and its parameters."""
+    clauses, params = [], []
+    for col, op, value in filters or ():
+        if op in ('in', 'not in'):
+            value = list(value)
+            placeholders = ', '.join('?' * len(value)) or 'NULL'
+            clauses.append(f"{_sql_name(col)} {op.upper()} ({placeholders})")
+            params.extend(value)
+        else:
+            clauses.append(f"{_sql_name(col)} {'=' if op == '==' else op} ?")
+            params.append(value)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+def _sql_agg(col, func):
+    if func == 'size':
+        return 'count(*)'
+    name = _sql_name(col)
+    return {'sum': f'coalesce(sum({name}), 0)', 'mean': f'avg({name})', 'median': f'median({name})',
+            'count': f'count({name})', 'min': f'min({name})', 'max': f'max({name})',
+            'std': f'stddev_samp({name})', 'var': f'var_samp({name})'}[func]
+
+
+def _select_list(usecols):
+    return '*' if usecols is None else ', '.join(_sql_name(col) for col in usecols)
+
+
+def load_dataset(source, usecols=None, filters=None, backend=None, delimiter=','):
+    """
+    Read the dataset with the declared schema through the chosen backend.
+    With polars and duckdb the column list and filters are pushed down into
+    the Parquet or CSV scan, so unused columns are never decoded and Parquet
+    row groups that cannot match are skipped; both engines read with all
+    cores.
+    Args:
+        source (str or pd.DataFrame): CSV file, Parquet file or directory,
+            column store, or an in-memory frame.
+        usecols (list, optional): Only read these columns.
+        filters (list, optional): (column, op, value) tuples combined with
+            AND; op is one of ==, !=, <, <=, >, >=, in, not in.
+        backend (str, optional): See get_backend.
+        delimiter (str): Field delimiter for text input.
+    Returns:
+        pd.DataFrame: Loaded DataFrame with compact dtypes.
+    """
+    backend = get_backend(backend)
+    _check_filters(filters)
+    if backend == 'pandas':
+        return _pandas_frame(source, usecols, filters, delimiter)
+    if backend == 'polars':
+        frame = _polars_filter(_polars_scan(source, delimiter), filters)
+        if usecols is not None:
+            frame = frame.select(list(usecols))
+        return apply_schema(frame.collect().to_pandas())
+    con = duckdb.connect()
+    try:
+        _duckdb_scan(con, source, delimiter)
+        where, params = _sql_where(filters)
+        return apply_schema(con.execute(f"SELECT {_select_list(usecols)} FROM source{where}", params).df())
+    finally:
+        con.close()
+
+
+def _fill_plan(columns, numeric):
+    """Columns clean_data fills with the median and with 'Unknown'."""
+    median_cols, text_cols = [], []
+    for col in columns:
+        kind = COLUMN_TYPES.get(col)
+        if col in numeric and kind not in ('bool', 'datetime'):
+            median_cols.append(col)
+        elif kind == 'category' or (kind is None and col not in numeric):
+            text_cols.append(col)
+    return median_cols, text_cols
+
+
+def _polars_clean(source, usecols, filters, delimiter):
+    frame = _polars_filter(_polars_scan(source, delimiter), filters)
+    if usecols is not None:
+        frame = frame.select(list(usecols))
+    data = frame.unique(keep='first', maintain_order=True).collect()
+    non_null = data.select(pl.all().count()).row(0, named=True)
+    data = data.select([col for col, n in non_null.items() if n > 0])
+
+    numeric = {col for col, dtype in data.schema.items() if dtype.is_numeric()}
+    median_cols, text_cols = _fill_plan(data.columns, numeric)
+    medians = data.select([pl.col(col).median() for col in median_cols]).row(0, named=True) if median_cols else {}
+    medians = round_integer_fills(medians)
+    data = data.with_columns(
+        [pl.col(col).fill_null(medians[col]) for col in median_cols]
+        + [pl.col(col).cast(pl.Utf8).fill_null('Unknown') for col in text_cols]
+    )
+    return data.to_pandas()
+
+
+def _duckdb_clean(source, usecols, filters, delimiter):
+    con = duckdb.connect()
+    try:
+        _duckdb_scan(con, source, delimiter)
+        where, params = _sql_where(filters)
+        # Numbering the rows keeps the first of each set of duplicates, in input order.
+        con.execute(f"CREATE TEMP TABLE numbered AS SELECT {_select_list(usecols)}, "
+                    f"row_number() OVER () AS _row FROM source{where}", params)
+        columns = [row[0] for row in con.execute("DESCRIBE numbered").fetchall() if row[0] != '_row']
+        names = ', '.join(_sql_name(col) for col in columns)
+        con.execute(f"CREATE TEMP TABLE deduped AS SELECT {names}, min(_row) AS _row "
+                    f"FROM numbered GROUP BY ALL")
+
+        counts = con.execute("SELECT " + ', '.join(f"count({_sql_name(col)})" for col in columns)
+                             + " FROM deduped").fetchone()
+        columns = [col for col, n in zip(columns, counts) if n > 0]
+        types = {row[0]: row[1] for row in con.execute("DESCRIBE deduped").fetchall()}
+        numeric = {col for col in columns
+                   if types[col].split('(')[0] in ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT',
+                                                   'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT',
+                                                   'FLOAT', 'DOUBLE', 'DECIMAL')}
+        median_cols, text_cols = _fill_plan(columns, numeric)
+        medians = {}
+        if median_cols:
+            values = con.execute("SELECT " + ', '.join(f"median({_sql_name(col)})" for col in median_cols)
+                                 + " FROM deduped").fetchone()
+            medians = round_integer_fills(dict(zip(median_cols, values)))
+
+        select, params = [], []
+        for col in columns:
+            name = _sql_name(col)
+            if col in medians and medians[col] is not None:
+                select.append(f"coalesce({name}, CAST(? AS {types[col]})) AS {name}")
+                params.append(medians[col])
+            elif col in text_cols:
+                select.append(f"coalesce(CAST({name} AS VARCHAR), 'Unknown') AS {name}")
+            else:
+                select.append(name)
+        return con.execute(f"SELECT {', '.join(select)} FROM deduped ORDER BY _row", params).df()
+    finally:
+        con.close()
+
+
+def clean_dataset(source, usecols=None, filters=None, backend=None, delimiter=','):
+    """
+    Load and clean the dataset in one query, with the same rules as
+    data_cleanig.clean_data: drop duplicate rows (keeping the first), drop
+    all-null columns, fill numeric gaps with the column median and text gaps
+    with 'Unknown'. With polars or duckdb the scan, deduplication, medians
+    and fills run inside the engine and only the result is converted to
+    pandas, with a fresh RangeIndex.
+    Args:
+        source (str or pd.DataFrame): Raw dataset, as for load_dataset.
+        usecols (list, optional): Only read these columns.
+        filters (list, optional): Row filters, as for load_dataset.
+        backend (str, optional): See get_backend.
+        delimiter (str): Field delimiter for text input.
+    Returns:
+        pd.DataFrame: Cleaned dataset.
+    """
+    backend = get_backend(backend)
+    _check_filters(filters)
+    if backend == 'pandas':
+        from src.data_cleanig import clean_data
+        return clean_data(_pandas_frame(source, usecols, filters, delimiter).copy(), backend='pandas')
+    if backend == 'polars':
+        data = _polars_clean(source, usecols, filters, delimiter)
+    else:
+        data = _duckdb_clean(source, usecols, filters, delimiter)
+    return apply_schema(data)
+
+
+def group_aggregate(source, by, aggs, filters=None, backend=None, dropna=True, delimiter=','):
+    """
+    Grouped aggregation through the chosen backend, equivalent to
+    df.groupby(by, observed=True, dropna=dropna).agg(**aggs).reset_index().
+    Only the grouping and aggregated columns are scanned.
+    Args:
+        source (str or pd.DataFrame): Dataset, as for load_dataset.
+        by (list): Grouping columns.
+        aggs (dict): Output column -> (input column, function), with function
+            one of AGGREGATIONS ('size' counts rows, missing values included).
+        filters (list, optional): Row filters, as for load_dataset.
+        backend (str, optional): See get_backend.
+        dropna (bool): Drop groups whose key is missing.
+        delimiter (str): Field delimiter for text input.
+    Returns:
+        pd.DataFrame: One row per group, sorted by the grouping columns.
+    """
+    backend = get_backend(backend)
+    _check_filters(filters)
+    by = list(by)
+    for col, func in aggs.values():
+        if func not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation {func!r}; choose one of {', '.join(AGGREGATIONS)}")
+    columns = list(dict.fromkeys(by + [col for col, _ in aggs.values()]))
+
+    if backend == 'pandas':
+        df = _pandas_frame(source, columns, filters, delimiter)
+        return df.groupby(by, observed=True, dropna=dropna).agg(**aggs).reset_index()
+
+    if backend == 'polars':
+        frame = _polars_filter(_polars_scan(source, delimiter), filters).select(columns)
+        if dropna:
+            frame = frame.drop_nulls(by)
+        frame = frame.group_by(by).agg([_polars_agg(col, func, name) for name, (col, func) in aggs.items()])
+        result = frame.sort(by, nulls_last=True).collect().to_pandas()
+    else:
+        con = duckdb.connect()
+        try:
+            _duckdb_scan(con, source, delimiter)
+            where, params = _sql_where(filters)
+            keys = ', '.join(_sql_name(col) for col in by)
+            if dropna:
+                not_null = ' AND '.join(f"{_sql_name(col)} IS NOT NULL" for col in by)
+                where = f"{where} AND {not_null}" if where else f" WHERE {not_null}"
+            select = ', '.join(f"{_sql_agg(col, func)} AS {_sql_name(name)}" for name, (col, func) in aggs.items())
+            result = con.execute(f"SELECT {keys}, {select} FROM source{where} GROUP BY {keys} "
+                                 f"ORDER BY {keys} NULLS LAST", params).df()
+        finally:
+            con.close()
+
+    # Give the keys the dtypes and order pandas would return (categoricals
+    # sort by category order, not by label).
+    if isinstance(source, pd.DataFrame):
+        for col in by:
+            dtype = source[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                # astype is a no-op between unordered categoricals that differ only in order.
+                result[col] = pd.Categorical(result[col].astype(object), dtype=dtype)
+            else:
+                result[col] = result[col].astype(dtype)
+        return result.sort_values(by, na_position='last', kind='stable').reset_index(drop=True)
+    return apply_schema(result)
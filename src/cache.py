@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'datasets')
+
+_HASH_BLOCK = 1 << 20
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    Content-addressed, size-bounded cache of derived DataFrames.
+
+    Entries are keyed on the hash of the input file(s) plus the hash of the
+    parameters that produced them, and stored as Parquet. Input hashes are
+    remembered per (path, size, mtime), so a cache hit costs a stat call and
+    a Parquet read rather than re-hashing the raw data. When the cache grows
+    beyond max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=5 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._read_index()
+
+    def _read_index(self):
+        if not os.path.exists(self._index_path):
+            return {'entries': {}, 'files': {}}
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _write_index(self):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp_path, self._index_path)
+
+    def file_hash(self, path):
+        """
+        Content hash of a file, or of every file under a directory.
+        Args:
+            path (str): Input file or directory.
+        Returns:
+            str: Hex digest.
+        """
+        if os.path.isdir(path):
+            digest = hashlib.sha256()
+            for root, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    full = os.path.join(root, name)
+                    digest.update(os.path.relpath(full, path).encode())
+                    digest.update(self.file_hash(full).encode())
+            return digest.hexdigest()
+
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        known = self._index['files'].get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        sha = _hash_file(path)
+        self._index['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+        self._write_index()
+        return sha
+
+    def key(self, input_path, params):
+        """
+        Cache key for a dataset derived from input_path with the given params.
+        Args:
+            input_path (str): Input file or directory.
+            params (dict): JSON-serialisable parameters of the derivation.
+        Returns:
+            str: Hex key.
+        """
+        digest = hashlib.sha256(self.file_hash(input_path).encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:32]
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key):
+        """
+        Return the cached frame for key, or None on a miss.
+        """
+        entry = self._index['entries'].get(key)
+        if entry is None or not os.path.exists(self._entry_path(key)):
+            return None
+        entry['last_used'] = time.time()
+        self._write_index()
+        return pd.read_parquet(self._entry_path(key))
+
+    def put(self, key, data, source=None):
+        """
+        Store a frame under key and evict old entries if over budget.
+        """
+        path = self._entry_path(key)
+        tmp_path = path + '.tmp'
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        self._index['entries'][key] = {
+            'source': os.path.abspath(source) if source else None,
+            'size': os.path.getsize(path),
+            'last_used': time.time(),
+        }
+        self._evict()
+        self._write_index()
+
+    def get_or_compute(self, input_path, params, compute):
+        """
+        Return the cached result for (input_path, params), computing and
+        storing it on a miss.
+        Args:
+            input_path (str): Input file or directory.
+            params (dict): Parameters of the derivation.
+            compute (callable): Zero-argument function producing the frame.
+        Returns:
+            pd.DataFrame: Cached or freshly computed frame.
+        """
+        key = self.key(input_path, params)
+        data = self.get(key)
+        if data is not None:
+            print(f"Loaded cached dataset {key} for {input_path}")
+            return data
+        data = compute()
+        self.put(key, data, source=input_path)
+        return data
+
+    def _remove(self, key):
+        self._index['entries'].pop(key, None)
+        if os.path.exists(self._entry_path(key)):
+            os.remove(self._entry_path(key))
+
+    def _evict(self):
+        entries = self._index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]['size']
+            self._remove(key)
+
+    def invalidate(self, input_path=None, key=None):
+        """
+        Drop cached entries: one key, every entry derived from input_path, or
+        everything when called without arguments.
+        Returns:
+            int: Number of entries removed.
+        """
+        if key is not None:
+            keys = [key] if key in self._index['entries'] else []
+        elif input_path is not None:
+            source = os.path.abspath(input_path)
+            keys = [k for k, entry in self._index['entries'].items() if entry['source'] == source]
+        else:
+            keys = list(self._index['entries'])
+        for k in keys:
+            self._remove(k)
+        self._write_index()
+        return len(keys)
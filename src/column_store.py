@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+STORE_META = 'meta.json'
+STORE_VERSION = 1
+
+
+def is_column_store(path):
+    """True if path is a directory written by write_column_store."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, STORE_META))
+
+
+def _code_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _column_arrays(series):
+    """Array to store for a column, plus its metadata entry."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories
+        codes = series.cat.codes.to_numpy().astype(_code_dtype(len(categories)))
+        return codes, {'kind': 'category', 'categories': categories.astype(str).tolist(),
+                       'ordered': bool(dtype.ordered)}
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return series.to_numpy(dtype='datetime64[ns]'), {'kind': 'datetime'}
+    if isinstance(dtype, pd.BooleanDtype):
+        # Nullable booleans are stored as int8 with -1 for missing.
+        return series.astype('Int8').fillna(-1).to_numpy(dtype=np.int8), {'kind': 'boolean'}
+    if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return series.to_numpy(), {'kind': 'numeric'}
+    # Free text outside the schema: store as categorical codes.
+    return _column_arrays(series.astype('category'))
+
+
+def write_column_store(df, store_dir, source=None):
+    """
+    Write a typed dataset as one .npy file per column plus a metadata header.
+    Numeric, boolean and datetime columns are stored as they are;
+    categoricals as the narrowest integer codes with their categories in the
+    header. The store is built in a temporary directory and moved into place,
+    so readers never see a half-written store.
+    Args:
+        df (pd.DataFrame): Cleaned, schema-typed dataset.
+        store_dir (str): Output directory (replaced if it exists).
+        source (str, optional): Path of the file the data came from; its size
+            and mtime are recorded so stale stores can be detected.
+    Returns:
+        str: store_dir
+    """
+    tmp_dir = store_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = {}
+    for i, col in enumerate(df.columns):
+        values, entry = _column_arrays(df[col])
+        entry['file'] = f'{i:03d}.npy'
+        entry['dtype'] = str(values.dtype)
+        np.save(os.path.join(tmp_dir, entry['file']), values, allow_pickle=False)
+        columns[col] = entry
+
+    meta = {'version': STORE_VERSION, 'n_rows': len(df), 'columns': columns,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    if source is not None:
+        stat = os.stat(source)
+        meta['source'] = {'path': os.path.abspath(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    with open(os.path.join(tmp_dir, STORE_META), 'w') as f:
+        json.dump(meta, f, indent=1)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    print(f"Column store with {len(df)} rows, {len(columns)} columns written to {store_dir}")
+    return store_dir
+
+
+class ColumnStore:
+    """
+    Read-only, memory-mapped view of a store written by write_column_store.
+
+    Opening a store reads only the metadata header; column data is mapped
+    from disk on first access. Several processes opening the same store share
+    the operating system's page cache instead of each holding a copy, and the
+    DataFrames returned by to_frame wrap the mapped arrays without copying.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, STORE_META)) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != STORE_VERSION:
+            raise ValueError(f"Unsupported column store version {self.meta['version']} in {store_dir}")
+        self.n_rows = self.meta['n_rows']
+        self.columns = list(self.meta['columns'])
+        self._arrays = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    def array(self, col):
+        """Raw memory-mapped array of a column (codes for categoricals)."""
+        if col not in self._arrays:
+            entry = self.meta['columns'][col]
+            self._arrays[col] = np.load(os.path.join(self.store_dir, entry['file']), mmap_mode='r')
+        return self._arrays[col]
+
+    def categories(self, col):
+        """Categories of a categorical column."""
+        return self.meta['columns'][col]['categories']
+
+    def column(self, col):
+        """
+        A column as a pandas Series backed by the mapped file.
+        """
+        entry = self.meta['columns'][col]
+        values = self.array(col)
+        if entry['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=entry['categories'],
+                                               ordered=entry['ordered'], validate=False)
+        elif entry['kind'] == 'boolean':
+            values = pd.array(np.asarray(values) == 1, dtype='boolean')
+            values[np.asarray(self.array(col)) < 0] = pd.NA
+        return pd.Series(values, name=col, copy=False)
+
+    def to_frame(self, columns=None):
+        """
+        Columns of the store as a DataFrame without copying the data.
+        Args:
+            columns (list, optional): Columns to include. Defaults to all.
+        Returns:
+            pd.DataFrame: Read-only-backed frame; assigning to a column
+            replaces it in the frame and leaves the store untouched.
+        """
+        columns = self.columns if columns is None else list(columns)
+        missing = set(columns) - set(self.columns)
+        if missing:
+            raise KeyError(f"Columns not in store: {sorted(missing)}")
+        return pd.DataFrame({col: self.column(col) for col in columns}, copy=False)
+
+    def is_stale(self):
+        """True if the recorded source file has changed since the store was built."""
+        source = self.meta.get('source')
+        if source is None or not os.path.exists(source['path']):
+            return False
+        stat = os.stat(source['path'])
+        return (stat.st_size, stat.st_mtime_ns) != (source['size'], source['mtime_ns'])
+
+
+def build_column_store(input_path, store_dir, usecols=None):
+    """
+    Build (or reuse) the column store of the cleaned dataset.
+    Args:
+        input_path (str): Raw dataset accepted by load_clean_data.
+        store_dir (str): Store directory.
+        usecols (list, optional): Only store these columns.
+    Returns:
+        ColumnStore: The opened store.
+    """
+    if is_column_store(store_dir):
+        store = ColumnStore(store_dir)
+        source = store.meta.get('source', {})
+        if source.get('path') == os.path.abspath(input_path) and not store.is_stale():
+            return store
+
+    from src.data_cleanig import load_clean_data
+    write_column_store(load_clean_data(input_path, usecols=usecols), store_dir, source=input_path)
+    return ColumnStore(store_dir)
+
+
+def main():
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+    build_column_store(os.path.join(DATA_DIR, 'output.csv'), os.path.join(DATA_DIR, 'column_store'))
+
+
+if __name__ == '__main__':
+    main()
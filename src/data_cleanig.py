@@ -1,52 +1,251 @@
+import hashlib
+import inspect
+import os
+import tempfile
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.backends import clean_dataset, get_backend, load_dataset
+from src.cache import DatasetCache
+from src.dedup import StreamingDeduplicator, drop_duplicate_rows
+from src.instrumentation import instrument
+from src.schema import COLUMN_TYPES, apply_schema, iter_dataset, read_dataset, round_integer_fills
+from src.sketches import QuantileSketch
 
-def load_data(file_path):
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+@instrument()
+def load_data(file_path, usecols=None, filters=None, backend=None):
     """
-    Load the raw data into a pandas DataFrame.
+    Load the raw data into a pandas DataFrame, typed with the declared schema
+    in src.schema (categories, downcast numerics, parsed dates).
     Args:
-        file_path (str): Path to the CSV file.
+        file_path (str): Path to the CSV file, a Parquet file, or a directory
+            of monthly Parquet files written by data_conversion.
+        usecols (list, optional): Only load these columns.
+        filters (list, optional): (column, op, value) row filters, see
+            src.backends.load_dataset.
+        backend (str, optional): 'pandas', 'polars' or 'duckdb'; the latter
+            two push columns and filters down into the scan.
     Returns:
         pd.DataFrame: Loaded DataFrame.
     """
     print(f"Loading data from {file_path}...")
-    return pd.read_csv(file_path, delimiter=',')  
+    if filters is None and get_backend(backend) == 'pandas':
+        data = read_dataset(file_path, usecols=usecols)
+    else:
+        data = load_dataset(file_path, usecols=usecols, filters=filters, backend=backend)
+    print(f"Loaded {len(data)} rows, {data.memory_usage(deep=True).sum() / 1e6:,.1f} MB in memory")
+    return data
 
-def clean_data(data):
+def fill_missing_values(data, medians):
     """
-    Clean the dataset by handling missing values, anomalies, and formatting issues.
+    Impute missing values the way clean_data does, using precomputed medians.
+    Shared by the in-memory and the chunked cleaning paths so both produce
+    identical output.
     Args:
-        data (pd.DataFrame): The raw dataset.
+        data (pd.DataFrame): Deduplicated data (a full frame or one chunk).
+        medians (pd.Series): Fill value per numeric column.
     Returns:
-        pd.DataFrame: Cleaned dataset.
+        pd.DataFrame: Data with missing values filled.
     """
-    print("Cleaning data...")
-    
-   
-    data = data.drop_duplicates()
-    
-   
-    data = data.dropna(axis=1, how='all')
-    
-    
     if 'TransactionMonth' in data.columns:
         data['TransactionMonth'] = pd.to_datetime(data['TransactionMonth'], errors='coerce')
     
     
     numeric_cols = data.select_dtypes(include=['number']).columns
-    data[numeric_cols] = data[numeric_cols].fillna(data[numeric_cols].median())
+    # Integer columns get a whole-number fill, so narrowing them does not truncate it.
+    data[numeric_cols] = data[numeric_cols].fillna(round_integer_fills(medians))
     
     
     categorical_cols = data.select_dtypes(include=['object']).columns
     data[categorical_cols] = data[categorical_cols].fillna("Unknown")
+    for col in data.select_dtypes(include=['category']).columns:
+        if data[col].isna().any():
+            if "Unknown" not in data[col].cat.categories:
+                data[col] = data[col].cat.add_categories("Unknown")
+            data[col] = data[col].fillna("Unknown")
     
     
     for col in ['CustomValueEstimate', 'CrossBorder']:
-        if col in data.columns:
+        if col in data.columns and data[col].dtype != 'category':
             data[col] = data[col].fillna("Unknown" if data[col].dtype == 'object' else 0)
+    # Integer columns held as float while they had missing values are narrowed back.
+    return apply_schema(data)
+
+@instrument()
+def clean_data(data, backend=None):
+    """
+    Clean the dataset by handling missing values, anomalies, and formatting issues.
+    Args:
+        data (pd.DataFrame): The raw dataset.
+        backend (str, optional): 'pandas', 'polars' or 'duckdb', see
+            src.backends.clean_dataset.
+    Returns:
+        pd.DataFrame: Cleaned dataset.
+    """
+    print("Cleaning data...")
+    if get_backend(backend) != 'pandas':
+        data = clean_dataset(data, backend=backend)
+        print(f"Data cleaned. Remaining rows: {len(data)}, Columns: {len(data.columns)}")
+        return data
+    
+   
+    data = drop_duplicate_rows(data)
+    
+   
+    data = data.dropna(axis=1, how='all')
+    
+    
+    numeric_cols = data.select_dtypes(include=['number']).columns
+    data = fill_missing_values(data, data[numeric_cols].median())
     
     print(f"Data cleaned. Remaining rows: {len(data)}, Columns: {len(data.columns)}")
     return data
 
+def _median_accumulator(index, spill_dir, exact):
+    """Accumulator for one numeric column in pass one of clean_data_streaming:
+    a float64 spill file, or a QuantileSketch."""
+    if exact:
+        return open(os.path.join(spill_dir, f"{index}.bin"), 'wb')
+    return QuantileSketch()
+
+@instrument()
+def clean_data_streaming(input_path, output_path, chunksize=100_000, exact_median=True):
+    """
+    Clean a dataset that does not fit in memory, in two streaming passes.
+
+    Pass one drops duplicate rows, including duplicates that fall in
+    different chunks, counts non-null values per column (to drop
+    all-null columns) and gathers per-column medians. Pass two re-reads the
+    input and writes cleaned chunks straight to output_path. Peak memory is
+    bounded by the chunk size; with exact_median=True one numeric column at a
+    time is read back from a temporary spill file to take its median, and the
+    output is identical to load_data + clean_data + save_cleaned_data.
+    Args:
+        input_path (str): CSV file, Parquet file or directory of Parquet files.
+        output_path (str): CSV or .parquet file to write.
+        chunksize (int): Rows per chunk.
+        exact_median (bool): Exact medians via disk spill, or approximate
+            medians (1% relative error) from QuantileSketch.
+    Returns:
+        int: Number of rows written.
+    """
+    print(f"Cleaning {input_path} in chunks of {chunksize} rows...")
+    with tempfile.TemporaryDirectory() as spill_dir:
+        deduplicator = StreamingDeduplicator(spill_dir=spill_dir)
+        keep_masks = []
+        non_null = None
+        stats = {}
+        not_numeric = set()
+        total_rows = 0
+
+        # Pass one: duplicates, null counts and median statistics.
+        for chunk in iter_dataset(input_path, chunksize):
+            keep = deduplicator.keep_mask(chunk)
+            keep_masks.append(np.packbits(keep))
+            chunk = chunk[keep]
+            total_rows += len(chunk)
+
+            counts = chunk.notna().sum()
+            non_null = counts if non_null is None else non_null + counts
+            numeric = chunk.select_dtypes(include=['number'])
+            not_numeric.update(chunk.columns.difference(numeric.columns))
+            for col in numeric.columns:
+                if col not in stats:
+                    stats[col] = _median_accumulator(len(stats), spill_dir, exact_median)
+                # A column can be int in one chunk and float in the next, so
+                # every chunk is spilled as float64.
+                values = numeric[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                if exact_median:
+                    values[~np.isnan(values)].tofile(stats[col])
+                else:
+                    stats[col].update(values)
+        deduplicator.report()
+        del deduplicator
+
+        kept_cols = non_null.index[non_null > 0]
+        medians = {}
+        for col, acc in stats.items():
+            if exact_median:
+                acc.close()
+            # Columns that were not numeric in every chunk are not numeric in
+            # the whole dataset either, and get no median.
+            if col not in kept_cols or col in not_numeric or non_null[col] == total_rows:
+                continue
+            if exact_median:
+                medians[col] = pd.Series(np.fromfile(acc.name, dtype=np.float64)).median()
+            else:
+                medians[col] = acc.median()
+        medians = pd.Series(medians, dtype='float64')
+
+        # Pass two: fill and write.
+        writer = None
+        written = 0
+        for chunk, packed in zip(iter_dataset(input_path, chunksize), keep_masks):
+            keep = np.unpackbits(packed, count=len(chunk)).astype(bool)
+            chunk = fill_missing_values(chunk[keep][kept_cols], medians)
+            if str(output_path).endswith('.parquet'):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = pa.schema([
+                        pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f
+                        for f in table.schema
+                    ])
+                    writer = pq.ParquetWriter(output_path, schema)
+                writer.write_table(table.cast(schema))
+            else:
+                chunk.to_csv(output_path, mode='a' if written else 'w', header=not written, index=False)
+            written += len(chunk)
+        if writer is not None:
+            writer.close()
+
+    print(f"Data cleaned. Remaining rows: {written}, Columns: {len(kept_cols)}")
+    print(f"Cleaned data saved to {output_path}")
+    return written
+
+def _cleaning_params(usecols, backend='pandas'):
+    """Parameters that identify a cleaned dataset in the cache, including the
+    cleaning code itself so edits to it invalidate old entries."""
+    code = "".join(inspect.getsource(f) for f in (clean_data, fill_missing_values, drop_duplicate_rows))
+    code += repr(sorted(COLUMN_TYPES.items()))
+    params = {
+        'step': 'clean_data',
+        'usecols': sorted(usecols) if usecols else None,
+        'code': hashlib.sha256(code.encode()).hexdigest(),
+    }
+    if backend != 'pandas':
+        params['backend'] = backend
+        source = inspect.getsource(inspect.getmodule(clean_dataset))
+        params['backend_code'] = hashlib.sha256(source.encode()).hexdigest()
+    return params
+
+@instrument()
+def load_clean_data(input_path, usecols=None, cache=None, backend=None):
+    """
+    Load and clean the dataset, reusing the cached result when neither the
+    input file nor the cleaning parameters have changed.
+    Args:
+        input_path (str): Raw CSV file, Parquet file or Parquet directory.
+        usecols (list, optional): Only load these columns.
+        cache (DatasetCache, optional): Cache to use. Defaults to .cache/datasets.
+        backend (str, optional): 'pandas', 'polars' or 'duckdb'; the latter
+            two load and clean in a single engine query.
+    Returns:
+        pd.DataFrame: Cleaned dataset.
+    """
+    cache = cache or DatasetCache()
+    backend = get_backend(backend)
+    if backend == 'pandas':
+        compute = lambda: clean_data(load_data(input_path, usecols=usecols), backend='pandas')
+    else:
+        compute = lambda: clean_dataset(input_path, usecols=usecols, backend=backend)
+    return cache.get_or_compute(input_path, _cleaning_params(usecols, backend), compute)
+
+@instrument()
 def save_cleaned_data(data, output_path):
     """
     Save cleaned data to a CSV file.
@@ -59,14 +258,11 @@ def save_cleaned_data(data, output_path):
 
 def main():
     
-    input_path = "../Data/raw/MachineLearningRating_v3.csv"
-    output_path = "../Data/clean/cleaned_insurance_data.csv"
-    
+    input_path = os.path.join(DATA_DIR, "raw", "MachineLearningRating_v3")
+    output_path = os.path.join(DATA_DIR, "clean", "cleaned_insurance_data.csv")
     
-    data = load_data(input_path)
     
-   
-    cleaned_data = clean_data(data)
+    cleaned_data = load_clean_data(input_path)
     
     
     save_cleaned_data(cleaned_data, output_path)
@@ -1,15 +1,89 @@
+import os
+import time
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.schema import COLUMN_TYPES, apply_schema, arrow_schema, csv_dtypes
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+
+def month_partition_keys(months):
+    """
+    Map raw TransactionMonth values to the 'YYYY-MM' partition they belong to.
+    Args:
+        months (pd.Series): Raw TransactionMonth values.
+    Returns:
+        pd.Series: Partition key per row ('unknown' for unparseable months).
+    """
+    parsed = pd.to_datetime(months, errors='coerce')
+    return parsed.dt.strftime('%Y-%m').fillna('unknown')
+
+
+def convert_to_parquet(input_path, output_dir, chunksize=100_000, delimiter='|',
+                       partition_col='TransactionMonth', compression='zstd'):
+    """
+    Stream a delimited text file into typed, compressed Parquet, one file per
+    TransactionMonth. Only one chunk is held in memory at a time; every chunk
+    becomes one row group in each month file it touches. Columns are typed
+    from the declared schema in src.schema; any extra columns are kept as text.
+    Args:
+        input_path (str): Path to the pipe-delimited raw file.
+        output_dir (str): Directory that receives the '<YYYY-MM>.parquet' files.
+        chunksize (int): Rows parsed per chunk.
+        delimiter (str): Field delimiter of the raw file.
+        partition_col (str): Column used to partition the output.
+        compression (str): Parquet compression codec.
+    Returns:
+        int: Number of rows written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    header = pd.read_csv(input_path, delimiter=delimiter, nrows=0).columns
+    extra_cols = {col: str for col in header if col not in COLUMN_TYPES}
+    schema = arrow_schema([col for col in header if col in COLUMN_TYPES])
+    for col in extra_cols:
+        schema = schema.insert(header.get_loc(col), pa.field(col, pa.string()))
+
+    writers = {}
+    total_rows = 0
+    start = time.perf_counter()
+    reader = pd.read_csv(input_path, delimiter=delimiter, chunksize=chunksize,
+                         dtype={**csv_dtypes(header), **extra_cols})
+    try:
+        for i, chunk in enumerate(reader, start=1):
+            chunk = apply_schema(chunk)
+            keys = month_partition_keys(chunk[partition_col])
+            for month, part in chunk.groupby(keys, sort=False):
+                if month not in writers:
+                    path = os.path.join(output_dir, f"{month}.parquet")
+                    writers[month] = pq.ParquetWriter(path, schema, compression=compression)
+                table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+                writers[month].write_table(table)
+
+            total_rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"Chunk {i}: {total_rows:,} rows written "
+                  f"({total_rows / elapsed:,.0f} rows/s, {len(writers)} partitions)")
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Converted {total_rows:,} rows in {elapsed:.1f}s "
+          f"({total_rows / max(elapsed, 1e-9):,.0f} rows/s) to {output_dir}")
+    return total_rows
+
 
-input_file = '../Data/raw/MachineLearningRating_v3.txt'
-output_file = '../Data/raw/MachineLearningRating_v3.csv'
+def main():
 
-df = pd.read_csv(input_file, delimiter='|')  # Use '|' as the delimiter
+    input_file = os.path.join(DATA_DIR, 'raw', 'MachineLearningRating_v3.txt')
+    output_dir = os.path.join(DATA_DIR, 'raw', 'MachineLearningRating_v3')
 
-# Save the parsed data to a new .csv file
-df.to_csv(output_file, index=False)
+    convert_to_parquet(input_file, output_dir)
 
-print(f"File successfully parsed and saved as {output_file}")
-print(df.head())
-print(df.info())
 
-print(f"File converted and saved as {output_file}")
+if __name__ == "__main__":
+    main()
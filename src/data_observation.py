@@ -1,6 +1,9 @@
-import pandas as pd
-df=pd.read_csv("..\\Data\\output.csv", low_memory=False)
+import os
+
+from src.data_cleanig import DATA_DIR, load_data
+
 numerical_col=['TotalPremium','TotalClaims']
+df=load_data(os.path.join(DATA_DIR, "output.csv"), usecols=numerical_col)
 numerical_summery=df[numerical_col].describe()
 print(numerical_summery)
 
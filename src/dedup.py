@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Second hash key, used to extend row fingerprints from 64 to 128 bits.
+_SECOND_HASH_KEY = 'alphacare-dedup1'
+
+_FINGERPRINT_128 = np.dtype([('hi', '<u8'), ('lo', '<u8')])
+
+
+def row_fingerprints(data, bits=64):
+    """
+    Reduce every row to a fixed-size fingerprint of all its values.
+    Equal rows always get equal fingerprints, also across chunks whose
+    categorical columns have different category sets, or whose integer
+    columns were read as float because of missing values.
+    Args:
+        data (pd.DataFrame): Rows to fingerprint.
+        bits (int): 64 or 128.
+    Returns:
+        np.ndarray: uint64 fingerprints, or a (hi, lo) record per row for 128 bits.
+    """
+    integers = [col for col in data.columns if pd.api.types.is_integer_dtype(data[col].dtype)]
+    if integers:
+        data = data.astype(dict.fromkeys(integers, np.float64))
+    first = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    if bits == 64:
+        return first
+    if bits != 128:
+        raise ValueError("bits must be 64 or 128.")
+    second = pd.util.hash_pandas_object(data, index=False, hash_key=_SECOND_HASH_KEY).to_numpy()
+    fingerprints = np.empty(len(data), dtype=_FINGERPRINT_128)
+    fingerprints['hi'] = first
+    fingerprints['lo'] = second
+    return fingerprints
+
+
+class StreamingDeduplicator:
+    """
+    Drop duplicate rows from a stream of chunks, keeping the first occurrence.
+
+    Rows are reduced to 64- or 128-bit fingerprints and the seen-set is kept
+    as a few sorted numpy runs (8 or 16 bytes per distinct row) that are
+    searched with binary search. Runs are merged once there are more than
+    max_runs of them; if spill_dir is given, the in-memory runs are written
+    to disk and memory-mapped once they hold more than max_memory_rows.
+    """
+
+    def __init__(self, bits=64, spill_dir=None, max_memory_rows=5_000_000, max_runs=8):
+        self.bits = bits
+        self.spill_dir = spill_dir
+        self.max_memory_rows = max_memory_rows
+        self.max_runs = max_runs
+        self._memory_runs = []
+        self._disk_runs = []
+        self.rows_seen = 0
+        self.duplicates = 0
+
+    def _contains(self, fingerprints):
+        found = np.zeros(len(fingerprints), dtype=bool)
+        for run in self._memory_runs + self._disk_runs:
+            pos = np.searchsorted(run, fingerprints)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == fingerprints
+        return found
+
+    def _spill(self, run):
+        path = os.path.join(self.spill_dir, f"dedup-run-{len(self._disk_runs)}.npy")
+        np.save(path, run)
+        self._disk_runs.append(np.load(path, mmap_mode='r'))
+
+    def _add_run(self, run):
+        if len(run) == 0:
+            return
+        self._memory_runs.append(run)
+        # Runs are disjoint, so merging them is a concatenate and sort.
+        if len(self._memory_runs) > self.max_runs:
+            self._memory_runs = [np.sort(np.concatenate(self._memory_runs))]
+        if self.spill_dir is not None and sum(len(r) for r in self._memory_runs) > self.max_memory_rows:
+            self._spill(np.sort(np.concatenate(self._memory_runs)))
+            self._memory_runs = []
+
+    def keep_mask(self, chunk):
+        """
+        Mark the rows of a chunk that have not been seen before.
+        Args:
+            chunk (pd.DataFrame): Next chunk of the stream.
+        Returns:
+            np.ndarray: Boolean mask, True for rows to keep.
+        """
+        fingerprints = row_fingerprints(chunk, self.bits)
+        _, first = np.unique(fingerprints, return_index=True)
+        keep = np.zeros(len(fingerprints), dtype=bool)
+        keep[first] = True
+        keep[keep] = ~self._contains(fingerprints[keep])
+        self._add_run(np.sort(fingerprints[keep]))
+
+        self.rows_seen += len(chunk)
+        self.duplicates += int(len(chunk) - keep.sum())
+        return keep
+
+    def drop_duplicates(self, chunk):
+        """
+        Return the chunk without rows seen earlier in this chunk or the stream.
+        Args:
+            chunk (pd.DataFrame): Next chunk of the stream.
+        Returns:
+            pd.DataFrame: Deduplicated chunk.
+        """
+        return chunk[self.keep_mask(chunk)]
+
+    def report(self):
+        """Print how many duplicates were dropped so far."""
+        print(f"Dropped {self.duplicates} duplicate rows out of {self.rows_seen}.")
+
+
+def drop_duplicate_rows(data, bits=64):
+    """
+    Fingerprint-based equivalent of data.drop_duplicates() for wide frames.
+    Args:
+        data (pd.DataFrame): Dataset.
+        bits (int): Fingerprint size, 64 or 128.
+    Returns:
+        pd.DataFrame: Data without duplicate rows (first occurrence kept).
+    """
+    deduplicator = StreamingDeduplicator(bits=bits)
+    data = deduplicator.drop_duplicates(data)
+    deduplicator.report()
+    return data
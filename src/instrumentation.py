@@ -0,0 +1,204 @@
+import csv
+import functools
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import psutil
+
+# Set to 1 to record stages; output goes to ALPHACARE_METRICS_DIR, which
+# defaults to notebook/metrics/stages.
+ENV_VAR = 'ALPHACARE_INSTRUMENT'
+DIR_ENV_VAR = 'ALPHACARE_METRICS_DIR'
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'notebook', 'metrics', 'stages')
+
+FIELDS = ['run_id', 'stage', 'started', 'wall_s', 'cpu_s', 'peak_rss_mb', 'rss_delta_mb',
+          'rows_in', 'rows_out', 'df_mb_in', 'df_mb_out', 'df_mb_delta', 'error']
+
+_state = {
+    'enabled': os.environ.get(ENV_VAR, '').lower() in ('1', 'true', 'yes', 'on'),
+    'output_dir': os.environ.get(DIR_ENV_VAR) or METRICS_DIR,
+    'run_id': f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}",
+}
+_write_lock = threading.Lock()
+
+
+def enable(output_dir=None):
+    """Start recording stages, optionally into output_dir."""
+    _state['enabled'] = True
+    if output_dir is not None:
+        _state['output_dir'] = output_dir
+
+
+def disable():
+    """Stop recording stages."""
+    _state['enabled'] = False
+
+
+def is_enabled():
+    return _state['enabled']
+
+
+class PeakMemory:
+    """Samples the resident memory of this process in a background thread."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.start = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._process = psutil.Process()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.peak = self._process.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end = self._process.memory_info().rss
+        self.peak = max(self.peak, self.end)
+
+
+def _frame_mb(df):
+    if isinstance(df, pd.DataFrame):
+        return float(df.memory_usage(index=True, deep=False).sum()) / 1024 ** 2
+    return None
+
+
+def _rows(df):
+    return len(df) if isinstance(df, pd.DataFrame) else None
+
+
+def _write(record):
+    output_dir = _state['output_dir']
+    with _write_lock:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, 'stages.jsonl'), 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        csv_path = os.path.join(output_dir, 'stages.csv')
+        new_file = not os.path.exists(csv_path)
+        with open(csv_path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(record)
+
+
+class track:
+    """
+    Context manager recording one pipeline stage when instrumentation is on.
+
+        with track('clean_data', df) as stage:
+            data = clean_data(df)
+            stage.output = data
+
+    Records wall and CPU time, peak and delta RSS, rows and DataFrame memory
+    in and out, and appends them to stages.jsonl and stages.csv. When
+    instrumentation is off it does nothing.
+    """
+
+    def __init__(self, name, data=None):
+        self.name = name
+        self.data = data
+        self.output = None
+
+    def __enter__(self):
+        self.active = _state['enabled']
+        if self.active:
+            self._rows_in = _rows(self.data)
+            self._mb_in = _frame_mb(self.data)
+            self._memory = PeakMemory().__enter__()
+            self._started = time.time()
+            self._wall = time.perf_counter()
+            self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.active:
+            return False
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._memory.__exit__(exc_type, exc, tb)
+        output = self.output if self.output is not None else self.data
+        mb_out = _frame_mb(output)
+        record = {
+            'run_id': _state['run_id'],
+            'stage': self.name,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self._started)),
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': round(self._memory.peak / 1024 ** 2, 2),
+            'rss_delta_mb': round((self._memory.end - self._memory.start) / 1024 ** 2, 2),
+            'rows_in': self._rows_in,
+            'rows_out': _rows(output),
+            'df_mb_in': None if self._mb_in is None else round(self._mb_in, 3),
+            'df_mb_out': None if mb_out is None else round(mb_out, 3),
+            'df_mb_delta': None if self._mb_in is None or mb_out is None else round(mb_out - self._mb_in, 3),
+            'error': exc_type.__name__ if exc_type else None,
+        }
+        _write(record)
+        return False
+
+
+def _input_frame(args, kwargs):
+    """The DataFrame a stage works on: self.df / self.data, or the first frame argument."""
+    if args:
+        for attr in ('df', 'data'):
+            frame = getattr(args[0], attr, None)
+            if isinstance(frame, pd.DataFrame):
+                return frame, args[0], attr
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            return value, None, None
+    return None, None, None
+
+
+def instrument(name=None):
+    """
+    Decorator recording a function or method as a pipeline stage.
+    Rows in come from the first DataFrame argument or the instance's df/data
+    attribute; rows out from a returned DataFrame, or that attribute after
+    the call for methods that modify it in place. Costs a single flag check
+    per call while instrumentation is off.
+    Args:
+        name (str, optional): Stage name. Defaults to the qualified function name.
+    """
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            frame, owner, attr = _input_frame(args, kwargs)
+            with track(stage_name, frame) as stage:
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    stage.output = result
+                elif owner is not None:
+                    stage.output = getattr(owner, attr)
+            return result
+        return wrapper
+    return decorator
+
+
+def load_stages(output_dir=None):
+    """
+    Recorded stages as a DataFrame, slowest first.
+    Args:
+        output_dir (str, optional): Directory holding stages.jsonl.
+    """
+    path = os.path.join(output_dir or _state['output_dir'], 'stages.jsonl')
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=FIELDS)
+    return pd.read_json(path, lines=True).sort_values('wall_s', ascending=False).reset_index(drop=True)
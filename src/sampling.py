@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+
+from src.dedup import row_fingerprints
+from src.schema import apply_schema, iter_dataset
+
+STRATA = ['Province', 'PostalCode', 'TransactionMonth']
+
+
+class StratifiedSample:
+    """
+    A stratified random sample and the design needed to estimate from it.
+
+    Within each stratum the rows are a simple random sample, but small
+    strata are oversampled to keep a minimum number of rows, so every row
+    carries a weight N_h / n_h (stratum population over stratum sample
+    size). Estimates are weighted, and confidence intervals use the
+    stratified variance with the finite population correction (Taylor
+    linearisation for means and ratios).
+    """
+
+    def __init__(self, data, stratum, population, strata):
+        """
+        Args:
+            data (pd.DataFrame): Sampled rows.
+            stratum (np.ndarray): Stratum id of each sampled row.
+            population (pd.Series): Rows in the source per stratum id.
+            strata (list): Columns that define the strata.
+        """
+        self.data = data
+        self.stratum = stratum
+        self.strata = list(strata)
+        sampled = pd.Series(stratum).value_counts()
+        self.design = pd.DataFrame({'population': population.loc[sampled.index], 'sampled': sampled})
+        self.weights = (self.design['population'] / self.design['sampled']).reindex(stratum).to_numpy()
+
+    @property
+    def population_rows(self):
+        return int(self.design['population'].sum())
+
+    def __len__(self):
+        return len(self.data)
+
+    def _values(self, values):
+        if isinstance(values, str):
+            values = self.data[values]
+        return np.asarray(values, dtype=np.float64)
+
+    def group_means(self, values, by=None, confidence=0.95):
+        """
+        Weighted mean of values per group, with confidence intervals.
+        Args:
+            values (str or array-like): Column name or one value per sampled row.
+            by (str or array-like, optional): Grouping column or labels. One
+                overall estimate if omitted.
+            confidence (float): Confidence level of the intervals.
+        Returns:
+            pd.DataFrame: estimate, ci_low, ci_high, n_sample and
+            population (estimated rows) per group.
+        """
+        y = self._values(values)
+        if by is None:
+            codes, labels = np.zeros(len(y), dtype=np.int64), pd.Index(['all'])
+        else:
+            by = self.data[by] if isinstance(by, str) else pd.Series(np.asarray(by), name=getattr(by, 'name', None))
+            codes, labels = pd.factorize(by, sort=True)
+        valid = (codes >= 0) & ~np.isnan(y)
+        codes, y, w, stratum = codes[valid], y[valid], self.weights[valid], self.stratum[valid]
+
+        n_groups = len(labels)
+        total_w = np.bincount(codes, weights=w, minlength=n_groups)
+        estimate = np.bincount(codes, weights=w * y, minlength=n_groups) / np.where(total_w > 0, total_w, np.nan)
+        # Linearised ratio: z is nonzero only inside the row's group.
+        z = (y - estimate[codes]) / total_w[codes]
+        cells = (
+            pd.DataFrame({'stratum': stratum, 'group': codes, 'z': z, 'z2': z * z})
+            .groupby(['stratum', 'group'], sort=False)[['z', 'z2']]
+            .sum()
+            .join(self.design, on='stratum')
+        )
+        n, big_n = cells['sampled'], cells['population']
+        s2 = ((cells['z2'] - cells['z'] ** 2 / n) / (n - 1)).where(n > 1, 0.0).clip(lower=0)
+        var = (big_n ** 2 * (1 - n / big_n) * s2 / n).groupby(level='group').sum()
+        se = np.sqrt(var.reindex(range(n_groups), fill_value=0.0).to_numpy())
+
+        from scipy.stats import norm
+        z_score = norm.ppf(0.5 + confidence / 2)
+        result = pd.DataFrame({
+            'estimate': estimate,
+            'ci_low': estimate - z_score * se,
+            'ci_high': estimate + z_score * se,
+            'n_sample': np.bincount(codes, minlength=n_groups),
+            'population': total_w,
+        }, index=pd.Index(labels, name=by.name if by is not None and by.name else 'group'))
+        return result
+
+    def mean(self, values, confidence=0.95):
+        """
+        Weighted mean with a confidence interval.
+        Returns:
+            tuple: (estimate, ci_low, ci_high)
+        """
+        row = self.group_means(values, confidence=confidence).iloc[0]
+        return row['estimate'], row['ci_low'], row['ci_high']
+
+    def summary(self, columns, confidence=0.95):
+        """Weighted mean and confidence interval of several numeric columns."""
+        return pd.concat(
+            [self.group_means(col, confidence=confidence).rename(index={'all': col}) for col in columns]
+        ).rename_axis('column')
+
+
+def _stratum_ids(chunk, strata):
+    """Stratum id per row; equal across chunks whatever their category sets
+    or integer dtypes."""
+    return row_fingerprints(chunk[strata])
+
+
+class _Reservoir:
+    """
+    One-pass stratified sampler. Every row gets a uniform random key; a
+    stratum's sample is its rows with the smallest keys, as many as have a
+    key below the threshold (the sampling fraction) but at least
+    min_per_stratum. Under a row budget the threshold falls as rows arrive,
+    so that about n_rows keys lie below it.
+    """
+
+    def __init__(self, strata, fraction, n_rows, min_per_stratum, seed):
+        self.strata = strata
+        self.n_rows = n_rows
+        self.min_per_stratum = min_per_stratum
+        self.threshold = 1.0 if fraction is None else fraction
+        self.rng = np.random.default_rng(seed)
+        self.pool = None
+        self.population = pd.Series(dtype=np.int64)
+        self.rows_seen = 0
+
+    def add(self, chunk):
+        stratum = _stratum_ids(chunk, self.strata)
+        self.population = self.population.add(pd.Series(stratum).value_counts(), fill_value=0).astype(np.int64)
+        chunk = chunk.assign(_stratum=stratum, _key=self.rng.random(len(chunk)),
+                             _row=np.arange(self.rows_seen, self.rows_seen + len(chunk)))
+        self.rows_seen += len(chunk)
+        pool = chunk if self.pool is None else pd.concat([self.pool, chunk], ignore_index=True)
+
+        keys = pool['_key'].to_numpy()
+        if self.n_rows is not None and (keys < self.threshold).sum() > self.n_rows:
+            self.threshold = np.partition(keys, self.n_rows)[self.n_rows]
+        order = np.lexsort((keys, pool['_stratum'].to_numpy()))
+        pool = pool.iloc[order]
+        rank = pool.groupby('_stratum', sort=False).cumcount().to_numpy()
+        self.pool = pool[(rank < self.min_per_stratum) | (pool['_key'].to_numpy() < self.threshold)]
+
+    def result(self):
+        pool = self.pool.sort_values('_row')
+        stratum = pool['_stratum'].to_numpy()
+        # Categoricals of chunks with different category sets were concatenated as text.
+        data = apply_schema(pool.drop(columns=['_stratum', '_key', '_row']).reset_index(drop=True))
+        return StratifiedSample(data, stratum, self.population, self.strata)
+
+
+def stratified_sample(source, fraction=None, n_rows=None, strata=None, min_per_stratum=5, seed=0,
+                      chunksize=100_000, usecols=None):
+    """
+    Draw a reproducible stratified sample in a single streaming pass.
+    Every stratum keeps a simple random sample of about `fraction` of its
+    rows, or all of them if it has fewer than min_per_stratum, so small
+    postal codes are never dropped. Memory is bounded by the sample plus one
+    chunk.
+    Args:
+        source (str or pd.DataFrame): File or directory accepted by
+            src.schema.iter_dataset, or an in-memory frame.
+        fraction (float, optional): Sampling fraction per stratum.
+        n_rows (int, optional): Row budget for the proportional part instead
+            of a fraction; the per-stratum minimum may add rows on top.
+        strata (list, optional): Stratification columns. Defaults to the
+            STRATA present in the source.
+        min_per_stratum (int): Rows kept at least per stratum.
+        seed (int): Random seed; equal seeds give equal samples.
+        chunksize (int): Rows read per chunk.
+        usecols (list, optional): Columns to keep (the strata are added).
+    Returns:
+        StratifiedSample: The sample with its design weights.
+    """
+    if (fraction is None) == (n_rows is None):
+        raise ValueError("Pass exactly one of fraction and n_rows.")
+    if fraction is not None and not 0 < fraction <= 1:
+        raise ValueError("fraction must be in (0, 1].")
+
+    if usecols is not None:
+        usecols = list(dict.fromkeys(list(usecols) + list(strata or STRATA)))
+    if isinstance(source, pd.DataFrame):
+        if usecols is not None:
+            source = source[[col for col in usecols if col in source.columns]]
+        chunks = (source.iloc[start:start + chunksize] for start in range(0, len(source), chunksize))
+    else:
+        chunks = iter_dataset(source, chunksize, usecols=usecols)
+
+    reservoir = None
+    for chunk in chunks:
+        if reservoir is None:
+            strata = strata or [col for col in STRATA if col in chunk.columns]
+            reservoir = _Reservoir(strata, fraction, n_rows, min_per_stratum, seed)
+        reservoir.add(chunk)
+    sample = reservoir.result()
+    print(f"Stratified sample: {len(sample)} of {reservoir.rows_seen} rows "
+          f"({len(sample.design)} strata by {', '.join(sample.strata)})")
+    return sample
+
+
+def resolve_sample(data, sample_fraction=None, sample_rows=None, seed=0):
+    """
+    Helper for the analysis classes: the frame to work on and its sample.
+    Args:
+        data (pd.DataFrame or StratifiedSample): Full data or a sample.
+        sample_fraction (float, optional): Sample the frame with this fraction.
+        sample_rows (int, optional): Sample the frame to this row budget.
+        seed (int): Sampling seed.
+    Returns:
+        tuple: (pd.DataFrame, StratifiedSample or None)
+    """
+    if isinstance(data, StratifiedSample):
+        return data.data, data
+    if data is None or (sample_fraction is None and sample_rows is None):
+        return data, None
+    sample = stratified_sample(data, fraction=sample_fraction, n_rows=sample_rows, seed=seed)
+    return sample.data, sample
+
+
+def format_ci(estimate, low, high, digits=2):
+    """'estimate [low, high]' for printing."""
+    return f"{estimate:.{digits}f} [{low:.{digits}f}, {high:.{digits}f}]"
@@ -0,0 +1,264 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.column_store import ColumnStore, is_column_store
+
+# Declared storage type of every column in the MachineLearningRating dataset.
+# Low-cardinality text becomes 'category'; counts and codes are downcast to
+# the narrowest integer/float that holds them. Monetary amounts and mmcode
+# (8-digit codes that float32 cannot represent exactly) stay float64 so sums
+# and medians are unchanged. Integer columns with missing values cannot be
+# held by numpy integers, so apply_schema keeps those as float64 instead.
+COLUMN_TYPES = {
+    'UnderwrittenCoverID': 'int32',
+    'PolicyID': 'int32',
+    'TransactionMonth': 'datetime',
+    'IsVATRegistered': 'bool',
+    'Citizenship': 'category',
+    'LegalType': 'category',
+    'Title': 'category',
+    'Language': 'category',
+    'Bank': 'category',
+    'AccountType': 'category',
+    'MaritalStatus': 'category',
+    'Gender': 'category',
+    'Country': 'category',
+    'Province': 'category',
+    'PostalCode': 'int16',
+    'MainCrestaZone': 'category',
+    'SubCrestaZone': 'category',
+    'ItemType': 'category',
+    'mmcode': 'float64',
+    'VehicleType': 'category',
+    'RegistrationYear': 'int16',
+    'make': 'category',
+    'Model': 'category',
+    'Cylinders': 'float32',
+    'cubiccapacity': 'float32',
+    'kilowatts': 'float32',
+    'bodytype': 'category',
+    'NumberOfDoors': 'float32',
+    'VehicleIntroDate': 'datetime',
+    'CustomValueEstimate': 'float64',
+    'AlarmImmobiliser': 'category',
+    'TrackingDevice': 'category',
+    'CapitalOutstanding': 'category',
+    'NewVehicle': 'category',
+    'WrittenOff': 'category',
+    'Rebuilt': 'category',
+    'Converted': 'category',
+    'CrossBorder': 'category',
+    'NumberOfVehiclesInFleet': 'float32',
+    'SumInsured': 'float64',
+    'TermFrequency': 'category',
+    'CalculatedPremiumPerTerm': 'float64',
+    'ExcessSelected': 'category',
+    'CoverCategory': 'category',
+    'CoverType': 'category',
+    'CoverGroup': 'category',
+    'Section': 'category',
+    'Product': 'category',
+    'StatutoryClass': 'category',
+    'StatutoryRiskType': 'category',
+    'TotalPremium': 'float64',
+    'TotalClaims': 'float64',
+}
+
+DATETIME_COLUMNS = [col for col, kind in COLUMN_TYPES.items() if kind == 'datetime']
+INTEGER_KINDS = ('int16', 'int32')
+
+
+def csv_dtypes(usecols=None):
+    """
+    Build the dtype mapping to pass to pd.read_csv.
+    Datetime columns are parsed as categories first and converted afterwards
+    by apply_schema, so each distinct date string is parsed only once.
+    Integer columns are read as nullable integers, so a missing value does
+    not fail the read; apply_schema then narrows them.
+    Args:
+        usecols (list, optional): Columns being read. Defaults to all columns.
+    Returns:
+        dict: Column name to pandas dtype.
+    """
+    columns = COLUMN_TYPES if usecols is None else [c for c in usecols if c in COLUMN_TYPES]
+    read_types = {'datetime': 'category', 'int16': 'Int16', 'int32': 'Int32'}
+    return {col: read_types.get(COLUMN_TYPES[col], COLUMN_TYPES[col]) for col in columns}
+
+
+def to_datetime(series):
+    """
+    Convert a column to datetime, parsing each distinct value only once.
+    Args:
+        series (pd.Series): Raw date strings, plain or categorical.
+    Returns:
+        pd.Series: datetime64 column (NaT where parsing fails).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    parsed = pd.to_datetime(series.cat.categories, errors='coerce')
+    codes = series.cat.codes.to_numpy()
+    values = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def apply_schema(df):
+    """
+    Cast an already loaded frame (e.g. from Parquet or a legacy CSV read) to
+    the declared column types. Columns outside the schema are left as they are.
+    Integer columns that contain missing values become float64 (NaN).
+    Args:
+        df (pd.DataFrame): Loaded dataset.
+    Returns:
+        pd.DataFrame: The same frame with compact dtypes.
+    """
+    for col in df.columns:
+        kind = COLUMN_TYPES.get(col)
+        if kind is None or str(df[col].dtype) == kind:
+            continue
+        if kind == 'datetime':
+            df[col] = to_datetime(df[col])
+        elif kind == 'bool' and df[col].isna().any():
+            df[col] = df[col].astype('boolean')
+        elif kind in INTEGER_KINDS and df[col].isna().any():
+            df[col] = df[col].astype('float64')
+        else:
+            df[col] = df[col].astype(kind)
+    return df
+
+
+def round_integer_fills(fills):
+    """
+    Round the fill values (e.g. medians) of the schema's integer columns to
+    whole numbers, so a fractional median is not truncated when the filled
+    column is narrowed back to its integer type.
+    Args:
+        fills (dict or pd.Series): Column name to fill value.
+    Returns:
+        dict or pd.Series: A copy with the integer columns rounded.
+    """
+    fills = fills.copy()
+    for col in list(fills.keys()):
+        if COLUMN_TYPES.get(col) in INTEGER_KINDS and not pd.isna(fills[col]):
+            fills[col] = float(np.round(fills[col]))
+    return fills
+
+
+def arrow_schema(columns):
+    """
+    Build the Parquet schema for the given columns from the declared types.
+    Args:
+        columns (list): Column names in file order; all must be in COLUMN_TYPES.
+    Returns:
+        pa.Schema: Arrow schema for writing.
+    """
+    arrow_types = {
+        'category': pa.string(),
+        'datetime': pa.timestamp('ns'),
+        'bool': pa.bool_(),
+    }
+    return pa.schema([
+        pa.field(col, arrow_types.get(COLUMN_TYPES[col]) or pa.from_numpy_dtype(COLUMN_TYPES[col]))
+        for col in columns
+    ])
+
+
+def read_dataset(file_path, usecols=None, delimiter=','):
+    """
+    Read the dataset with the declared schema.
+    Args:
+        file_path (str): CSV file, Parquet file, directory of Parquet files,
+            or a column store directory (src.column_store).
+        usecols (list, optional): Only read these columns.
+        delimiter (str): Field delimiter for text input.
+    Returns:
+        pd.DataFrame: Loaded DataFrame with compact dtypes.
+    """
+    if is_column_store(file_path):
+        # Memory-mapped store: the frame wraps the mapped files, no parsing.
+        return ColumnStore(file_path).to_frame(usecols)
+    if os.path.isdir(file_path) or str(file_path).endswith('.parquet'):
+        # Text columns come back dictionary-encoded, so they never exist as
+        # Python string objects.
+        text_cols = [col for col, kind in COLUMN_TYPES.items()
+                     if kind in ('category', 'datetime') and (usecols is None or col in usecols)]
+        df = pq.read_table(file_path, columns=usecols, read_dictionary=text_cols).to_pandas()
+    else:
+        df = pd.read_csv(file_path, delimiter=delimiter, usecols=usecols,
+                         dtype=csv_dtypes(usecols))
+    return apply_schema(df)
+
+
+def _parquet_files(file_path):
+    if os.path.isdir(file_path):
+        return sorted(os.path.join(file_path, name) for name in os.listdir(file_path)
+                      if name.endswith('.parquet'))
+    return [file_path]
+
+
+def iter_dataset(file_path, chunksize=100_000, usecols=None, delimiter=','):
+    """
+    Stream the dataset in typed chunks of at most chunksize rows.
+    Args:
+        file_path (str): CSV file, Parquet file or directory of Parquet files.
+        chunksize (int): Maximum rows per chunk.
+        usecols (list, optional): Only read these columns.
+        delimiter (str): Field delimiter for text input.
+    Yields:
+        pd.DataFrame: Chunks with the declared dtypes and a running row index.
+    """
+    if is_column_store(file_path):
+        frame = ColumnStore(file_path).to_frame(usecols)
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+        return
+    if os.path.isdir(file_path) or str(file_path).endswith('.parquet'):
+        text_cols = [col for col, kind in COLUMN_TYPES.items()
+                     if kind in ('category', 'datetime') and (usecols is None or col in usecols)]
+        offset = 0
+        for path in _parquet_files(file_path):
+            parquet_file = pq.ParquetFile(path, read_dictionary=text_cols)
+            for batch in parquet_file.iter_batches(batch_size=chunksize, columns=usecols):
+                chunk = batch.to_pandas()
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield apply_schema(chunk)
+    else:
+        reader = pd.read_csv(file_path, delimiter=delimiter, usecols=usecols,
+                             dtype=csv_dtypes(usecols), chunksize=chunksize)
+        for chunk in reader:
+            yield apply_schema(chunk)
+
+
+def memory_report(file_path, nrows=None, usecols=None, delimiter=','):
+    """
+    Compare the resident size of a plain pandas read against the schema read.
+    Args:
+        file_path (str): CSV file to measure.
+        nrows (int, optional): Only measure the first nrows rows.
+        usecols (list, optional): Only measure these columns.
+        delimiter (str): Field delimiter.
+    Returns:
+        pd.DataFrame: Bytes per column before and after, with the ratio.
+    """
+    before = pd.read_csv(file_path, delimiter=delimiter, usecols=usecols,
+                         nrows=nrows, low_memory=False)
+    after = apply_schema(pd.read_csv(file_path, delimiter=delimiter, usecols=usecols,
+                                     nrows=nrows, dtype=csv_dtypes(usecols)))
+
+    report = pd.DataFrame({
+        'before_bytes': before.memory_usage(index=False, deep=True),
+        'after_bytes': after.memory_usage(index=False, deep=True),
+    })
+    report['ratio'] = report['before_bytes'] / report['after_bytes']
+
+    total_before = report['before_bytes'].sum()
+    total_after = report['after_bytes'].sum()
+    print(f"Memory before: {total_before / 1e6:,.1f} MB, after: {total_after / 1e6:,.1f} MB "
+          f"({total_before / total_after:.1f}x smaller)")
+    return report
@@ -0,0 +1,448 @@
+import json
+import os
+import pickle
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.schema import iter_dataset
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'notebook', 'models')
+
+# Features of the premium models, in model order.
+FEATURE_NAMES = [
+    'IsVATRegistered', 'LegalType', 'AccountType', 'MainCrestaZone', 'SubCrestaZone', 'ItemType',
+    'mmcode', 'VehicleType', 'make', 'Model', 'Cylinders', 'cubiccapacity', 'kilowatts', 'bodytype',
+    'NumberOfDoors', 'VehicleIntroDate', 'CustomValueEstimate', 'AlarmImmobiliser', 'TrackingDevice',
+    'CapitalOutstanding', 'NewVehicle', 'WrittenOff', 'Rebuilt', 'Converted', 'CrossBorder',
+    'SumInsured', 'TermFrequency', 'CalculatedPremiumPerTerm', 'ExcessSelected', 'CoverCategory',
+    'CoverType', 'CoverGroup', 'Section', 'Product', 'StatutoryClass', 'StatutoryRiskType',
+    'TotalPremium', 'VehicleAge', 'Province_Free State', 'Province_Gauteng',
+    'Province_KwaZulu-Natal', 'Province_Limpopo', 'Province_Mpumalanga', 'Province_North West',
+    'Province_Northern Cape', 'Province_Western Cape', 'Gender_Male', 'Gender_Not specified',
+    'MaritalStatus_Not specified', 'MaritalStatus_Single', 'PremiumPerInsured', 'ClaimRatio',
+    'PremiumPerClaim',
+]
+
+# Engineered features added after encoding, in terms of the raw columns.
+RATIO_FEATURES = {
+    'PremiumPerInsured': ('TotalPremium', 'SumInsured'),
+    'ClaimRatio': ('TotalClaims', 'TotalPremium'),
+    'PremiumPerClaim': ('TotalPremium', 'TotalClaims'),
+}
+
+
+def features_for(target, feature_names=FEATURE_NAMES):
+    """
+    Features a model of target may be trained on: the target itself and the
+    ratios in RATIO_FEATURES computed from it are left out, since they would
+    leak the target into the features.
+    Args:
+        target (str): Target column.
+        feature_names (list): Candidate features, in model order.
+    Returns:
+        list: The remaining features, in model order.
+    """
+    return [name for name in feature_names
+            if name != target and target not in RATIO_FEATURES.get(name, ())]
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def export_native(pickle_path, native_path=None):
+    """
+    Save a pickled XGBoost model in XGBoost's own binary (UBJSON) format.
+    Native files load faster than pickles, do not execute code on load and
+    stay readable across XGBoost versions.
+    Args:
+        pickle_path (str): Pickled XGBRegressor/Booster.
+        native_path (str, optional): Output path. Defaults to <name>.ubj next
+            to the pickle.
+    Returns:
+        str: The native model path.
+    """
+    native_path = native_path or os.path.splitext(pickle_path)[0] + '.ubj'
+    with warnings.catch_warnings():
+        # Old pickles trigger a "please re-export" warning, which this does.
+        warnings.simplefilter('ignore', UserWarning)
+        with open(pickle_path, 'rb') as f:
+            model = pickle.load(f)
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    booster.save_model(native_path)
+    print(f"Exported {pickle_path} to {native_path}")
+    return native_path
+
+
+def load_model(path):
+    """
+    Load a model once per process; later calls return the cached Booster.
+    For a .pkl path, a native .ubj/.json file with the same name is preferred
+    when present.
+    Args:
+        path (str): Model file (.ubj, .json or .pkl).
+    Returns:
+        xgboost.Booster: The model.
+    """
+    import xgboost as xgb
+
+    path = os.path.abspath(path)
+    stem, ext = os.path.splitext(path)
+    if ext == '.pkl':
+        for native_ext in ('.ubj', '.json'):
+            if os.path.exists(stem + native_ext):
+                path = stem + native_ext
+                break
+    with _models_lock:
+        mtime = os.stat(path).st_mtime_ns
+        cached = _models.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        if path.endswith('.pkl'):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                with open(path, 'rb') as f:
+                    model = pickle.load(f)
+            if not hasattr(model, 'predict'):
+                raise TypeError(
+                    f"{path} holds a {type(model).__name__}, not a trained model "
+                    f"(LinearRegression.pkl only stores the training feature names)."
+                )
+            booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        else:
+            booster = xgb.Booster()
+            booster.load_model(path)
+        _models[path] = (mtime, booster)
+        print(f"Loaded model {path}")
+        return booster
+
+
+def clear_model_cache():
+    """Forget all loaded models."""
+    with _models_lock:
+        _models.clear()
+
+
+def _as_text(series):
+    """String form of label-encoded values; dates are written as YYYY-MM-DD."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.dt.strftime('%Y-%m-%d')
+    return series.astype(str)
+
+
+class FeatureEncoder:
+    """
+    Turns raw policy rows into the model's feature matrix.
+
+    The training features are: categorical columns label-encoded (codes of
+    the sorted training classes, as sklearn's LabelEncoder), one-hot dummies
+    with the first level dropped for Province, Gender and MaritalStatus,
+    VehicleAge, and the premium/claim ratios in RATIO_FEATURES. Which columns
+    are one-hot and which are label-encoded is read off the model's feature
+    names; the label classes must come from the training data (fit) or a
+    saved encoder (load). Unknown classes and infinite ratios become NaN,
+    which XGBoost treats as missing.
+    """
+
+    def __init__(self, feature_names=FEATURE_NAMES, classes=None):
+        """
+        Args:
+            feature_names (list): Model features, in model order.
+            classes (dict, optional): Column -> sorted training classes.
+        """
+        self.feature_names = list(feature_names)
+        self.classes = classes or {}
+        self.dummies = {}
+        for name in self.feature_names:
+            prefix, _, level = name.partition('_')
+            if level and name not in RATIO_FEATURES:
+                self.dummies.setdefault(prefix, []).append((name, level))
+        self.derived = set(RATIO_FEATURES) | {'VehicleAge'}
+        self.base_columns = [name for name in self.feature_names
+                             if name not in self.derived and '_' not in name]
+        self._lookups = {}
+        self._record_maps = {}
+
+    @classmethod
+    def for_model(cls, booster, classes=None):
+        """Encoder for the feature names stored in a Booster."""
+        return cls(booster.feature_names, classes)
+
+    def input_columns(self):
+        """Raw columns the encoder reads."""
+        columns = set(self.base_columns) | set(self.dummies)
+        columns |= {col for pair in RATIO_FEATURES.values() for col in pair}
+        columns |= {'TransactionMonth', 'RegistrationYear'}
+        return sorted(columns)
+
+    def _is_label_column(self, series):
+        return not pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype)
+
+    def fit(self, df):
+        """
+        Learn the label classes of the categorical base columns from training data.
+        Returns:
+            FeatureEncoder: self
+        """
+        for col in self.base_columns:
+            if col in df.columns and self._is_label_column(df[col]):
+                self.classes[col] = sorted(_as_text(df[col].dropna()).unique().tolist())
+        self._lookups = {}
+        self._record_maps = {}
+        return self
+
+    def _label_codes(self, col, series):
+        if col not in self.classes:
+            # Classes fitted on the scored data would give codes the model never saw.
+            raise ValueError(f"No training classes for {col}: fit the encoder on the training data "
+                             f"or load the encoder saved with the model.")
+        lookup = self._lookups.get(col)
+        if lookup is None:
+            lookup = self._lookups[col] = pd.Index(self.classes[col])
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Map each category once, then broadcast through the codes.
+            cat_codes = lookup.get_indexer(series.cat.categories.astype(str))
+            codes = np.where(series.cat.codes >= 0, cat_codes[series.cat.codes], -1)
+        else:
+            codes = lookup.get_indexer(_as_text(series))
+        return np.where(codes >= 0, codes, np.nan)
+
+    def transform(self, df):
+        """
+        Build the feature matrix.
+        Args:
+            df (pd.DataFrame): Raw rows with the columns of input_columns();
+                missing columns become missing features.
+        Returns:
+            np.ndarray: float32 matrix, one column per feature in model order.
+        """
+        out = np.full((len(df), len(self.feature_names)), np.nan, dtype=np.float32)
+        position = {name: i for i, name in enumerate(self.feature_names)}
+
+        def numeric(col):
+            if col not in df.columns:
+                return np.full(len(df), np.nan)
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+        for col in self.base_columns:
+            if col not in df.columns:
+                continue
+            if self._is_label_column(df[col]):
+                out[:, position[col]] = self._label_codes(col, df[col])
+            else:
+                out[:, position[col]] = numeric(col)
+
+        for prefix, levels in self.dummies.items():
+            if prefix not in df.columns:
+                continue
+            values = df[prefix].astype(str).to_numpy()
+            for name, level in levels:
+                out[:, position[name]] = values == level
+
+        if 'VehicleAge' in position and 'RegistrationYear' in df.columns:
+            if 'TransactionMonth' in df.columns:
+                year = pd.to_datetime(df['TransactionMonth'], errors='coerce').dt.year.to_numpy(dtype='float64', na_value=np.nan)
+            else:
+                year = float(pd.Timestamp.now().year)
+            out[:, position['VehicleAge']] = year - numeric('RegistrationYear')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, (num, den) in RATIO_FEATURES.items():
+                if name in position:
+                    ratio = numeric(num) / numeric(den)
+                    ratio[~np.isfinite(ratio)] = np.nan
+                    out[:, position[name]] = ratio
+        return out
+
+    def transform_record(self, record):
+        """
+        Feature vector for a single raw row given as a dict, without building
+        a DataFrame; used for low-latency quotes. Matches transform().
+        Returns:
+            np.ndarray: float32 matrix with one row.
+        """
+        if not self._record_maps:
+            self._record_maps = {col: {c: i for i, c in enumerate(classes)}
+                                 for col, classes in self.classes.items()}
+
+        def number(col):
+            value = record.get(col)
+            try:
+                return np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                return np.nan
+
+        row = np.full(len(self.feature_names), np.nan, dtype=np.float32)
+        for i, name in enumerate(self.feature_names):
+            if name in self.derived:
+                continue
+            if name in self.base_columns:
+                value = record.get(name)
+                if name in self._record_maps:
+                    if value is not None and not pd.isna(value):
+                        text = value.strftime('%Y-%m-%d') if isinstance(value, pd.Timestamp) else str(value)
+                        row[i] = self._record_maps[name].get(text, np.nan)
+                else:
+                    row[i] = number(name)
+            else:
+                prefix, _, level = name.partition('_')
+                if prefix in record:
+                    row[i] = str(record[prefix]) == level
+
+        names = {name: i for i, name in enumerate(self.feature_names)}
+        if 'VehicleAge' in names and 'RegistrationYear' in record:
+            month = pd.to_datetime(record.get('TransactionMonth'), errors='coerce')
+            year = pd.Timestamp.now().year if 'TransactionMonth' not in record else month.year
+            row[names['VehicleAge']] = year - number('RegistrationYear')
+        for name, (num, den) in RATIO_FEATURES.items():
+            if name in names:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    ratio = np.float64(number(num)) / np.float64(number(den))
+                row[names[name]] = ratio if np.isfinite(ratio) else np.nan
+        return row[np.newaxis, :]
+
+    def to_dict(self):
+        """Serialisable encoder state."""
+        return {'feature_names': self.feature_names, 'classes': self.classes}
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild an encoder from to_dict output."""
+        return cls(state['feature_names'], state['classes'])
+
+    def save(self, path):
+        """Write the encoder state to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """Load an encoder written by save."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class Scorer:
+    """
+    Premium model plus its feature encoder, for batch and single-quote scoring.
+    """
+
+    def __init__(self, model_path=os.path.join(MODELS_DIR, 'XGBoost.pkl'), encoder_path=None, encoder=None):
+        """
+        Args:
+            model_path (str): Model file; loaded through the process-wide cache.
+            encoder_path (str, optional): Saved FeatureEncoder. Defaults to
+                <model name>_encoder.json next to the model, which
+                src.training writes with every model.
+            encoder (FeatureEncoder, optional): Encoder fitted on the
+                training data, used instead of a saved one.
+        Raises:
+            FileNotFoundError: If no encoder is given and none is saved.
+        """
+        self.booster = load_model(model_path)
+        if encoder is None:
+            encoder_path = encoder_path or os.path.splitext(model_path)[0] + '_encoder.json'
+            if not os.path.exists(encoder_path):
+                raise FileNotFoundError(
+                    f"No feature encoder for {model_path} (expected {encoder_path}). The label "
+                    f"classes come from the training data: run `python -m scripts train` first.")
+            encoder = FeatureEncoder.load(encoder_path)
+        self.encoder = encoder
+
+    def predict(self, df):
+        """
+        Score a DataFrame of raw rows.
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        return self.booster.inplace_predict(self.encoder.transform(df))
+
+    def quote(self, record):
+        """
+        Score a single policy (or a few), given as dict(s) of raw column values.
+        Returns:
+            float or np.ndarray: The prediction(s).
+        """
+        if isinstance(record, dict):
+            return float(self.booster.inplace_predict(self.encoder.transform_record(record))[0])
+        return self.predict(pd.DataFrame(record))
+
+    def score_file(self, input_path, output_path, batch_size=100_000, id_columns=('PolicyID',),
+                   prediction_col='prediction', delimiter=','):
+        """
+        Stream a dataset through the model in fixed-size batches and write
+        the predictions.
+        Args:
+            input_path (str): CSV file, Parquet file or directory of Parquet files.
+            output_path (str): Output file; Parquet if it ends in .parquet,
+                otherwise CSV.
+            batch_size (int): Rows per batch.
+            id_columns (tuple): Input columns copied to the output next to
+                the prediction.
+            prediction_col (str): Name of the prediction column.
+            delimiter (str): Field delimiter for text input.
+        Returns:
+            dict: rows, seconds, rows_per_sec and per-batch latency
+            (batches, latency_p50_ms, latency_p95_ms, latency_max_ms).
+        """
+        id_columns = list(id_columns)
+        if os.path.isdir(input_path) or str(input_path).endswith('.parquet'):
+            available = pq.ParquetDataset(input_path).schema.names
+        else:
+            available = pd.read_csv(input_path, delimiter=delimiter, nrows=0).columns
+        wanted = set(self.encoder.input_columns()) | set(id_columns)
+        columns = [col for col in available if col in wanted]
+        writer = None
+        rows = 0
+        latencies = []
+        start = time.perf_counter()
+        try:
+            for chunk in iter_dataset(input_path, batch_size, usecols=columns, delimiter=delimiter):
+                batch_start = time.perf_counter()
+                result = chunk[[col for col in id_columns if col in chunk.columns]].copy()
+                result[prediction_col] = self.predict(chunk)
+                latencies.append(time.perf_counter() - batch_start)
+
+                if str(output_path).endswith('.parquet'):
+                    table = pa.Table.from_pandas(result, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, table.schema)
+                    writer.write_table(table)
+                else:
+                    result.to_csv(output_path, mode='a' if rows else 'w', header=not rows, index=False)
+                rows += len(result)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        seconds = time.perf_counter() - start
+        latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        report = {
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_sec': rows / seconds if seconds else 0.0,
+            'batches': len(latencies),
+            'latency_p50_ms': float(np.percentile(latencies_ms, 50)),
+            'latency_p95_ms': float(np.percentile(latencies_ms, 95)),
+            'latency_max_ms': float(latencies_ms.max()),
+        }
+        print(f"Scored {rows} rows in {seconds:.2f}s ({report['rows_per_sec']:.0f} rows/sec), "
+              f"batch latency p50 {report['latency_p50_ms']:.1f} ms, p95 {report['latency_p95_ms']:.1f} ms")
+        print(f"Predictions saved to {output_path}")
+        return report
+
+
+def main():
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+    scorer = Scorer()
+    scorer.score_file(os.path.join(DATA_DIR, 'output.csv'), os.path.join(DATA_DIR, 'predictions.parquet'))
+
+
+if __name__ == '__main__':
+    main()
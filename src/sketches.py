@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of the true value while memory grows only with
+    the dynamic range of the data, not with the number of rows. Two sketches
+    built over different chunks can be merged by adding their bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _add_buckets(self, store, magnitudes):
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        buckets, counts = np.unique(keys, return_counts=True)
+        for bucket, count in zip(buckets.tolist(), counts.tolist()):
+            store[bucket] = store.get(bucket, 0) + count
+
+    def update(self, values):
+        """
+        Add a batch of values; NaNs are ignored.
+        Args:
+            values (array-like): Numeric values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        negative = -values[values < 0]
+        self.zero_count += int(values.size - positive.size - negative.size)
+        if positive.size:
+            self._add_buckets(self.positive, positive)
+        if negative.size:
+            self._add_buckets(self.negative, negative)
+
+    def merge(self, other):
+        """
+        Fold another sketch with the same accuracy into this one.
+        Args:
+            other (QuantileSketch): Sketch to merge.
+        Returns:
+            QuantileSketch: self, for chaining.
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for bucket, count in other_store.items():
+                store[bucket] = store.get(bucket, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _bucket_value(self, bucket):
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        Estimate the q-th quantile.
+        Args:
+            q (float): Quantile in [0, 1].
+        Returns:
+            float: Estimated value, or NaN if the sketch is empty.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return max(-self._bucket_value(bucket), self.min)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return min(self._bucket_value(bucket), self.max)
+        return self.max
+
+    def median(self):
+        """Estimate the median."""
+        return self.quantile(0.5)
+
+    def to_dict(self):
+        """Serialise the sketch to a JSON-compatible dict."""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'positive': {str(k): v for k, v in self.positive.items()},
+            'negative': {str(k): v for k, v in self.negative.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild a sketch produced by to_dict."""
+        sketch = cls(state['relative_accuracy'])
+        sketch.positive = {int(k): v for k, v in state['positive'].items()}
+        sketch.negative = {int(k): v for k, v in state['negative'].items()}
+        sketch.zero_count = state['zero_count']
+        sketch.count = state['count']
+        if sketch.count:
+            sketch.min = state['min']
+            sketch.max = state['max']
+        return sketch
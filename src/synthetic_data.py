@@ -0,0 +1,268 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.schema import COLUMN_TYPES, apply_schema
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+# Named sizes for benchmarks and the command line.
+SIZES = {'100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Rows per generated block. Each block has its own seed, so the output for a
+# given seed is the same whatever chunk size the caller streams with.
+BLOCK_ROWS = 100_000
+
+# Province shares and postal code ranges (4-digit South African codes), with
+# roughly the number of distinct codes the real extract has per province.
+PROVINCES = {
+    'Gauteng': (0.393, (1, 2199), 290),
+    'Western Cape': (0.170, (6500, 8099), 190),
+    'KwaZulu-Natal': (0.169, (2900, 4730), 170),
+    'North West': (0.143, (2500, 2899), 60),
+    'Mpumalanga': (0.052, (1000, 2499), 70),
+    'Eastern Cape': (0.031, (4731, 6499), 50),
+    'Limpopo': (0.025, (500, 999), 40),
+    'Free State': (0.008, (9300, 9999), 25),
+    'Northern Cape': (0.006, (8100, 8999), 15),
+}
+
+MAKES = {
+    'TOYOTA': 0.81, 'MERCEDES-BENZ': 0.04, 'VOLKSWAGEN': 0.03, 'NISSAN': 0.03, 'HYUNDAI': 0.02,
+    'FORD': 0.015, 'ISUZU': 0.01, 'AUDI': 0.008, 'BMW': 0.008, 'HONDA': 0.006, 'MAZDA': 0.006,
+    'KIA': 0.005, 'RENAULT': 0.005, 'CHEVROLET': 0.004, 'MITSUBISHI': 0.003,
+}
+
+# (CoverType, CoverCategory, share of cover rows, claim probability, median claim)
+COVERS = [
+    ('Own Damage', 'Own damage', 0.18, 0.0060, 20_000),
+    ('Third Party', 'Third Party', 0.10, 0.0010, 15_000),
+    ('Windscreen', 'Windscreen', 0.17, 0.0030, 3_000),
+    ('Passenger Liability', 'Passenger Liability', 0.09, 0.0002, 50_000),
+    ('Signage and Vehicle Wraps', 'Signage and Vehicle Wraps', 0.09, 0.0001, 2_000),
+    ('Keys and Alarms', 'Keys and Alarms', 0.09, 0.0004, 1_500),
+    ('Emergency Charges', 'Emergency Charges', 0.09, 0.0003, 2_500),
+    ('Cleaning and Removal of Accident Debris', 'Cleaning and Removal of Accident Debris', 0.09, 0.0002, 2_000),
+    ('Income Protector', 'Income Protector', 0.10, 0.0005, 8_000),
+]
+
+MONTHS = pd.date_range('2013-10-01', '2015-08-01', freq='MS')
+
+
+def _choice(rng, labels, p, size, missing=0.0):
+    """Categorical draw as an object array, with a share of missing values."""
+    p = np.asarray(p, dtype=np.float64)
+    values = np.asarray(labels, dtype=object)[rng.choice(len(labels), size=size, p=p / p.sum())]
+    if missing:
+        values[rng.random(size) < missing] = None
+    return values
+
+
+def _policies(n_policies, seed):
+    """Policy-level attributes: client, location and vehicle."""
+    rng = np.random.default_rng(seed)
+    n = n_policies
+    names = list(PROVINCES)
+    shares = np.array([PROVINCES[p][0] for p in names])
+    province = rng.choice(len(names), size=n, p=shares / shares.sum())
+
+    # A fixed set of postal codes per province (the same geography for every
+    # seed); a few codes carry most policies.
+    code_rng = np.random.default_rng(0)
+    postal = np.empty(n, dtype=np.int16)
+    for i, name in enumerate(names):
+        _, (lo, hi), n_codes = PROVINCES[name]
+        codes = np.sort(code_rng.choice(np.arange(lo, hi + 1), size=min(n_codes, hi - lo + 1), replace=False))
+        weights = code_rng.zipf(1.6, size=len(codes)).astype(np.float64)
+        members = province == i
+        postal[members] = codes[rng.choice(len(codes), size=members.sum(), p=weights / weights.sum())]
+
+    make_names = list(MAKES)
+    make_p = np.array(list(MAKES.values()))
+    make = rng.choice(len(make_names), size=n, p=make_p / make_p.sum())
+    model_idx = np.minimum(rng.zipf(1.8, size=n), 30) - 1
+    registration = np.clip(2015 - np.round(rng.gamma(2.0, 2.5, size=n)), 1987, 2015).astype(np.int16)
+    intro_year = np.minimum(registration, 2015) - rng.integers(0, 4, size=n)
+    intro_month = rng.integers(1, 13, size=n)
+    is_heavy = rng.random(n) < 0.05
+
+    policy = {
+        'PolicyID': np.arange(1, n + 1, dtype=np.int32),
+        'IsVATRegistered': rng.random(n) < 0.006,
+        'Citizenship': _choice(rng, ['  ', 'ZA', 'AF', 'ZW'], [0.89, 0.1, 0.005, 0.005], n),
+        'LegalType': _choice(rng, ['Individual', 'Private company', 'Public company', 'Close Corporation',
+                                   'Partnership', 'Sole proprietor'], [0.9, 0.04, 0.01, 0.03, 0.01, 0.01], n),
+        'Title': _choice(rng, ['Mr', 'Mrs', 'Ms', 'Miss', 'Dr'], [0.93, 0.04, 0.02, 0.007, 0.003], n),
+        'Language': np.full(n, 'English', dtype=object),
+        'Bank': _choice(rng, ['First National Bank', 'Standard Bank', 'ABSA Bank', 'Nedbank', 'Capitec Bank',
+                              'African Bank', 'Investec Bank'], [0.3, 0.25, 0.2, 0.15, 0.07, 0.02, 0.01], n, 0.15),
+        'AccountType': _choice(rng, ['Current account', 'Savings account', 'Transmission'], [0.6, 0.3, 0.1], n, 0.04),
+        'MaritalStatus': _choice(rng, ['Not specified', 'Single', 'Married'], [0.95, 0.04, 0.01], n, 0.008),
+        'Gender': _choice(rng, ['Not specified', 'Male', 'Female'], [0.95, 0.043, 0.007], n, 0.01),
+        'Country': np.full(n, 'South Africa', dtype=object),
+        'Province': np.asarray(names, dtype=object)[province],
+        'PostalCode': postal,
+        'MainCrestaZone': np.array([f'{names[p]} {c // 100 % 10}' for p, c in zip(province, postal)], dtype=object),
+        'SubCrestaZone': np.array([f'{names[p]} {c // 10 % 100}' for p, c in zip(province, postal)], dtype=object),
+        'ItemType': np.full(n, 'Mobility - Motor', dtype=object),
+        'mmcode': (rng.integers(4_000_000, 65_000_000, size=n) // 50 * 50).astype(np.float64),
+        'VehicleType': np.where(is_heavy, _choice(rng, ['Medium Commercial', 'Heavy Commercial', 'Light Commercial', 'Bus'],
+                                                  [0.5, 0.2, 0.25, 0.05], n),
+                                'Passenger Vehicle').astype(object),
+        'RegistrationYear': registration,
+        'make': np.asarray(make_names, dtype=object)[make],
+        'Model': np.array([f'{make_names[m]} MODEL {k + 1}' for m, k in zip(make, model_idx)], dtype=object),
+        'Cylinders': np.where(rng.random(n) < 0.85, 4, 6).astype(np.float32),
+        'cubiccapacity': rng.choice([1498, 1998, 2494, 2694, 2982], size=n).astype(np.float32),
+        'kilowatts': rng.choice([75, 90, 100, 111, 130], size=n).astype(np.float32),
+        'bodytype': _choice(rng, ['B/S', 'S/D', 'H/B', 'D/S', 'S/C', 'P/V'], [0.6, 0.15, 0.1, 0.07, 0.05, 0.03], n),
+        'NumberOfDoors': rng.choice([4, 5, 2, 3], size=n, p=[0.8, 0.12, 0.05, 0.03]).astype(np.float32),
+        'VehicleIntroDate': np.array([f'{m}/{y}' for m, y in zip(intro_month, intro_year)], dtype=object),
+        'CustomValueEstimate': np.where(rng.random(n) < 0.22,
+                                        np.round(rng.lognormal(np.log(180_000), 0.5, size=n), -2), np.nan),
+        'AlarmImmobiliser': _choice(rng, ['Yes', 'No'], [0.99, 0.01], n),
+        'TrackingDevice': _choice(rng, ['Yes', 'No'], [0.45, 0.55], n),
+        'CapitalOutstanding': np.where(rng.random(n) < 0.5, '0',
+                                       (rng.integers(10, 600, size=n) * 500).astype(str)).astype(object),
+        'NewVehicle': _choice(rng, ['More than 6 months', 'Less than 6 months'], [0.99, 0.01], n, 0.15),
+        'WrittenOff': _choice(rng, ['No', 'Yes'], [0.999, 0.001], n, 0.64),
+        'Rebuilt': _choice(rng, ['No', 'Yes'], [0.999, 0.001], n, 0.64),
+        'Converted': _choice(rng, ['No', 'Yes'], [0.999, 0.001], n, 0.64),
+        'CrossBorder': _choice(rng, ['No'], [1.0], n, 0.999),
+        'SumInsured': np.round(rng.lognormal(np.log(250_000), 0.6, size=n), -2),
+        'TermFrequency': _choice(rng, ['Monthly', 'Annual'], [0.995, 0.005], n),
+        'ExcessSelected': _choice(rng, ['Mobility - Windscreen', 'No excess', 'Mobility - Metered Taxis - R2000',
+                                        'Mobility - Metered Taxis - R2500', 'Mobility - Metered Taxis - R5000'],
+                                  [0.35, 0.2, 0.25, 0.15, 0.05], n),
+    }
+    # Claim propensity of the policy: location and client type move it, so the
+    # A/B risk tests have real differences to find.
+    province_risk = np.array([1.25, 0.9, 1.1, 0.8, 1.0, 1.05, 0.85, 0.95, 0.7])[province]
+    gender_risk = np.where(policy['Gender'] == 'Male', 1.15, 1.0)
+    policy['_risk'] = province_risk * gender_risk * rng.lognormal(0, 0.4, size=n)
+    return policy
+
+
+def _block(policies, start, n_rows, seed):
+    """One block of transaction rows drawn from the policy table."""
+    rng = np.random.default_rng(seed)
+    n_policies = len(policies['PolicyID'])
+    # Policy activity is skewed: a minority of policies contribute most rows.
+    idx = np.minimum((rng.pareto(1.2, size=n_rows) * n_policies / 20).astype(np.int64), n_policies - 1)
+    idx = rng.permutation(n_policies)[idx] if n_policies > 1 else idx
+
+    shares = np.array([c[2] for c in COVERS])
+    cover = rng.choice(len(COVERS), size=n_rows, p=shares / shares.sum())
+    month_weights = np.linspace(0.3, 1.0, len(MONTHS))
+    month = rng.choice(len(MONTHS), size=n_rows, p=month_weights / month_weights.sum())
+
+    rows = {col: values[idx] for col, values in policies.items() if not col.startswith('_')}
+    rows['UnderwrittenCoverID'] = (idx * len(COVERS) + cover + 1).astype(np.int32)
+    rows['TransactionMonth'] = np.asarray(MONTHS.strftime('%Y-%m-%d 00:00:00'), dtype=object)[month]
+
+    cover_names = np.array([c[0] for c in COVERS], dtype=object)
+    rows['CoverType'] = cover_names[cover]
+    rows['CoverCategory'] = np.array([c[1] for c in COVERS], dtype=object)[cover]
+    rows['CoverGroup'] = np.where(rows['VehicleType'] == 'Passenger Vehicle', 'Comprehensive - Taxi',
+                                  'Commercial Vehicles').astype(object)
+    rows['Section'] = np.where(cover_names[cover] == 'Third Party', 'Optional Extended Covers',
+                               'Motor Comprehensive').astype(object)
+    rows['Product'] = _choice(rng, ['Mobility Metered Taxis: Monthly', 'Mobility Commercial Cover: Monthly'],
+                              [0.75, 0.25], n_rows)
+    rows['StatutoryClass'] = np.full(n_rows, 'Commercial', dtype=object)
+    rows['StatutoryRiskType'] = np.full(n_rows, 'IFRS Constant', dtype=object)
+    rows['NumberOfVehiclesInFleet'] = np.full(n_rows, np.nan, dtype=np.float32)
+
+    # Premium per term scales with the sum insured; many rows collect nothing
+    # in the month and a few carry refunds.
+    rate = rng.lognormal(np.log(2.5e-4), 0.7, size=n_rows)
+    per_term = np.round(rows['SumInsured'] * rate, 2)
+    rows['CalculatedPremiumPerTerm'] = per_term
+    collected = rng.random(n_rows)
+    premium = np.where(collected < 0.45, 0.0, per_term / 1.15)
+    premium = np.where(collected > 0.995, -premium, premium)
+    rows['TotalPremium'] = np.round(premium, 6)
+
+    # Claims: rare events with a heavy (lognormal-Pareto) severity tail.
+    claim_p = np.array([c[3] for c in COVERS])[cover] * policies['_risk'][idx]
+    median = np.array([c[4] for c in COVERS], dtype=np.float64)[cover]
+    has_claim = rng.random(n_rows) < claim_p
+    severity = median * rng.lognormal(0, 1.0, size=n_rows) * (1 + rng.pareto(2.5, size=n_rows))
+    rows['TotalClaims'] = np.where(has_claim, np.round(severity, 2), 0.0)
+
+    return pd.DataFrame({col: rows[col] for col in COLUMN_TYPES},
+                        index=pd.RangeIndex(start, start + n_rows))
+
+
+def iter_synthetic(n_rows, seed=0, n_policies=None):
+    """
+    Stream a synthetic MachineLearningRating extract in blocks of BLOCK_ROWS.
+
+    Columns, order and raw value formats follow the real pipe-delimited file
+    (dates as text, categoricals as strings); distributions mimic it: a few
+    percent of rows with mostly-zero, heavy-tailed TotalClaims, Gauteng-heavy
+    provinces with a few hundred postal codes, Toyota-dominated makes and
+    several cover rows per policy.
+    Args:
+        n_rows (int): Total rows.
+        seed (int): Seed; the same seed always gives the same data.
+        n_policies (int, optional): Distinct policies. Defaults to n_rows / 40.
+    Yields:
+        pd.DataFrame: Raw (untyped) blocks with a running row index.
+    """
+    n_policies = n_policies or max(1, n_rows // 40)
+    policy_seed, *block_seeds = np.random.SeedSequence(seed).spawn(1 + -(-n_rows // BLOCK_ROWS))
+    policies = _policies(n_policies, policy_seed)
+    for i, block_seed in enumerate(block_seeds):
+        start = i * BLOCK_ROWS
+        yield _block(policies, start, min(BLOCK_ROWS, n_rows - start), block_seed)
+
+
+def generate(n_rows, seed=0, typed=True):
+    """
+    Synthetic dataset in memory.
+    Args:
+        n_rows (int): Number of rows.
+        seed (int): Random seed.
+        typed (bool): Apply the declared schema (categories, dates, downcasts)
+            as read_dataset would.
+    Returns:
+        pd.DataFrame: The dataset.
+    """
+    df = pd.concat(iter_synthetic(n_rows, seed))
+    return apply_schema(df) if typed else df
+
+
+def write_synthetic(output_path, n_rows, seed=0, delimiter='|'):
+    """
+    Write a synthetic extract as text, block by block, in the raw file layout.
+    Args:
+        output_path (str): Output file (.txt/.csv).
+        n_rows (int): Number of rows.
+        seed (int): Random seed.
+        delimiter (str): Field delimiter; the raw extract uses '|'.
+    Returns:
+        str: output_path
+    """
+    for i, block in enumerate(iter_synthetic(n_rows, seed)):
+        block.to_csv(output_path, sep=delimiter, mode='a' if i else 'w', header=not i, index=False)
+    print(f"Wrote {n_rows} synthetic rows to {output_path}")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic MachineLearningRating extract.")
+    parser.add_argument('size', help=f"Row count or one of {', '.join(SIZES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="Defaults to Data/synthetic/<size>.txt")
+    args = parser.parse_args()
+    n_rows = SIZES.get(args.size.lower()) or int(args.size)
+    output = args.output or os.path.join(DATA_DIR, 'synthetic', f'{args.size}.txt')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_synthetic(output, n_rows, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
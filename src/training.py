@@ -0,0 +1,266 @@
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.cache import DatasetCache
+from src.instrumentation import PeakMemory, instrument
+from src.schema import read_dataset
+from src.scoring import FeatureEncoder, features_for
+
+NOTEBOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'notebook')
+MODELS_DIR = os.path.join(NOTEBOOK_DIR, 'models')
+METRICS_DIR = os.path.join(NOTEBOOK_DIR, 'metrics')
+
+MODEL_NAMES = ('LinearRegression', 'RandomForest', 'XGBoost')
+TARGET = 'TotalClaims'
+
+_worker_data = {}
+
+
+def encode_dataset(df, encoder=None, target=TARGET):
+    """
+    Encode the feature matrix once for all models.
+    Args:
+        df (pd.DataFrame): Raw (cleaned) dataset.
+        encoder (FeatureEncoder, optional): Fitted encoder. A new one is
+            fitted on df otherwise, over features_for(target).
+        target (str): Target column.
+    Returns:
+        pd.DataFrame: float32 feature columns plus the target, with the
+        encoder state in .attrs['encoder'].
+    """
+    if encoder is None:
+        encoder = FeatureEncoder(features_for(target)).fit(df)
+    encoded = pd.DataFrame(encoder.transform(df), columns=encoder.feature_names)
+    encoded[target] = df[target].to_numpy(dtype='float64', na_value=np.nan)
+    encoded = encoded[encoded[target].notna()].reset_index(drop=True)
+    encoded.attrs['encoder'] = encoder.to_dict()
+    return encoded
+
+
+@instrument()
+def load_encoded(input_path, target=TARGET, cache=None):
+    """
+    Encoded training matrix for input_path, reused from the dataset cache
+    while neither the input nor the encoding code has changed.
+    Returns:
+        tuple: (encoded frame, fitted FeatureEncoder)
+    """
+    cache = cache or DatasetCache()
+    code = inspect.getsource(FeatureEncoder) + inspect.getsource(encode_dataset)
+    params = {
+        'step': 'encode_features',
+        'features': features_for(target),
+        'target': target,
+        'code': hashlib.sha256(code.encode()).hexdigest(),
+    }
+    encoded = cache.get_or_compute(input_path, params,
+                                   lambda: encode_dataset(read_dataset(input_path), target=target))
+    return encoded, FeatureEncoder.from_dict(encoded.attrs['encoder'])
+
+
+def _linear_design(X, categorical, n_classes):
+    """
+    Sparse design matrix for the linear model: numeric features as they are
+    (missing as 0) and label-encoded columns expanded to one-hot indicators,
+    which stays small even for make/Model with thousands of levels.
+    """
+    numeric = [i for i in range(X.shape[1]) if i not in categorical]
+    blocks = [sparse.csr_matrix(np.nan_to_num(X[:, numeric], nan=0.0, posinf=0.0, neginf=0.0))]
+    rows = np.arange(X.shape[0])
+    for i, size in zip(categorical, n_classes):
+        codes = X[:, i]
+        valid = ~np.isnan(codes)
+        blocks.append(sparse.csr_matrix((np.ones(valid.sum(), dtype=np.float32),
+                                         (rows[valid], codes[valid].astype(np.int64))),
+                                        shape=(X.shape[0], size)))
+    return sparse.hstack(blocks, format='csr')
+
+
+def _make_model(name, threads):
+    if name == 'LinearRegression':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if name == 'RandomForest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=threads)
+    if name == 'XGBoost':
+        from xgboost import XGBRegressor
+        return XGBRegressor(learning_rate=0.1, n_estimators=100, random_state=42,
+                            tree_method='hist', n_jobs=threads)
+    raise ValueError(f"Unknown model: {name}")
+
+
+def regression_metrics(y_true, y_pred):
+    """MAE, MSE, RMSE and R2, as stored in notebook/metrics."""
+    error = y_true - y_pred
+    mse = float(np.mean(error ** 2))
+    total = float(np.sum((y_true - y_true.mean()) ** 2))
+    return {
+        'MAE': float(np.mean(np.abs(error))),
+        'MSE': mse,
+        'RMSE': float(np.sqrt(mse)),
+        'R2': 1 - float(np.sum(error ** 2)) / total if total else float('nan'),
+    }
+
+
+def _init_worker(x_path, y_path, features, categorical, n_classes):
+    _worker_data['X'] = np.load(x_path, mmap_mode='r')
+    _worker_data['y'] = np.load(y_path, mmap_mode='r')
+    _worker_data['features'] = features
+    _worker_data['categorical'] = categorical
+    _worker_data['n_classes'] = n_classes
+
+
+def _run_task(name, fold, train_idx, test_idx, threads, model_path):
+    """Fit one model on one split; save it when model_path is given."""
+    X, y = _worker_data['X'], _worker_data['y']
+    started = time.time()
+    start = time.perf_counter()
+    with PeakMemory() as memory:
+        X_train, X_test = X[train_idx], X[test_idx]
+        if name == 'LinearRegression':
+            X_train = _linear_design(X_train, _worker_data['categorical'], _worker_data['n_classes'])
+            X_test = _linear_design(X_test, _worker_data['categorical'], _worker_data['n_classes'])
+        model = _make_model(name, threads)
+        model.fit(X_train, y[train_idx])
+        metrics = regression_metrics(np.asarray(y[test_idx]), model.predict(X_test))
+        if model_path is not None:
+            if name == 'XGBoost':
+                model.get_booster().feature_names = list(_worker_data['features'])
+                model.get_booster().save_model(model_path)
+            else:
+                with open(model_path, 'wb') as f:
+                    pickle.dump(model, f)
+    return {'model': name, 'fold': fold, 'seconds': time.perf_counter() - start,
+            'started': started, 'finished': time.time(),
+            'peak_memory_mb': memory.peak / 1024 ** 2, **metrics}
+
+
+def _model_path(models_dir, name):
+    return os.path.join(models_dir, f"{name}.ubj" if name == 'XGBoost' else f"{name}.pkl")
+
+
+@instrument()
+def train_models(input_path, models=MODEL_NAMES, n_folds=5, test_size=0.2, n_jobs=None,
+                 seed=42, target=TARGET, models_dir=MODELS_DIR, metrics_dir=METRICS_DIR, cache=None):
+    """
+    Train and cross-validate the premium models, writing models and metrics.
+
+    The features are features_for(target), so no ratio computed from the
+    target is used to predict it. They are encoded once (and cached); folds
+    and models then run as independent tasks on a process pool that shares
+    the encoded matrix through a memory-mapped file. Each model gets k
+    cross-validation folds on the training split and a final fit evaluated
+    on the held-out split.
+    Args:
+        input_path (str): Cleaned dataset (CSV, Parquet file or directory).
+        models (tuple): Models to train, from MODEL_NAMES.
+        n_folds (int): Cross-validation folds; 0 skips cross-validation.
+        test_size (float): Held-out fraction for the reported metrics.
+        n_jobs (int, optional): CPU budget shared by all tasks. Defaults to
+            all cores.
+        seed (int): Seed for the splits and the models.
+        target (str): Target column.
+        models_dir (str): Where models and encoders are written.
+        metrics_dir (str): Where <model>_metrics.json files are written.
+        cache (DatasetCache, optional): Cache for the encoded matrix.
+    Returns:
+        dict: Metrics per model, as written to the JSON files.
+    """
+    n_jobs = n_jobs or os.cpu_count()
+    encoded, encoder = load_encoded(input_path, target=target, cache=cache)
+    features = encoder.feature_names
+    X = encoded[features].to_numpy(dtype=np.float32)
+    y = encoded[target].to_numpy(dtype=np.float64)
+    categorical = [features.index(col) for col in encoder.classes if col in features]
+    n_classes = [len(encoder.classes[features[i]]) for i in categorical]
+    print(f"Encoded {X.shape[0]} rows x {X.shape[1]} features")
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(y))
+    n_test = int(round(len(y) * test_size))
+    test_idx, train_idx = np.sort(order[:n_test]), np.sort(order[n_test:])
+
+    tasks = []
+    if n_folds:
+        folds = np.array_split(rng.permutation(train_idx), n_folds)
+        for k in range(n_folds):
+            fold_train = np.sort(np.concatenate(folds[:k] + folds[k + 1:]))
+            tasks += [(name, k, fold_train, np.sort(folds[k])) for name in models]
+    tasks += [(name, 'holdout', train_idx, test_idx) for name in models]
+
+    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    workers = max(1, min(n_jobs, len(tasks)))
+    threads = max(1, n_jobs // workers)
+    model_paths = [_model_path(models_dir, name) if fold == 'holdout' else None
+                   for name, fold, _, _ in tasks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        x_path, y_path = os.path.join(tmp, 'X.npy'), os.path.join(tmp, 'y.npy')
+        np.save(x_path, X)
+        np.save(y_path, y)
+        del X, encoded
+        init_args = (x_path, y_path, features, categorical, n_classes)
+        starts = time.perf_counter()
+        if workers > 1:
+            # One task per worker process, so each task's peak memory is its own.
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     max_tasks_per_child=1) as pool:
+                futures = [pool.submit(_run_task, name, fold, tr, te, threads, path)
+                           for (name, fold, tr, te), path in zip(tasks, model_paths)]
+                results = [future.result() for future in futures]
+        else:
+            _init_worker(*init_args)
+            results = [_run_task(name, fold, tr, te, threads, path)
+                       for (name, fold, tr, te), path in zip(tasks, model_paths)]
+            _worker_data.clear()
+        wall = time.perf_counter() - starts
+
+    report = {}
+    for name in models:
+        runs = [r for r in results if r['model'] == name]
+        holdout = next(r for r in runs if r['fold'] == 'holdout')
+        cv = [r for r in runs if r['fold'] != 'holdout']
+        metrics = {'model': name, **{k: holdout[k] for k in ('MAE', 'MSE', 'RMSE', 'R2')}}
+        if cv:
+            metrics['cv'] = {'folds': len(cv)}
+            for k in ('MAE', 'RMSE', 'R2'):
+                values = np.array([r[k] for r in cv])
+                metrics['cv'][f'{k}_mean'] = float(values.mean())
+                metrics['cv'][f'{k}_std'] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+        metrics['n_train'] = int(len(train_idx))
+        metrics['n_test'] = int(len(test_idx))
+        metrics['fit_seconds'] = float(sum(r['seconds'] for r in runs))
+        # Span from the model's first task starting to its last one finishing.
+        metrics['wall_time_s'] = float(max(r['finished'] for r in runs) - min(r['started'] for r in runs))
+        metrics['peak_memory_mb'] = float(max(r['peak_memory_mb'] for r in runs))
+        with open(os.path.join(metrics_dir, f"{name}_metrics.json"), 'w') as f:
+            json.dump(metrics, f)
+        encoder.save(os.path.join(models_dir, f"{name}_encoder.json"))
+        report[name] = metrics
+        print(f"{name}: RMSE {metrics['RMSE']:.2f}, R2 {metrics['R2']:.3f}, "
+              f"{metrics['fit_seconds']:.1f}s of fitting, peak {metrics['peak_memory_mb']:.0f} MB")
+    print(f"Trained {len(models)} models ({len(tasks)} fits) in {wall:.1f}s on {workers} workers")
+    return report
+
+
+def main():
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+    train_models(os.path.join(DATA_DIR, 'clean', 'cleaned_insurance_data.csv'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backends import clean_dataset
+from src.data_cleanig import clean_data
+from src.schema import read_dataset
+from src.synthetic_data import generate
+
+
+def _write_raw(tmp_path):
+    df = generate(1500, seed=6, typed=False)
+    # As many known years of 2000 as of 2003, so the median is fractional.
+    df['RegistrationYear'] = np.where(np.arange(len(df)) % 2, 2000, 2003)
+    df.loc[[3, 700], ['PostalCode', 'RegistrationYear']] = np.nan
+    df.loc[::11, 'SumInsured'] = np.nan
+    df.loc[::13, 'Gender'] = np.nan
+    df = pd.concat([df, df.iloc[[1, 2, 900]]], ignore_index=True)
+    path = tmp_path / 'raw.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('engine', ['polars', 'duckdb'])
+def test_clean_dataset_matches_pandas(tmp_path, engine):
+    pytest.importorskip(engine)
+    path = _write_raw(tmp_path)
+    expected = clean_data(read_dataset(str(path))).reset_index(drop=True)
+    result = clean_dataset(str(path), backend=engine)
+
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_series_equal(result.dtypes, expected.dtypes)
+    pd.testing.assert_frame_equal(result, expected)
+    assert result.loc[3, 'RegistrationYear'] == 2002
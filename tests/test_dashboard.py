@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+import pytest
+
+from scripts import dashboard
+from scripts.dashboard import DashboardService, LRUCache
+from src.cache import DatasetCache
+from src.data_cleanig import load_clean_data
+from src.synthetic_data import generate
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    # A hit makes 'a' the most recent, so 'b' is evicted by 'c'.
+    assert cache.get_or_compute('a', lambda: pytest.fail('a was evicted')) == 1
+    cache.get_or_compute('c', lambda: 3)
+    assert list(cache._entries) == ['a', 'c']
+    assert cache.get_or_compute('b', lambda: 20) == 20
+    assert list(cache._entries) == ['c', 'b']
+    assert cache.stats() == {'entries': 2, 'maxsize': 2, 'hits': 1, 'misses': 4, 'hit_rate': 0.2}
+
+
+def test_concurrent_misses_compute_once():
+    cache = LRUCache()
+    calls = []
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return 'value'
+
+    results = []
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_compute('key', compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ['value'] * 8
+    assert not cache._computing
+
+
+def test_refresh_serves_the_new_version(tmp_path, monkeypatch):
+    datasets = DatasetCache(str(tmp_path / 'cache'))
+    monkeypatch.setattr(dashboard, 'load_clean_data', lambda source: load_clean_data(source, cache=datasets))
+    path = tmp_path / 'raw.csv'
+    generate(800, seed=8, typed=False).to_csv(path, index=False)
+    service = DashboardService.from_source(str(path), cache_size=16)
+
+    before = service.query('trends', by='Province')
+    version = service.dataset.version
+    assert service.refresh(warm=False) is False
+
+    generate(1200, seed=9, typed=False).to_csv(path, index=False)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    assert service.refresh(warm=False) is True
+    assert service.dataset.version != version
+    assert service.dataset.rows == 1200
+
+    misses = service.cache.misses
+    after = service.query('trends', by='Province')
+    assert service.cache.misses == misses + 1
+    assert not after.equals(before)
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from src.data_cleanig import clean_data, clean_data_streaming, save_cleaned_data
+from src.schema import read_dataset
+from src.synthetic_data import generate
+
+
+def test_streaming_matches_in_memory_cleaning(tmp_path):
+    df = generate(1000, seed=2, typed=False)
+    # Missing integers in some chunks only, so chunks differ in dtype.
+    df.loc[[5, 990], ['PostalCode', 'RegistrationYear']] = np.nan
+    df.loc[::7, 'SumInsured'] = np.nan
+    # Duplicates of rows from earlier chunks.
+    df = pd.concat([df, df.iloc[[1, 2, 700]]], ignore_index=True)
+    raw_path = tmp_path / 'raw.csv'
+    df.to_csv(raw_path, index=False)
+
+    expected_path = tmp_path / 'expected.csv'
+    expected = clean_data(read_dataset(str(raw_path)))
+    save_cleaned_data(expected, expected_path)
+    streamed_path = tmp_path / 'streamed.csv'
+    rows = clean_data_streaming(str(raw_path), str(streamed_path), chunksize=97)
+
+    assert rows == len(expected) < len(df)
+    assert streamed_path.read_text() == expected_path.read_text()
@@ -0,0 +1,26 @@
+import sqlite3
+
+from src.data_conversion import month_partition_keys
+from src.db_export import SQLiteTarget, export_cleaned
+from src.synthetic_data import generate
+
+
+def _rows_per_month(path, table):
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute(f"SELECT substr(TransactionMonth, 1, 7), COUNT(*) FROM {table} "
+                            f"GROUP BY 1 ORDER BY 1").fetchall()
+    return dict(rows)
+
+
+def test_export_is_idempotent_per_month(tmp_path):
+    df = generate(2000, seed=3)
+    expected = month_partition_keys(df['TransactionMonth']).value_counts().sort_index().to_dict()
+    target = SQLiteTarget(str(tmp_path / 'export.sqlite'))
+
+    first = export_cleaned(df, target, table='policies', chunksize=300, n_jobs=4)
+    assert first['rows'] == len(df)
+    assert _rows_per_month(target.path, 'policies') == expected
+
+    second = export_cleaned(df, target, table='policies', chunksize=300, n_jobs=4)
+    assert second['rows'] == len(df)
+    assert _rows_per_month(target.path, 'policies') == expected
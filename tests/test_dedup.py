@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dedup import StreamingDeduplicator, drop_duplicate_rows, row_fingerprints
+
+
+def _frame_with_duplicates(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'PolicyID': rng.integers(0, 150, n),
+        'Province': rng.choice(['Gauteng', 'Limpopo', 'Western Cape'], n),
+        'TotalPremium': rng.choice([0.0, 10.5, 21.0, np.nan], n),
+    })
+    # Copies of early rows late in the stream, so duplicates span chunks.
+    return pd.concat([df, df.iloc[[0, 3, 7, 250]]], ignore_index=True)
+
+
+def _stream(deduplicator, df, chunksize):
+    chunks = [df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)]
+    return pd.concat([deduplicator.drop_duplicates(chunk) for chunk in chunks])
+
+
+@pytest.mark.parametrize('bits', [64, 128])
+def test_duplicates_across_chunk_boundaries(bits):
+    df = _frame_with_duplicates()
+    deduplicator = StreamingDeduplicator(bits=bits, max_runs=2)
+    result = _stream(deduplicator, df, chunksize=64)
+    expected = df.drop_duplicates()
+    pd.testing.assert_frame_equal(result, expected)
+    assert deduplicator.duplicates == len(df) - len(expected)
+
+
+def test_drop_duplicate_rows_matches_pandas():
+    df = _frame_with_duplicates(seed=1)
+    pd.testing.assert_frame_equal(drop_duplicate_rows(df), df.drop_duplicates())
+
+
+@pytest.mark.parametrize('left, right', [
+    (np.array([5, 6, 7], dtype='int16'), np.array([5.0, 6.0, 7.0])),
+    (pd.array([5, None, 7], dtype='Int32'), np.array([5.0, np.nan, 7.0])),
+    (np.array([True, False, True]), pd.array([True, False, True], dtype='boolean')),
+])
+def test_fingerprints_ignore_the_dtype_of_equal_values(left, right):
+    labels = ['a', 'b', 'c']
+    first = row_fingerprints(pd.DataFrame({'value': left, 'label': labels}), bits=128)
+    second = row_fingerprints(pd.DataFrame({'value': right, 'label': labels}), bits=128)
+    assert (first == second).all()
+    assert len(np.unique(first)) == 3
+
+
+def test_seen_set_spilled_to_disk(tmp_path):
+    df = _frame_with_duplicates(seed=2)
+    deduplicator = StreamingDeduplicator(spill_dir=str(tmp_path), max_memory_rows=50)
+    result = _stream(deduplicator, df, chunksize=40)
+    assert deduplicator._disk_runs
+    assert list(tmp_path.glob('dedup-run-*.npy'))
+    pd.testing.assert_frame_equal(result, df.drop_duplicates())
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.incremental import IncrementalAggregates
+from scripts.segment_cube import SegmentCube
+from scripts.segment_tests import claim_indicator, contingency_counts
+from src.data_conversion import month_partition_keys
+from src.synthetic_data import generate
+from src.sketches import QuantileSketch
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    """Monthly Parquet partitions of a synthetic extract, oldest first."""
+    df = generate(3000, seed=4)
+    source = tmp_path / 'monthly'
+    source.mkdir()
+    names = []
+    for month, part in df.groupby(month_partition_keys(df['TransactionMonth']), sort=True):
+        part.to_parquet(source / f"{month}.parquet", index=False)
+        names.append(f"{month}.parquet")
+    return source, names
+
+
+def _sorted_cells(cube):
+    cells = cube.cells.copy()
+    for col in cube.dimensions:
+        cells[col] = cells[col].astype(str)
+    return cells.sort_values(cube.dimensions).reset_index(drop=True)
+
+
+def test_monthly_ingest_matches_batch_build(tmp_path, partitions):
+    source, names = partitions
+    arriving = tmp_path / 'arriving'
+    arriving.mkdir()
+    for name in names:
+        os.link(source / name, arriving / name)
+        # A fresh instance each month, so the saved state is what carries over.
+        assert IncrementalAggregates(str(tmp_path / 'monthly_state')).ingest(str(arriving)) == [name]
+
+    monthly = IncrementalAggregates(str(tmp_path / 'monthly_state'))
+    batch = IncrementalAggregates(str(tmp_path / 'batch_state'))
+    clean_dir = tmp_path / 'clean'
+    assert batch.ingest(str(source), clean_dir=str(clean_dir)) == names
+    assert monthly.partitions == batch.partitions
+
+    # Cube and contingency tables equal a build over all cleaned rows at once.
+    cleaned = pd.concat([pd.read_parquet(clean_dir / name) for name in names], ignore_index=True)
+    expected = SegmentCube.build(cleaned)
+    for state in (monthly, batch):
+        pd.testing.assert_frame_equal(_sorted_cells(state.cube), _sorted_cells(expected), check_dtype=False)
+
+    outcome = claim_indicator(cleaned)
+    for col in ['Province', 'PostalCode', 'Gender']:
+        table = contingency_counts(cleaned, col, outcome)
+        table.index = table.index.astype(str)
+        for state in (monthly, batch):
+            got = state.contingency(col).reindex(table.index).reindex(columns=table.columns)
+            np.testing.assert_array_equal(got.to_numpy(), table.to_numpy())
+
+    # Sketches hold the same buckets as one sketch over every raw row.
+    raw = pd.concat([pd.read_parquet(source / name) for name in names], ignore_index=True)
+    for col in ['TotalPremium', 'SumInsured', 'RegistrationYear']:
+        sketch = QuantileSketch(monthly.relative_accuracy)
+        sketch.update(raw[col].to_numpy(dtype='float64', na_value=np.nan))
+        assert monthly.sketches[col].to_dict() == sketch.to_dict()
+        assert batch.sketches[col].to_dict() == sketch.to_dict()
+    assert monthly.chi_square(['Province']).equals(batch.chi_square(['Province']))
+
+
+def test_rewritten_partition_needs_rebuild(tmp_path, partitions):
+    source, names = partitions
+    state = IncrementalAggregates(str(tmp_path / 'state'))
+    state.ingest(str(source))
+    os.utime(source / names[0], ns=(0, 0))
+    with pytest.raises(ValueError):
+        state.pending(str(source))
+    assert state.ingest(str(source), rebuild=True) == names
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from scripts.resampling import resample_mean_difference
+
+
+@pytest.mark.parametrize('method', ['permutation', 'bootstrap'])
+def test_results_do_not_depend_on_n_jobs(method):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=300)
+    labels = (rng.random(300) < 0.4).astype(np.int8)
+    # Three blocks of resamples, so the pool really splits the work.
+    serial = resample_mean_difference(values, labels, method, n_resamples=2500, n_jobs=1, seed=7)
+    parallel = resample_mean_difference(values, labels, method, n_resamples=2500, n_jobs=2, seed=7)
+    assert serial['p_value'] == parallel['p_value']
+    assert serial['ci'] == parallel['ci']
+
+
+def test_permutation_detects_a_shift():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(1.0, 1.0, 200), rng.normal(0.0, 1.0, 200)])
+    labels = np.repeat(np.array([1, 0], dtype=np.int8), 200)
+    result = resample_mean_difference(values, labels, 'permutation', n_resamples=999, seed=0)
+    assert result['difference'] > 0.5
+    assert result['p_value'] == pytest.approx(1 / 1000)
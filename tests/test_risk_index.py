@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.risk_index import CREDIBILITY, METRICS, RiskIndex
+from src.synthetic_data import generate
+
+
+@pytest.fixture(scope='module')
+def index():
+    return RiskIndex.from_frame(generate(4000, seed=5))
+
+
+def test_lookup_falls_back_segment_province_national(index):
+    known = index.segments.iloc[0]
+    segment = index.lookup(known['PostalCode'], known['VehicleType'], known['CoverType'])
+    assert segment['level'] == 'segment'
+    assert segment['rows'] == known['rows']
+
+    province = index.lookup(known['PostalCode'], 'No such vehicle', known['CoverType'])
+    assert province['level'] == 'province'
+    assert province['Province'] == known['Province']
+    expected = index.provinces.set_index('Province').loc[known['Province']]
+    assert province['pure_premium'] == expected['pure_premium']
+    assert all(province[name] == 0.0 for name in CREDIBILITY)
+
+    national = index.lookup(-1, known['VehicleType'], known['CoverType'])
+    assert national['level'] == 'national'
+    assert national['Province'] is None
+    assert all(national[name] == index.national[name] for name in METRICS)
+
+
+def test_save_load_round_trip(index, tmp_path):
+    path = tmp_path / 'risk_index.parquet'
+    index.save(str(path))
+    loaded = RiskIndex.load(str(path))
+
+    # Categorical labels come back as strings.
+    labels = {col: str for col in ['Province', 'VehicleType', 'CoverType']}
+    pd.testing.assert_frame_equal(loaded.segments.astype(labels), index.segments.astype(labels),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(loaded.provinces.astype({'Province': str}),
+                                  index.provinces.astype({'Province': str}), check_dtype=False)
+    assert loaded.national == pytest.approx(index.national)
+    for _, row in index.segments.sample(20, random_state=0).iterrows():
+        key = (row['PostalCode'], row['VehicleType'], row['CoverType'])
+        assert loaded.lookup(*key) == pytest.approx(index.lookup(*key))
+    assert loaded.lookup(-1, 'x', 'y') == pytest.approx(index.lookup(-1, 'x', 'y'))
+
+
+@pytest.mark.parametrize('lowest', [True, False])
+def test_top_k_matches_filtered_sort(index, lowest):
+    province = index.segments['Province'].iloc[0]
+    got = index.top_k(5, by='loss_ratio', lowest=lowest, min_rows=3, province=province)
+    expected = index.segments[(index.segments['rows'] >= 3) & (index.segments['Province'] == province)]
+    expected = expected.dropna(subset=['loss_ratio'])
+    expected = expected.sort_values('loss_ratio', ascending=lowest, kind='stable').head(5)
+    np.testing.assert_array_equal(got['loss_ratio'].to_numpy(), expected['loss_ratio'].to_numpy())
+    assert len(got) == min(5, len(expected))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from src.data_cleanig import clean_data, fill_missing_values
+from src.schema import read_dataset
+from src.synthetic_data import generate
+
+
+def _write_with_missing_integers(path):
+    df = generate(500, seed=1, typed=False)
+    df.loc[5, ['PostalCode', 'RegistrationYear']] = np.nan
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_read_dataset_with_missing_integers(tmp_path):
+    path = tmp_path / 'raw.csv'
+    raw = _write_with_missing_integers(path)
+    df = read_dataset(str(path))
+    assert len(df) == len(raw)
+    assert df['PostalCode'].dtype == 'float64'
+    assert df['PostalCode'].isna().sum() == 1
+    assert str(df['PolicyID'].dtype) == 'int32'
+
+
+def test_clean_data_narrows_filled_integers(tmp_path):
+    path = tmp_path / 'raw.csv'
+    _write_with_missing_integers(path)
+    df = clean_data(read_dataset(str(path)))
+    assert str(df['PostalCode'].dtype) == 'int16'
+    assert str(df['RegistrationYear'].dtype) == 'int16'
+
+
+def test_fractional_median_is_rounded_not_truncated():
+    df = pd.DataFrame({'RegistrationYear': [2000.0, 2001.0, np.nan, 2004.0, 2005.0],
+                       'TotalPremium': [1.0, 2.0, np.nan, 4.0, 5.0]})
+    filled = fill_missing_values(df, df.median())
+    assert str(filled['RegistrationYear'].dtype) == 'int16'
+    assert filled.loc[2, 'RegistrationYear'] == 2002
+    assert filled.loc[2, 'TotalPremium'] == 3.0
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from scripts.segment_tests import adjust_pvalues
+
+P_VALUES = [0.04, 0.001, 0.03, 0.5, np.nan]
+
+# Reference values from R's p.adjust on the four non-missing p-values.
+EXPECTED = {
+    'bonferroni': [0.16, 0.004, 0.12, 1.0, np.nan],
+    'holm': [0.09, 0.004, 0.09, 0.5, np.nan],
+    'fdr_bh': [0.04 * 4 / 3, 0.004, 0.04 * 4 / 3, 0.5, np.nan],
+}
+
+
+@pytest.mark.parametrize('method', sorted(EXPECTED))
+def test_adjust_pvalues_known_values(method):
+    np.testing.assert_allclose(adjust_pvalues(P_VALUES, method), EXPECTED[method])
+
+
+def test_adjust_pvalues_unknown_method():
+    with pytest.raises(ValueError):
+        adjust_pvalues(P_VALUES, 'sidak')
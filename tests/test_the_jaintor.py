@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from scripts.the_jaintor import OutlierCapper
+
+
+def _capper():
+    train = pd.DataFrame({
+        'a': [1.0, 2.0, 3.0, 4.0, 100.0],
+        'b': [np.nan] * 5,
+        'i': np.array([1, 2, 3, 4, 100], dtype='int32'),
+        'n': pd.array([1, 2, None, 4, 100], dtype='Int64'),
+    })
+    return OutlierCapper().fit(train)
+
+
+def test_all_nan_column_is_not_capped():
+    capped = _capper().transform(pd.DataFrame({'b': [5.0, np.nan]}))
+    assert capped['b'].iloc[0] == 5.0
+    assert np.isnan(capped['b'].iloc[1])
+
+
+def test_dtypes_and_missing_values_are_kept():
+    df = pd.DataFrame({'i': np.array([0, 100], dtype='int32'),
+                       'n': pd.array([None, 100], dtype='Int64')})
+    capped = _capper().transform(df)
+    assert capped['i'].dtype == 'int32'
+    assert capped['i'].tolist() == [0, 7]
+    assert str(capped['n'].dtype) == 'Int64'
+    assert capped['n'].isna().iloc[0]
+    assert capped['n'].iloc[1] == 67
+
+
+def test_transform_clips_the_column_array_in_place():
+    df = pd.DataFrame({'a': [1.0, 200.0], 'x': [0.0, 0.0]})
+    values = df['a'].to_numpy()
+    capped = _capper().transform(df)
+    assert capped is df
+    assert df['a'].tolist() == [1.0, 7.0]
+    if values.flags.writeable:
+        assert values.tolist() == [1.0, 7.0]
+
+
+def test_transform_without_inplace_leaves_input():
+    df = pd.DataFrame({'a': [1.0, 200.0]})
+    capped = _capper().transform(df, inplace=False)
+    assert df['a'].tolist() == [1.0, 200.0]
+    assert capped['a'].tolist() == [1.0, 7.0]